@@ -11,77 +11,645 @@ and file attachments. It logs all email activity and errors in a log file.
 ✅ Features:
 - Send to multiple recipients, CC, and BCC
 - Supports plain text and HTML body
-- Allows multiple attachments
-- Logs all email activity
+- Allows multiple attachments, streamed so large files are never loaded into memory
+- Logs all email activity as JSON lines, written by a background thread with size rotation
 - Safe with environment variable password option
-- Auto retry for failed deliveries
+- Auto retry for failed deliveries, without blocking other sends while one backs off
+- Optional delivery ledger so retries and restarts never send a recipient the same email twice
+- Reusable pool of authenticated SMTP connections for bulk sends
+- Mail merge: personalised emails from a template and a CSV/NDJSON recipient list
 """
 
 import smtplib
 import os
+import atexit
 import datetime
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import queue
+import sqlite3
+import threading
 import time
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from scripts.Mailers.mime_stream import DeliveryUnconfirmed, StreamingMessage, file_hash, send_streaming
+from scripts.Mailers.mail_merge import merge, read_recipients
 
 # ------------------ CONFIGURATION ------------------
 LOG_FILE = "email_log.txt"
+LEDGER_FILE = "email_ledger.db"
 SMTP_SERVER = "smtp.gmail.com"
 SMTP_PORT = 587
 MAX_RETRIES = 3
+RETRY_DELAY = 2                     # Seconds between delivery attempts
+LOG_MAX_BYTES = 5 * 1024 * 1024     # Rotate email_log.txt at this size...
+LOG_BACKUPS = 3                     # ...keeping this many old files
+POOL_SIZE = 4
+MAX_MESSAGES_PER_CONNECTION = 100   # Gmail and most providers cap messages per session
+HEALTH_CHECK_AFTER = 30             # Seconds idle before a pooled connection is NOOP-checked
+
+
+class JSONLineFormatter(logging.Formatter):
+    """Formats a log record as one JSON object per line, including its extra fields."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.datetime.fromtimestamp(record.created).strftime("%Y-%m-%d %H:%M:%S"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_logger = logging.getLogger("hh.mailer")
+_logger.setLevel(logging.INFO)
+_logger.propagate = False
+_log_lock = threading.Lock()
+_log_listener = None
+_log_listener_file = None
+
+
+def _stop_log_listener():
+    global _log_listener, _log_listener_file
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+    _log_listener, _log_listener_file = None, None
+
+
+def _ensure_log_listener():
+    """Start the background writer for LOG_FILE (again, if LOG_FILE changed)."""
+    global _log_listener, _log_listener_file
+    if _log_listener_file == LOG_FILE:
+        return
+    with _log_lock:
+        if _log_listener_file == LOG_FILE:
+            return
+        _stop_log_listener()
+        handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                      encoding="utf-8", delay=True)
+        handler.setFormatter(JSONLineFormatter())
+        log_queue = queue.SimpleQueue()
+        _logger.handlers = [QueueHandler(log_queue)]
+        _log_listener = QueueListener(log_queue, handler)
+        _log_listener.start()
+        _log_listener_file = LOG_FILE
+
+
+def log_message(message: str, level=logging.INFO, **fields):
+    """
+    Log an entry to email_log.txt as a JSON line.
+
+    The entry is only queued here; a background thread keeps the file open,
+    writes it and rotates the file every LOG_MAX_BYTES.
+
+    Args:
+        message (str): Human-readable message
+        level (int): logging level
+        **fields: Extra JSON fields (event, subject, recipients, duration_ms, ...)
+    """
+    _ensure_log_listener()
+    _logger.log(level, message, extra={"fields": fields})
+
+
+def flush_log():
+    """Write all queued log entries and close the log file (reopened on the next entry)."""
+    with _log_lock:
+        _stop_log_listener()
+
+
+atexit.register(flush_log)
+
+
+class RetryScheduler:
+    """
+    Runs send attempts on worker threads. A failed attempt is rescheduled after
+    a delay instead of sleeping, so the worker is free for other messages while
+    one message backs off.
+
+    Usage:
+        with SMTPConnectionPool(sender, password) as pool, RetryScheduler() as scheduler:
+            futures = [send_email(..., pool=pool, scheduler=scheduler) for ...]
+        sent = [f.result() for f in futures]
+    """
+
+    def __init__(self, workers=POOL_SIZE):
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._heap = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
+    def call_later(self, delay, fn, *args):
+        """Run fn(*args) on a worker thread after `delay` seconds."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("RetryScheduler is closed")
+            self._pending += 1
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._order), fn, args))
+            self._cond.notify_all()
 
-def log_message(message: str):
-    """Append a log entry with a timestamp to email_log.txt."""
-    with open(LOG_FILE, "a", encoding="utf-8") as log:
-        log.write(f"[{datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
+    def run(self, attempt, max_attempts=MAX_RETRIES, delay=RETRY_DELAY):
+        """
+        Call attempt(number) until it returns True, at most `max_attempts` times,
+        waiting `delay` seconds between attempts.
 
+        Returns:
+            Future: Resolves to True once an attempt succeeded, or False
+        """
+        future = Future()
+
+        def run_attempt(number):
+            try:
+                succeeded = attempt(number)
+            except Exception as e:
+                future.set_exception(e)
+                return
+            if succeeded or number >= max_attempts:
+                future.set_result(bool(succeeded))
+            else:
+                self.call_later(delay, run_attempt, number + 1)
+
+        self.call_later(0, run_attempt, 1)
+        return future
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    wait = None
+                    if self._heap:
+                        wait = self._heap[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                    self._cond.wait(wait)
+                _, _, fn, args = heapq.heappop(self._heap)
+            self._executor.submit(self._run, fn, args)
+
+    def _run(self, fn, args):
+        try:
+            fn(*args)
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    def join(self):
+        """Wait until every scheduled call, including retries, has finished."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending == 0)
+
+    def close(self):
+        """Finish all scheduled work, then stop the worker threads."""
+        self.join()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown()
+
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated SMTP connections shared by many sends.
+
+    Up to `size` connections are opened lazily and kept alive between messages,
+    so STARTTLS and login happen once per connection instead of once per email.
+    A connection idle for longer than `health_check_after` seconds is checked
+    with NOOP before reuse; broken connections are dropped and replaced
+    transparently, and a connection is retired after `max_messages` messages
+    to stay within the server's per-session limits.
+
+    Usage:
+        with SMTPConnectionPool(sender, password) as pool:
+            for recipient in recipients:
+                send_email(sender, password, [recipient], [], [], subject, body, "1", [], pool=pool)
+    """
+
+    def __init__(self, username, password, server=SMTP_SERVER, port=SMTP_PORT, size=POOL_SIZE,
+                 max_messages=MAX_MESSAGES_PER_CONNECTION, health_check_after=HEALTH_CHECK_AFTER,
+                 use_tls=True, timeout=30):
+        self.username = username
+        self.password = password
+        self.server = server
+        self.port = port
+        self.max_messages = max_messages
+        self.health_check_after = health_check_after
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _connect(self):
+        """Open, secure and authenticate a new SMTP connection."""
+        server = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._lock:
+            self.connections_opened += 1
+        return {"smtp": server, "messages": 0, "last_used": time.monotonic()}
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn["smtp"].quit()
+        except Exception:
+            conn["smtp"].close()
+
+    def _is_healthy(self, conn):
+        if time.monotonic() - conn["last_used"] < self.health_check_after:
+            return True
+        try:
+            return conn["smtp"].noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self):
+        """Take a healthy idle connection, or open a new one."""
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for one message. It goes back to the pool afterwards,
+        unless sending failed or it reached max_messages, in which case it is closed.
+        """
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn["smtp"]
+            conn["messages"] += 1
+            conn["last_used"] = time.monotonic()
+            if conn["messages"] >= self.max_messages:
+                self._discard(conn)
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+        except Exception:
+            if conn is not None:
+                self._discard(conn)
+            raise
+        finally:
+            self._slots.release()
 
-def send_email(sender, password, to_emails, cc_emails, bcc_emails, subject, body, body_type, attachments):
-    """Send an email with given parameters and handle SMTP connection."""
-    msg = MIMEMultipart()
-    msg["From"] = sender
-    msg["To"] = ", ".join(to_emails)
-    msg["CC"] = ", ".join(cc_emails)
-    msg["Subject"] = subject
+    def sendmail(self, from_addr, to_addrs, msg, responses=None):
+        """
+        Send one message through a pooled connection. If the server dropped the
+        connection, it is retried once on a fresh connection.
 
-    # Attach email body
-    msg.attach(MIMEText(body, "html" if body_type == "2" else "plain"))
+        `msg` may be a string, bytes, or a seekable file holding the serialized
+        message (see StreamingMessage.spool), which is streamed to the server;
+        only then is `responses` filled with each recipient's SMTP reply.
+        A streamed message whose delivery is unconfirmed is not retried, since
+        the server may already have accepted it.
 
+        Returns:
+            dict: Refused recipients, as returned by smtplib.SMTP.sendmail
+        """
+        try:
+            with self.connection() as server:
+                return self._send(server, from_addr, to_addrs, msg, responses)
+        except DeliveryUnconfirmed:
+            raise
+        except smtplib.SMTPServerDisconnected:
+            with self.connection() as server:
+                return self._send(server, from_addr, to_addrs, msg, responses)
+
+    @staticmethod
+    def _send(server, from_addr, to_addrs, msg, responses):
+        if hasattr(msg, "read"):
+            msg.seek(0)
+            return send_streaming(server, from_addr, to_addrs, msg, responses)
+        return server.sendmail(from_addr, to_addrs, msg)
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._discard(conn)
+
+
+class DeliveryLedger:
+    """
+    Record of which recipients already received which email, stored in SQLite
+    (WAL mode) and keyed by the message's idempotency key and the recipient.
+
+    send_email() skips recipients whose status is in LEDGER_SKIP, so retried
+    and restarted sends, such as a campaign re-run after a crash, never send
+    them the same email twice. Statuses:
+        sending      attempt in progress (retried if the process died)
+        delivered    accepted by the server
+        unconfirmed  transmitted, but the connection dropped before the server
+                     replied; it may have been delivered, so it is not resent
+        refused      permanently refused (5xx)
+        failed       temporary failure (4xx or connection error), retried
+    """
+
+    SKIP = ("delivered", "unconfirmed", "refused")
+    LOOKUP_CHUNK = 500      # Stays below SQLite's bound-parameter limit
+
+    def __init__(self, path=LEDGER_FILE):
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS deliveries ("
+            " message_key TEXT NOT NULL, recipient TEXT NOT NULL, status TEXT NOT NULL,"
+            " code INTEGER, response TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+            " updated REAL NOT NULL, PRIMARY KEY (message_key, recipient)) WITHOUT ROWID"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def lookup(self, message_key, recipients):
+        """
+        Look up many recipients of one message at once.
+
+        Returns:
+            dict: Recipient -> {"status", "code", "response", "attempts"}, for
+                  recipients the ledger knows about
+        """
+        recipients = list(recipients)
+        found = {}
+        with self._lock:
+            for start in range(0, len(recipients), self.LOOKUP_CHUNK):
+                chunk = recipients[start:start + self.LOOKUP_CHUNK]
+                rows = self.db.execute(
+                    "SELECT recipient, status, code, response, attempts FROM deliveries "
+                    f"WHERE message_key = ? AND recipient IN ({', '.join('?' * len(chunk))})",
+                    (message_key, *chunk))
+                for recipient, status, code, response, attempts in rows:
+                    found[recipient] = {"status": status, "code": code, "response": response,
+                                        "attempts": attempts}
+        return found
+
+    def pending(self, message_key, recipients):
+        """Return the recipients that still have to be sent the message, in order."""
+        known = self.lookup(message_key, recipients)
+        return [r for r in recipients if known.get(r, {}).get("status") not in self.SKIP]
+
+    def record(self, message_key, outcomes):
+        """
+        Store the outcome for each recipient.
+
+        Args:
+            message_key (str): Idempotency key of the message
+            outcomes (dict): Recipient -> (status, SMTP code or None, response or None)
+        """
+        now = time.time()
+        rows = []
+        for recipient, (status, code, response) in outcomes.items():
+            if isinstance(response, bytes):
+                response = response.decode("utf-8", "replace")
+            rows.append((message_key, recipient, status, code, response,
+                         int(status == "sending"), now))
+        with self._lock:
+            self.db.executemany(
+                "INSERT INTO deliveries (message_key, recipient, status, code, response, attempts,"
+                " updated) VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (message_key, recipient) DO UPDATE"
+                " SET status = excluded.status, code = excluded.code, response = excluded.response,"
+                " attempts = attempts + excluded.attempts, updated = excluded.updated", rows)
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+
+def message_key(sender, subject, body, attachments=()):
+    """Default idempotency key: a hash of the sender, subject, body and attachment names and contents."""
+    content = json.dumps([sender, subject, body,
+                          [[os.path.basename(f), file_hash(f)] for f in attachments]])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _outcome(code, response):
+    """Ledger status for a recipient's final SMTP reply."""
+    if code in (250, 251):
+        return ("delivered", code, response)
+    return ("refused" if code and code >= 500 else "failed", code, response)
+
+
+def send_email(sender, password, to_emails, cc_emails, bcc_emails, subject, body, body_type, attachments,
+               pool=None, scheduler=None, ledger=None, idempotency_key=None):
+    """
+    Send an email with given parameters and handle SMTP connection.
+
+    Pass an SMTPConnectionPool as `pool` to reuse authenticated connections
+    across many calls instead of connecting and logging in for every email.
+
+    Attachments are base64-encoded in chunks into a spooled temporary file
+    (moved to disk once it grows past 1 MB) and streamed to the server, so
+    memory use does not grow with attachment size, and retries reuse the
+    encoded message.
+
+    Pass a RetryScheduler as `scheduler` to send in the background: the call
+    returns at once, and failed attempts are retried after RETRY_DELAY seconds
+    without holding up other messages.
+
+    Pass a DeliveryLedger as `ledger` to make the send idempotent: every
+    recipient's outcome is recorded under `idempotency_key` (by default a hash
+    of the message), and recipients already delivered are skipped, both by
+    retries and by later calls with the same key.
+
+    Returns:
+        bool | Future: Whether the email was sent; a Future of it with a scheduler
+    """
     # Attach files
+    readable = []
     for f in attachments:
         try:
-            with open(f, "rb") as file:
-                part = MIMEApplication(file.read(), Name=os.path.basename(f))
-            part["Content-Disposition"] = f'attachment; filename="{os.path.basename(f)}"'
-            msg.attach(part)
+            with open(f, "rb"):
+                pass
+            readable.append(f)
             print(f"📎 Attached: {f}")
         except Exception as e:
             print(f"⚠️ Failed to attach {f}: {e}")
-            log_message(f"Attachment failed: {f} — {e}")
+            log_message(f"Attachment failed: {f} — {e}", logging.WARNING, event="attachment_failed",
+                        path=f, error=str(e))
+
+    message = StreamingMessage(sender, to_emails, cc_emails, subject, body,
+                               html=body_type == "2", attachments=readable)
+    try:
+        spooled = message.spool()
+    except Exception as e:
+        print(f"🚫 Could not encode attachments: {e}")
+        log_message(f"Attachment encoding failed: {e}", logging.ERROR, event="attachment_failed",
+                    error=str(e))
+        return False
 
     # Combine all recipients
     all_recipients = [email.strip() for email in to_emails + cc_emails + bcc_emails if email.strip()]
+    key = idempotency_key or message_key(sender, subject, body, readable)
 
-    # Try sending with retry logic
-    for attempt in range(1, MAX_RETRIES + 1):
-        try:
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-                server.starttls()
-                server.login(sender, password)
-                server.sendmail(sender, all_recipients, msg.as_string())
+    def attempt(number):
+        started = time.perf_counter()
+        recipients = all_recipients
+        if ledger is not None:
+            recipients = ledger.pending(key, all_recipients)
+            if not recipients:
+                print("✅ Already delivered to every recipient.")
+                log_message(f"Already delivered — Subject: '{subject}'", event="already_delivered",
+                            subject=subject, idempotency_key=key, attempt=number)
+                return True
+            ledger.record(key, {r: ("sending", None, None) for r in recipients})
 
-            print("✅ Email sent successfully!")
-            log_message(f"Email sent — Subject: '{subject}' | To: {all_recipients}")
-            return
+        responses = {}
+        try:
+            if pool is not None:
+                pool.sendmail(sender, recipients, spooled, responses)
+            else:
+                with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
+                    server.starttls()
+                    server.login(sender, password)
+                    spooled.seek(0)
+                    send_streaming(server, sender, recipients, spooled, responses)
         except Exception as e:
-            print(f"❌ Attempt {attempt}: Failed to send email. Error: {e}")
-            log_message(f"Send failed (Attempt {attempt}): {e}")
-            time.sleep(2)
+            if ledger is not None:
+                status = "unconfirmed" if isinstance(e, DeliveryUnconfirmed) else "failed"
+                outcomes = {}
+                for r in recipients:
+                    code = responses.get(r, (None, None))[0]
+                    if code and code >= 500:
+                        outcomes[r] = _outcome(*responses[r])   # Permanently refused at RCPT
+                    else:
+                        outcomes[r] = (status, getattr(e, "smtp_code", None), str(e))
+                ledger.record(key, outcomes)
+            print(f"❌ Attempt {number}: Failed to send email. Error: {e}")
+            log_message(f"Send failed (Attempt {number}): {e}", logging.WARNING, event="send_failed",
+                        subject=subject, recipients=all_recipients, attempt=number,
+                        duration_ms=round((time.perf_counter() - started) * 1000, 1), error=str(e))
+            return False
+
+        if ledger is not None:
+            ledger.record(key, {r: _outcome(*responses[r]) for r in recipients})
+        print("✅ Email sent successfully!")
+        log_message(f"Email sent — Subject: '{subject}' | To: {all_recipients}", event="sent",
+                    subject=subject, recipients=all_recipients, attempt=number,
+                    duration_ms=round((time.perf_counter() - started) * 1000, 1))
+        return True
+
+    def finish(sent):
+        spooled.close()
+        if not sent:
+            print("🚫 Email could not be sent after multiple attempts.")
+            log_message("Email failed after maximum retries.", logging.ERROR, event="gave_up",
+                        subject=subject, recipients=all_recipients)
+        return sent
+
+    # Try sending with retry logic
+    if scheduler is not None:
+        # Resolved only after finish() ran, so the outcome is logged before callers see it
+        done = Future()
+        attempts = scheduler.run(attempt, MAX_RETRIES, RETRY_DELAY)
+        attempts.add_done_callback(
+            lambda f: done.set_result(finish(f.exception() is None and f.result())))
+        return done
+
+    for number in range(1, MAX_RETRIES + 1):
+        if attempt(number):
+            return finish(True)
+        if number < MAX_RETRIES:
+            time.sleep(RETRY_DELAY)
+    return finish(False)
+
+
+def send_mail_merge(sender, password, recipients, subject, body, body_type="2", pool=None,
+                    scheduler=None, max_in_flight=POOL_SIZE * 4, ledger=None):
+    """
+    Send a personalised email to every recipient.
+
+    `subject` and `body` are templates with {{ field }} placeholders, compiled
+    once. Recipients are streamed and rendered one at a time, so the list can
+    be far larger than memory. With a `scheduler`, up to `max_in_flight`
+    emails are sent concurrently. With a DeliveryLedger, an interrupted
+    campaign can simply be run again: recipients already sent their email
+    are skipped.
+
+    Args:
+        recipients (str | iterable[dict]): CSV/NDJSON file with an "email"
+                                           column, or the records themselves
+        subject (str): Subject template
+        body (str): Body template (values are HTML-escaped when body_type is "2")
+
+    Returns:
+        dict: Number of emails "sent" and "failed"
+    """
+    if isinstance(recipients, str):
+        recipients = read_recipients(recipients)
+    counts = {"sent": 0, "failed": 0}
+
+    def skip(record, error):
+        counts["failed"] += 1
+        print(f"⚠️ Skipped recipient {record.get('email')}: {error}")
+        log_message(f"Mail merge skipped {record.get('email')}: {error}", logging.WARNING,
+                    event="merge_skipped", error=str(error))
+
+    def count(sent):
+        counts["sent" if sent else "failed"] += 1
+
+    in_flight = deque()
+    for message in merge(recipients, subject, body, html_body=body_type == "2", on_error=skip):
+        result = send_email(sender, password, [message["to"]], [], [], message["subject"],
+                            message["message"], body_type, [], pool=pool, scheduler=scheduler,
+                            ledger=ledger)
+        if scheduler is None:
+            count(result)
+            continue
+        in_flight.append(result)
+        if len(in_flight) >= max_in_flight:
+            count(in_flight.popleft().result())
+    while in_flight:
+        count(in_flight.popleft().result())
 
-    print("🚫 Email could not be sent after multiple attempts.")
-    log_message("Email failed after maximum retries.")
+    log_message("Mail merge finished", event="merge_finished", **counts)
+    return counts
 
 
 def main():
@@ -142,7 +710,7 @@ if __name__ == "__main__":
         main()
     except KeyboardInterrupt:
         print("\n🛑 Process interrupted by user.")
-        log_message("User interrupted execution.")
+        log_message("User interrupted execution.", logging.WARNING, event="interrupted")
     except Exception as e:
         print(f"🚨 Unexpected error: {e}")
-        log_message(f"Unexpected error: {e}")
+        log_message(f"Unexpected error: {e}", logging.ERROR, event="error", error=str(e))
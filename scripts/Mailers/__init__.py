@@ -0,0 +1,109 @@
+"""
+Mailers package facade.
+
+Importing the package loads nothing else: each provider module, its
+dependencies (requests, the Resend SDK, email.mime, ...) and its API client
+are loaded on first use. This keeps one-off sends from short-lived jobs
+(cron, serverless functions) from paying for providers they never touch.
+
+Example:
+    import Mailers
+
+    Mailers.send_mail("a@example.com", "Hello", "<p>Hi!</p>", provider="resend")
+    Mailers.send_batch(messages, provider="brevo")
+    queue = Mailers.MailQueue("outbox.db", {"brevo": Mailers.mail_queue.BrevoBackend()})
+
+Run benchmark_imports.py to measure the cold-start cost of each provider.
+"""
+
+import importlib
+
+# Provider name -> module with send_mail(to, subject, message) and send_batch(messages)
+PROVIDERS = {
+    "brevo": "brevoMailer",
+    "resend": "resendMailer",
+}
+
+# Public name -> module defining it, imported when the name is first used
+_LAZY_ATTRIBUTES = {
+    "MailQueue": "mail_queue",
+    "SMTPBackend": "mail_queue",
+    "StreamingMessage": "mime_stream",
+    "send_streaming": "mime_stream",
+    "MergeTemplate": "mail_merge",
+    "merge": "mail_merge",
+    "read_recipients": "mail_merge",
+    "send_merged": "mail_merge",
+    "build_message": "email_sender",
+    "send_batched": "email_sender",
+}
+
+_SUBMODULES = {
+    "brevoMailer", "resendMailer", "email_sender", "emailsender", "http_batch",
+    "mail_merge", "mail_queue", "mime_stream",
+}
+
+__all__ = ["PROVIDERS", "get_provider", "send_mail", "send_batch", *_LAZY_ATTRIBUTES]
+
+
+def get_provider(name):
+    """
+    Import a provider module on first use.
+
+    Args:
+        name (str): Provider name, one of PROVIDERS
+
+    Returns:
+        module: The provider's mailer module
+
+    Raises:
+        ValueError: If the provider is unknown
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown mail provider {name!r}; choose from {', '.join(PROVIDERS)}")
+    return importlib.import_module(f"{__name__}.{PROVIDERS[name]}")
+
+
+def send_mail(to, subject, message, provider="brevo"):
+    """
+    Send one email through a provider.
+
+    Args:
+        to (str | list[str]): Recipient email address(es)
+        subject (str): Email subject
+        message (str): HTML content of the email
+        provider (str): Provider name, one of PROVIDERS
+
+    Returns:
+        dict: Response with success status and data/error
+    """
+    return get_provider(provider).send_mail(to, subject, message)
+
+
+def send_batch(messages, provider="brevo"):
+    """
+    Send many emails through a provider's batch API.
+
+    Args:
+        messages (list[dict]): Messages with "to", "subject" and "message" keys
+        provider (str): Provider name, one of PROVIDERS
+
+    Returns:
+        list[dict]: One response per message, in order
+    """
+    return get_provider(provider).send_batch(messages)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(f"{__name__}.{_LAZY_ATTRIBUTES[name]}")
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | _SUBMODULES)
@@ -0,0 +1,86 @@
+"""
+Cold-start benchmark for the Mailers package.
+
+Each measurement runs in a fresh interpreter. It times importing the package
+facade alone, then the facade plus loading one provider, which is what a
+short-lived job pays before its first send. Times are the median of --runs
+runs in milliseconds and exclude the interpreter's own startup.
+
+Usage:
+    python benchmark_imports.py
+    python benchmark_imports.py --runs 20 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import sys, time
+sys.path.insert(0, {parent!r})
+start = time.perf_counter()
+import Mailers
+{load}
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def time_import(load="", runs=10):
+    """
+    Time a cold import in fresh interpreters.
+
+    Args:
+        load (str): Statement run after `import Mailers`, e.g. a provider load
+        runs (int): Number of interpreters to start
+
+    Returns:
+        float: Median milliseconds
+    """
+    code = SNIPPET.format(parent=PACKAGE_PARENT, load=load)
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                check=True).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def run_benchmark(runs=10):
+    """
+    Returns:
+        dict: Target ("facade", "provider:<name>", "module:<name>") -> median milliseconds
+    """
+    sys.path.insert(0, PACKAGE_PARENT)
+    import Mailers
+
+    targets = {"facade": ""}
+    for name in Mailers.PROVIDERS:
+        targets[f"provider:{name}"] = f"Mailers.get_provider({name!r})"
+    for name in ("mail_queue", "mail_merge", "mime_stream", "email_sender"):
+        targets[f"module:{name}"] = f"Mailers.{name}"
+    return {target: round(time_import(load, runs), 2) for target, load in targets.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold-start import cost of each mailer")
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per target")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"⏱️ Cold import times (median of {args.runs} runs)")
+    for target, milliseconds in results.items():
+        print(f"  {target:<22} {milliseconds:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Throughput benchmark for every mailer, run against local stand-ins.
+
+A local SMTP sink stands in for the mail server, and a local HTTP stub
+stands in for the Brevo and Resend APIs. Both can add latency and fail a
+fraction of the messages (every round(1 / --error-rate)-th one). Each backend
+is driven at every combination of --concurrency and --sizes. Every run
+happens in a fresh interpreter, so its peak RSS belongs to that backend alone
+(reported as unavailable on Windows, which has neither /proc nor getrusage).
+
+Backends:
+    hh             hh.send_email through an SMTPConnectionPool, one message per call
+    emailsender    emailsender.send_email, one connection per message
+    email_sender   email_sender.send_batched, envelopes of --batch recipients
+    brevo          brevoMailer.send_mail, one message per API call
+    brevo_batch    brevoMailer.send_batch, --batch messages per call
+    resend_batch   resendMailer.send_batch, --batch messages per call
+
+Every backend makes a single attempt per message, so errors are counted
+rather than retried. p50/p99 are per call (one message, or one batch for the
+batch backends).
+
+Usage:
+    python benchmark_throughput.py --concurrency 1 4 16 --sizes 1024 65536 --output bench.json
+    python benchmark_throughput.py --baseline bench.json --tolerance 0.2   # exits 1 on a regression
+"""
+
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import socketserver
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+MAILERS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.dirname(MAILERS_DIR)
+REPO_ROOT = os.path.dirname(SCRIPTS_DIR)
+
+BACKENDS = ["hh", "emailsender", "email_sender", "brevo", "brevo_batch", "resend_batch"]
+SENDER = "bench@example.com"
+
+
+def _fails(number, error_rate):
+    """Whether the `number`-th message should fail, for a given error rate."""
+    return bool(error_rate) and number % max(1, round(1 / error_rate)) == 0
+
+
+class SMTPSink:
+    """SMTP server that accepts everything, after `latency` seconds per message."""
+
+    def __init__(self, latency=0.0, error_rate=0.0):
+        sink = self
+        self.latency = latency
+        self.error_rate = error_rate
+        self.received = 0
+        self.lock = threading.Lock()
+
+        class Handler(socketserver.StreamRequestHandler):
+            disable_nagle_algorithm = True
+
+            def reply(self, line):
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                self.reply("220 sink ESMTP")
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    verb = line[:4].decode(errors="replace").upper()
+                    if verb in ("EHLO", "HELO"):
+                        self.reply("250-sink")
+                        self.reply("250 AUTH PLAIN LOGIN")
+                    elif verb == "AUTH":
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                            pass
+                        if sink.latency:
+                            time.sleep(sink.latency)
+                        with sink.lock:
+                            sink.received += 1
+                            failed = _fails(sink.received, sink.error_rate)
+                        self.reply("451 4.3.0 Simulated failure" if failed else "250 OK queued")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:   # MAIL, RCPT, RSET, NOOP
+                        self.reply("250 OK")
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+            request_queue_size = 128
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ProviderStub:
+    """HTTP server answering like the Brevo and Resend send endpoints."""
+
+    def __init__(self, latency=0.0, error_rate=0.0):
+        stub = self
+        self.requests = 0
+        self.lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                payload = json.loads(body)
+                # Messages in the request: a Resend batch is a list, a Brevo batch has messageVersions
+                count = len(payload) if isinstance(payload, list) else len(payload.get("messageVersions", [0]))
+                if latency:
+                    time.sleep(latency)
+                with stub.lock:
+                    stub.requests += 1
+                    failed = _fails(stub.requests, error_rate)
+                if failed:
+                    status, data = 500, {"message": "Simulated failure"}
+                elif self.path.startswith("/resend"):
+                    status, data = 200, {"data": [{"id": str(i)} for i in range(count)]}
+                else:
+                    status, data = 201, {"messageIds": [f"<{i}>" for i in range(count)]}
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ------------------ Child process: drive one backend ------------------
+
+def _operations(scenario):
+    """
+    Build the calls for one scenario.
+
+    Returns:
+        list[callable]: Each call sends some messages and returns how many succeeded
+    """
+    sys.path[:0] = [REPO_ROOT, SCRIPTS_DIR]
+    backend, count, batch = scenario["backend"], scenario["messages"], scenario["batch"]
+    body = "<p>" + "x" * max(0, scenario["size"] - 7) + "</p>"
+    recipients = [f"user{i}@example.com" for i in range(count)]
+    batches = [recipients[i:i + batch] for i in range(0, count, batch)]
+    smtp_port, http_url = scenario["smtp_port"], scenario["http_url"]
+
+    if backend == "hh":
+        import hh
+        hh.LOG_FILE = os.devnull
+        hh.MAX_RETRIES = 1
+        pool = hh.SMTPConnectionPool(SENDER, "secret", server="127.0.0.1", port=smtp_port,
+                                     size=scenario["concurrency"], use_tls=False)
+        return [lambda r=r: int(bool(hh.send_email(SENDER, "secret", [r], [], [], "Bench", body, "2",
+                                                   [], pool=pool)))
+                for r in recipients]
+
+    if backend == "emailsender":
+        from Mailers import emailsender
+
+        def send_one(r):
+            emailsender.send_email(SENDER, "secret", r, "Bench", body, host="127.0.0.1",
+                                   port=smtp_port, use_ssl=False)
+            return 1
+        return [lambda r=r: send_one(r) for r in recipients]
+
+    if backend == "email_sender":
+        import smtplib
+        from Mailers import email_sender
+        local = threading.local()
+        with email_sender.build_message(SENDER, [], [], "Bench", body, "2", []) as spooled:
+            message = spooled.read()
+
+        def send_envelope(chunk):
+            if not hasattr(local, "server"):
+                local.server = smtplib.SMTP("127.0.0.1", smtp_port)
+                local.server.login(SENDER, "secret")
+            delivered, _ = email_sender.send_batched(local.server, SENDER, chunk, message,
+                                                     batch_size=batch)
+            return len(delivered)
+        return [lambda c=c: send_envelope(c) for c in batches]
+
+    os.environ.update({"BREVO_KEY": "key", "BREVO_MAIL": SENDER,
+                       "RESEND_KEY": "key", "RESEND_MAIL": SENDER})
+    from Mailers import brevoMailer, resendMailer
+    brevoMailer.BREVO_URL = f"{http_url}/brevo"
+    resendMailer.RESEND_BATCH_URL = f"{http_url}/resend/emails/batch"
+
+    if backend == "brevo":
+        return [lambda r=r: int(brevoMailer.send_mail(r, "Bench", body)["success"])
+                for r in recipients]
+    sender = {"brevo_batch": brevoMailer, "resend_batch": resendMailer}[backend]
+    return [lambda c=c: sum(result["success"] for result in sender.send_batch(
+                [{"to": r, "subject": "Bench", "message": body} for r in c], batch_size=batch))
+            for c in batches]
+
+
+PROC_STATUS = "/proc/self/status"
+
+
+def _peak_rss_mb():
+    """Peak resident memory of this process, in MB, or None if the OS does not report it."""
+    # VmHWM starts afresh at exec; ru_maxrss can carry over the parent's peak
+    try:
+        with open(PROC_STATUS) as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_scenario(scenario):
+    """Run one scenario in this process and return its measurements."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        operations = _operations(scenario)
+        latencies = []
+
+        def timed(operation):
+            started = time.perf_counter()
+            try:
+                delivered = operation()
+            except Exception:
+                delivered = 0   # Counted as errors
+            latencies.append(time.perf_counter() - started)
+            return delivered
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=scenario["concurrency"]) as executor:
+            delivered = sum(executor.map(timed, operations))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "backend": scenario["backend"],
+        "concurrency": scenario["concurrency"],
+        "size": scenario["size"],
+        "messages": scenario["messages"],
+        "delivered": delivered,
+        "errors": scenario["messages"] - delivered,
+        "seconds": round(elapsed, 4),
+        "msgs_per_sec": round(delivered / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+# ------------------ Parent process: stubs, scenarios, report ------------------
+
+def run_benchmark(backends=BACKENDS, concurrency=(1, 4, 16), sizes=(1024, 65536), messages=200,
+                  batch=100, smtp_latency=0.0, http_latency=0.0, error_rate=0.0):
+    """
+    Start the stubs and run every backend/concurrency/size combination, each
+    in its own interpreter.
+
+    Args:
+        smtp_latency (float): Seconds the SMTP sink waits before accepting a message
+        http_latency (float): Seconds the HTTP stub waits before answering
+        error_rate (float): Fraction of messages (or API calls) the stubs fail
+
+    Returns:
+        list[dict]: One result per scenario
+    """
+    sink = SMTPSink(smtp_latency, error_rate)
+    stub = ProviderStub(http_latency, error_rate)
+    results = []
+    try:
+        for backend in backends:
+            for workers in concurrency:
+                for size in sizes:
+                    scenario = {"backend": backend, "concurrency": workers, "size": size,
+                                "messages": messages, "batch": batch, "smtp_port": sink.port,
+                                "http_url": stub.url}
+                    output = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "--run-scenario",
+                         json.dumps(scenario)], capture_output=True, text=True, check=True).stdout
+                    results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        sink.close()
+        stub.close()
+    return results
+
+
+def find_regressions(results, baseline, tolerance=0.2):
+    """
+    Compare throughput against a previous run.
+
+    Args:
+        results (list[dict]): Current results
+        baseline (list[dict]): Results of the reference run
+        tolerance (float): Allowed relative drop in msgs_per_sec
+
+    Returns:
+        list[str]: One description per regressed scenario
+    """
+    def key(result):
+        return result["backend"], result["concurrency"], result["size"]
+
+    reference = {key(r): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = reference.get(key(result))
+        if before and result["msgs_per_sec"] < before["msgs_per_sec"] * (1 - tolerance):
+            regressions.append(f"{result['backend']} c={result['concurrency']} size={result['size']}: "
+                               f"{result['msgs_per_sec']} msgs/s (baseline {before['msgs_per_sec']})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mailer throughput against local stubs")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1024, 65536],
+                        help="Message body sizes in bytes")
+    parser.add_argument("--messages", type=int, default=200, help="Messages per scenario")
+    parser.add_argument("--batch", type=int, default=100, help="Messages per call for batch backends")
+    parser.add_argument("--smtp-latency", type=float, default=0.0, help="SMTP sink delay (ms)")
+    parser.add_argument("--http-latency", type=float, default=0.0, help="HTTP stub delay (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of sends that fail")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative throughput drop against the baseline")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        print(json.dumps(run_scenario(json.loads(args.run_scenario))))
+        return
+
+    results = run_benchmark(args.backends, args.concurrency, args.sizes, args.messages, args.batch,
+                            args.smtp_latency / 1000, args.http_latency / 1000, args.error_rate)
+    report = {"config": {k: v for k, v in vars(args).items()
+                         if k not in ("output", "json", "baseline", "run_scenario")},
+              "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'backend':<14}{'conc':>6}{'size':>8}{'msgs/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+              f"{'errors':>8}{'RSS MB':>8}")
+        for r in results:
+            print(f"{r['backend']:<14}{r['concurrency']:>6}{r['size']:>8}{r['msgs_per_sec']:>10.1f}"
+                  f"{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['errors']:>8}"
+                  f"{'n/a' if r['peak_rss_mb'] is None else format(r['peak_rss_mb'], '.1f'):>8}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No throughput regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,31 @@
 import os
-import requests
+
+try:
+    from .http_batch import BatchRejected, REJECTED_STATUSES, error_message, post_json, send_in_batches
+except ImportError:  # Run as a script from this directory
+    from http_batch import BatchRejected, REJECTED_STATUSES, error_message, post_json, send_in_batches
+
+BREVO_URL = "https://api.brevo.com/v3/smtp/email"
+BREVO_BATCH_SIZE = 1000     # Maximum messageVersions per request
+
+
+def _credentials():
+    brevo_key = os.getenv("BREVO_KEY")
+    brevo_mail = os.getenv("BREVO_MAIL")
+    if not brevo_key or not brevo_mail:
+        raise ValueError("Missing BREVO_KEY or BREVO_MAIL in environment variables")
+    return brevo_key, brevo_mail
+
+
+def _recipients(to):
+    return [{"email": email} for email in to] if isinstance(to, list) else [{"email": to}]
+
+
+def _named_messages(chunk, error):
+    """Positions of the messages whose recipient addresses appear in Brevo's error."""
+    return [i for i, m in enumerate(chunk)
+            if any(r["email"] and r["email"] in error for r in _recipients(m["to"]))]
+
 
 def send_mail(to, subject, message):
     """
@@ -14,29 +40,18 @@ def send_mail(to, subject, message):
         dict: Response with success status and data/error
     """
     try:
-        brevo_key = os.getenv("BREVO_KEY")
-        brevo_mail = os.getenv("BREVO_MAIL")
-
-        if not brevo_key or not brevo_mail:
-            raise ValueError("Missing BREVO_KEY or BREVO_MAIL in environment variables")
+        brevo_key, brevo_mail = _credentials()
 
         # Prepare payload
-        recipients = [{"email": email} for email in to] if isinstance(to, list) else [{"email": to}]
         payload = {
             "sender": {"email": brevo_mail},
-            "to": recipients,
+            "to": _recipients(to),
             "subject": subject,
             "htmlContent": message
         }
 
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "api-key": brevo_key
-        }
-
-        # Send request
-        res = requests.post("https://api.brevo.com/v3/smtp/email", json=payload, headers=headers)
+        # Send request over this thread's keep-alive session
+        res = post_json(BREVO_URL, payload, {"api-key": brevo_key})
         data = res.json()
 
         if not res.ok:
@@ -48,5 +63,49 @@ def send_mail(to, subject, message):
         print("Email send error:", e)
         return {"success": False, "error": str(e)}
 
+
+def send_batch(messages, batch_size=BREVO_BATCH_SIZE, compress=False):
+    """
+    Send many emails with as few Brevo API calls as possible, using
+    messageVersions (one version per message).
+
+    Args:
+        messages (list[dict]): Messages with "to", "subject" and "message" keys,
+                               as for send_mail()
+        batch_size (int): Maximum messages per API call
+        compress (bool): Gzip the request bodies (only if your account accepts it)
+
+    Returns:
+        list[dict]: One response per message, in order, like send_mail()'s
+    """
+    try:
+        brevo_key, brevo_mail = _credentials()
+    except ValueError as e:
+        return [{"success": False, "error": str(e)} for _ in messages]
+
+    def send_chunk(chunk):
+        payload = {
+            "sender": {"email": brevo_mail},
+            "subject": chunk[0]["subject"],
+            "htmlContent": chunk[0]["message"],
+            "messageVersions": [
+                {"to": _recipients(m["to"]), "subject": m["subject"], "htmlContent": m["message"]}
+                for m in chunk
+            ],
+        }
+        res = post_json(BREVO_URL, payload, {"api-key": brevo_key}, compress=compress)
+        if res.status_code in REJECTED_STATUSES:
+            error = error_message(res, "Brevo API error")
+            raise BatchRejected(error, _named_messages(chunk, error))
+        if not res.ok:
+            raise ValueError(error_message(res, "Brevo API error"))
+        message_ids = res.json().get("messageIds", [])
+        return [{"success": True, "data": {"messageId": message_ids[i] if i < len(message_ids) else None}}
+                for i in range(len(chunk))]
+
+    return send_in_batches(list(messages), batch_size, send_chunk)
+
 # Example usage
 # send_mail("test@example.com", "Hello", "<h1>This is a test</h1>")
+# send_batch([{"to": "a@example.com", "subject": "Hi", "message": "<p>A</p>"},
+#             {"to": "b@example.com", "subject": "Hi", "message": "<p>B</p>"}])
@@ -1,79 +1,182 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
-import os
-import datetime
-
-# ------------------ User Inputs ------------------
-sender_email = input("Enter your email: ")
-password = input("Enter your password or app-specific password: ")
-
-# Multiple recipients (comma-separated)
-to_emails = input("Enter recipient emails (comma-separated): ").split(",")
-cc_emails = input("Enter CC emails (comma-separated, leave blank if none): ").split(",") if input("Add CC? (y/n): ").lower()=="y" else []
-bcc_emails = input("Enter BCC emails (comma-separated, leave blank if none): ").split(",") if input("Add BCC? (y/n): ").lower()=="y" else []
-
-subject = input("Enter email subject: ")
-body_type = input("Email type? Plain(1) / HTML(2): ")
-
-if body_type=="2":
-    body = input("Enter HTML body: ")
-else:
-    body = input("Enter plain text body: ")
-
-# Multiple attachments
-attachments = []
-while True:
-    file_path = input("Enter path to attachment (leave blank to stop adding): ")
-    if not file_path:
-        break
-    attachments.append(file_path)
-
-# ------------------ Compose Email ------------------
-msg = MIMEMultipart()
-msg['From'] = sender_email
-msg['To'] = ", ".join(to_emails)
-msg['CC'] = ", ".join(cc_emails)
-msg['Subject'] = subject
-
-# Attach body
-if body_type=="2":
-    msg.attach(MIMEText(body, 'html'))
-else:
-    msg.attach(MIMEText(body, 'plain'))
-
-# Attach files
-for f in attachments:
-    try:
-        with open(f, "rb") as file:
-            part = MIMEApplication(file.read(), Name=os.path.basename(f))
-        part['Content-Disposition'] = f'attachment; filename="{os.path.basename(f)}"'
-        msg.attach(part)
-        print(f"Attachment added: {f}")
-    except Exception as e:
-        print(f"Failed to attach {f}: {e}")
-
-# ------------------ Send Email ------------------
-all_recipients = to_emails + cc_emails + bcc_emails
-try:
-    server = smtplib.SMTP('smtp.gmail.com', 587)
-    server.starttls()
-    server.login(sender_email, password)
-    
-    for recipient in all_recipients:
-        try:
-            server.sendmail(sender_email, recipient.strip(), msg.as_string())
-            print(f"✅ Email sent to {recipient}")
-        except Exception as e:
-            print(f"❌ Failed to send email to {recipient}: {e}")
-    
-    server.quit()
-except Exception as e:
-    print(f"❌ SMTP connection failed: {e}")
-
-# ------------------ Logging ------------------
-log_file = "email_log.txt"
-with open(log_file, "a") as log:
-    log.write(f"{datetime.datetime.now()} - Subject: {subject} - Sent to: {all_recipients}\n")
-print(f"Log saved to {log_file}")
+import smtplib
+import datetime
+
+try:
+    from .mime_stream import StreamingMessage, send_streaming
+except ImportError:  # Run as a script from this directory
+    from mime_stream import StreamingMessage, send_streaming
+
+# Most servers accept at least 100 recipients per envelope (RFC 5321 minimum)
+DEFAULT_BATCH_SIZE = 100
+
+
+def build_message(sender_email, to_emails, cc_emails, subject, body, body_type, attachments):
+    """
+    Compose the email and serialize it once. Attachments are base64-encoded
+    in chunks into a spooled temporary file (kept in memory up to 1 MB, then
+    on disk), so large files are never loaded whole.
+
+    Args:
+        sender_email (str): Sender address
+        to_emails (list[str]): Recipients shown in the To header
+        cc_emails (list[str]): Recipients shown in the CC header
+        subject (str): Email subject
+        body (str): Email body
+        body_type (str): "2" for HTML, anything else for plain text
+        attachments (list[str]): Paths of files to attach
+
+    Returns:
+        tempfile.SpooledTemporaryFile: The complete message, ready to be sent
+                                       to any number of recipients
+    """
+    # Attach files
+    readable = []
+    for f in attachments:
+        try:
+            with open(f, "rb"):
+                pass
+            readable.append(f)
+            print(f"Attachment added: {f}")
+        except Exception as e:
+            print(f"Failed to attach {f}: {e}")
+
+    message = StreamingMessage(sender_email, to_emails, cc_emails, subject, body,
+                               html=body_type == "2", attachments=readable)
+    return message.spool()
+
+
+def _send(server, sender_email, recipients, message):
+    if isinstance(message, bytes):
+        return server.sendmail(sender_email, recipients, message)
+    message.seek(0)
+    return send_streaming(server, sender_email, recipients, message)
+
+
+def send_batched(server, sender_email, recipients, message, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Send one serialized message to many recipients using as few SMTP
+    transactions as possible.
+
+    Recipients are sent in envelopes of up to `batch_size` RCPT TO addresses.
+    If the server refuses part of a batch because it has too many recipients
+    (4xx), the batch size shrinks to what the server accepted. Only refused
+    addresses are retried one by one.
+
+    If a whole envelope fails (sender refused, message refused after DATA),
+    its recipients are reported as refused with that error and the next
+    envelope is tried. If the connection is lost, every recipient not yet
+    delivered is reported as refused. Either way the addresses delivered in
+    earlier envelopes are returned, so a caller never resends to them.
+
+    Args:
+        server (smtplib.SMTP): Connected and logged-in SMTP server
+        sender_email (str): Envelope sender
+        recipients (list[str]): All recipient addresses
+        message (file | bytes): Message from build_message(); files are
+                                streamed to the server for every envelope
+        batch_size (int): Maximum recipients per envelope
+
+    Returns:
+        tuple[list[str], dict]: Delivered addresses, and refused addresses
+                                mapped to the server's error
+    """
+    recipients = [r.strip() for r in recipients if r.strip()]
+    delivered, refused = [], {}
+    retry_individually = []
+    start = 0
+
+    while start < len(recipients):
+        batch = recipients[start:start + batch_size]
+        start += len(batch)
+        try:
+            batch_refused = _send(server, sender_email, batch, message)
+        except smtplib.SMTPRecipientsRefused as e:
+            batch_refused = e.recipients
+        except smtplib.SMTPServerDisconnected as e:
+            # Possibly delivered (DeliveryUnconfirmed); never retried on this connection
+            error = (None, str(e))
+            for recipient in batch + recipients[start:] + retry_individually:
+                refused[recipient] = error
+            return delivered, refused
+        except smtplib.SMTPException as e:
+            error = (getattr(e, "smtp_code", None), str(e))
+            for recipient in batch:
+                refused[recipient] = error
+            continue
+        accepted = [r for r in batch if r not in batch_refused]
+        delivered.extend(accepted)
+
+        too_many = [r for r, (code, _) in batch_refused.items() if 400 <= code < 500]
+        if too_many and accepted:
+            batch_size = len(accepted)
+        retry_individually.extend(batch_refused)
+
+    for recipient in retry_individually:
+        try:
+            _send(server, sender_email, [recipient], message)
+            delivered.append(recipient)
+        except smtplib.SMTPRecipientsRefused as e:
+            refused[recipient] = e.recipients[recipient]
+        except smtplib.SMTPException as e:
+            refused[recipient] = (getattr(e, "smtp_code", None), str(e))
+
+    return delivered, refused
+
+
+def main():
+    # ------------------ User Inputs ------------------
+    sender_email = input("Enter your email: ")
+    password = input("Enter your password or app-specific password: ")
+
+    # Multiple recipients (comma-separated)
+    to_emails = input("Enter recipient emails (comma-separated): ").split(",")
+    cc_emails = input("Enter CC emails (comma-separated, leave blank if none): ").split(",") if input("Add CC? (y/n): ").lower()=="y" else []
+    bcc_emails = input("Enter BCC emails (comma-separated, leave blank if none): ").split(",") if input("Add BCC? (y/n): ").lower()=="y" else []
+
+    subject = input("Enter email subject: ")
+    body_type = input("Email type? Plain(1) / HTML(2): ")
+
+    if body_type=="2":
+        body = input("Enter HTML body: ")
+    else:
+        body = input("Enter plain text body: ")
+
+    # Multiple attachments
+    attachments = []
+    while True:
+        file_path = input("Enter path to attachment (leave blank to stop adding): ")
+        if not file_path:
+            break
+        attachments.append(file_path)
+
+    # ------------------ Compose Email ------------------
+    message = build_message(sender_email, to_emails, cc_emails, subject, body, body_type, attachments)
+
+    # ------------------ Send Email ------------------
+    all_recipients = to_emails + cc_emails + bcc_emails
+    try:
+        server = smtplib.SMTP('smtp.gmail.com', 587)
+        server.starttls()
+        server.login(sender_email, password)
+
+        delivered, refused = send_batched(server, sender_email, all_recipients, message)
+        for recipient in delivered:
+            print(f"✅ Email sent to {recipient}")
+        for recipient, error in refused.items():
+            print(f"❌ Failed to send email to {recipient}: {error}")
+
+        server.quit()
+    except Exception as e:
+        print(f"❌ SMTP connection failed: {e}")
+    finally:
+        message.close()
+
+    # ------------------ Logging ------------------
+    log_file = "email_log.txt"
+    with open(log_file, "a") as log:
+        log.write(f"{datetime.datetime.now()} - Subject: {subject} - Sent to: {all_recipients}\n")
+    print(f"Log saved to {log_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,15 @@
 import smtplib
 from email.mime.text import MIMEText
 
-def send_email(sender, password, receiver, subject, body):
+def send_email(sender, password, receiver, subject, body, host="smtp.gmail.com", port=465,
+               use_ssl=True):
     msg = MIMEText(body)
     msg["Subject"] = subject
     msg["From"] = sender
     msg["To"] = receiver
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
+    smtp_class = smtplib.SMTP_SSL if use_ssl else smtplib.SMTP
+    with smtp_class(host, port) as server:
         server.login(sender, password)
         server.sendmail(sender, receiver, msg.as_string())
         print("✅ Email sent successfully!")
@@ -0,0 +1,128 @@
+"""
+HTTP helpers shared by the REST API mailers (brevoMailer, resendMailer).
+
+Every thread reuses one keep-alive requests.Session, so consecutive API calls
+skip the TCP and TLS handshakes. Large JSON bodies can be sent gzip-compressed
+(opt-in, as the providers do not document accepting compressed requests).
+send_in_batches() groups messages into provider batch calls and maps the
+outcome back to each message. When a provider rejects a whole batch and its
+error names the offending messages, those are failed and the rest of the
+batch is sent again, so the valid ones are still delivered. Any other
+rejection fails the whole batch at once rather than probing message by
+message, which would cost up to two calls per message.
+
+requests is imported on the first request rather than at import time, which
+keeps importing the mailers cheap for short-lived jobs.
+"""
+
+import gzip
+import json
+import threading
+
+GZIP_MIN_BYTES = 1024      # Smaller bodies are not worth compressing
+POOL_MAXSIZE = 10
+# Statuses meaning the request itself was invalid (as opposed to rate limits or outages)
+REJECTED_STATUSES = (400, 422)
+
+_local = threading.local()
+
+
+class BatchRejected(Exception):
+    """The provider refused a whole batch because of its content."""
+
+    def __init__(self, message, rejected=()):
+        """
+        Args:
+            message (str): The provider's error
+            rejected (iterable[int]): Positions in the batch of the messages the
+                                      error names, if it names any
+        """
+        super().__init__(message)
+        self.rejected = set(rejected)
+
+
+def get_session():
+    """Return this thread's keep-alive session."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def post_json(url, payload, headers, compress=False, session=None, timeout=30):
+    """
+    POST a JSON payload, gzip-compressed if asked and at least GZIP_MIN_BYTES.
+
+    Args:
+        url (str): Endpoint
+        payload (dict | list): JSON body
+        headers (dict): Extra request headers (API key, ...)
+        compress (bool): Whether large bodies are compressed; only for endpoints
+                         known to accept Content-Encoding: gzip
+        session (requests.Session): Session to use, default this thread's one
+        timeout (float): Request timeout in seconds
+
+    Returns:
+        requests.Response
+    """
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"accept": "application/json", "content-type": "application/json", **headers}
+    if compress and len(body) >= GZIP_MIN_BYTES:
+        body = gzip.compress(body)
+        headers["content-encoding"] = "gzip"
+    return (session or get_session()).post(url, data=body, headers=headers, timeout=timeout)
+
+
+def send_in_batches(messages, batch_size, send_chunk):
+    """
+    Send messages in groups of `batch_size`.
+
+    Args:
+        messages (list): Messages to send
+        batch_size (int): Maximum messages per provider call
+        send_chunk (callable): Sends a list of messages in one call and returns
+                               one result dict per message, in order; raises
+                               BatchRejected if the whole call was refused,
+                               naming the offending messages when it can
+
+    Returns:
+        list[dict]: {"success": bool, "data" | "error": ...} per message, in order
+    """
+    results = []
+    for start in range(0, len(messages), batch_size):
+        results.extend(_send_isolating(messages[start:start + batch_size], send_chunk))
+    return results
+
+
+def _send_isolating(chunk, send_chunk):
+    try:
+        return send_chunk(chunk)
+    except BatchRejected as e:
+        failed = {"success": False, "error": str(e)}
+        named = e.rejected & set(range(len(chunk)))
+        if not named or len(named) == len(chunk):
+            # Nothing points at particular messages: the batch as a whole was refused
+            return [dict(failed) for _ in chunk]
+        rest = iter(_send_isolating([m for i, m in enumerate(chunk) if i not in named], send_chunk))
+        return [dict(failed) if i in named else next(rest) for i in range(len(chunk))]
+    except Exception as e:
+        # Outage, rate limit or network error: nothing in this chunk was sent
+        return [{"success": False, "error": str(e)} for _ in chunk]
+
+
+def error_message(response, default):
+    """Extract the provider's error message from a failed response."""
+    try:
+        data = response.json()
+    except ValueError:
+        data = None
+    if isinstance(data, dict) and data.get("message"):
+        return data["message"]
+    return f"{default} (HTTP {response.status_code})"
@@ -0,0 +1,160 @@
+"""
+Mail merge: one template, personalised for every recipient.
+
+Templates use {{ field }} placeholders and are compiled once. Recipients are
+streamed from a CSV or NDJSON file, and each message is rendered only when
+the sender asks for it. The whole pipeline is a chain of generators, so a
+campaign to 100k recipients holds one batch in memory at a time.
+
+Example:
+    from brevoMailer import send_batch
+
+    recipients = read_recipients("recipients.csv")          # email,name,plan
+    messages = merge(recipients, "Hi {{ name }}", "<p>Your plan: {{ plan }}</p>")
+    for message, result in send_merged(messages, send_batch, batch_size=500):
+        if not result["success"]:
+            print("❌", message["to"], result["error"])
+"""
+
+import csv
+import html
+import itertools
+import json
+import os
+import re
+
+FIELD_PATTERN = re.compile(r"{{\s*([A-Za-z_][\w.-]*)\s*}}")
+DEFAULT_BATCH_SIZE = 100
+
+
+class MergeTemplate:
+    """A template split into literal text and field names once, at construction."""
+
+    def __init__(self, source, escape_html=False):
+        """
+        Args:
+            source (str): Template text with {{ field }} placeholders
+            escape_html (bool): Whether values are HTML-escaped when rendered
+        """
+        self.source = source
+        self.escape_html = escape_html
+        self._parts = []
+        position = 0
+        for match in FIELD_PATTERN.finditer(source):
+            self._parts.append((source[position:match.start()], match.group(1)))
+            position = match.end()
+        self._tail = source[position:]
+        self.fields = [field for _, field in self._parts]
+
+    def render(self, values):
+        """
+        Fill in the placeholders.
+
+        Args:
+            values (dict): Field name -> value
+
+        Returns:
+            str: The rendered text
+
+        Raises:
+            KeyError: If a field used by the template is missing from values
+        """
+        escape = html.escape if self.escape_html else str
+        pieces = []
+        for literal, field in self._parts:
+            try:
+                value = values[field]
+            except KeyError:
+                raise KeyError(f"missing merge field {field!r}") from None
+            pieces.append(literal)
+            pieces.append(escape("" if value is None else str(value)))
+        pieces.append(self._tail)
+        return "".join(pieces)
+
+
+def read_recipients(path):
+    """
+    Stream recipient records from a CSV file (with a header row) or an NDJSON
+    file (.ndjson / .jsonl, one JSON object per line).
+
+    Args:
+        path (str): Recipient file
+
+    Yields:
+        dict: One recipient's fields
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if extension in (".ndjson", ".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def merge(recipients, subject, body, email_field="email", html_body=True, on_error=None):
+    """
+    Render one message per recipient, lazily.
+
+    Args:
+        recipients (iterable[dict]): Recipient records, e.g. from read_recipients()
+        subject (str | MergeTemplate): Subject template
+        body (str | MergeTemplate): Body template; values are HTML-escaped if html_body
+        email_field (str): Field holding the recipient's address
+        html_body (bool): Whether the body is HTML
+        on_error (callable): Called as on_error(record, exception) for records that
+                             cannot be rendered, which are then skipped; by default
+                             the exception propagates
+
+    Yields:
+        dict: Message with "to", "subject" and "message" keys, as taken by the
+              mailers' send_mail() / send_batch()
+    """
+    if not isinstance(subject, MergeTemplate):
+        subject = MergeTemplate(subject)
+    if not isinstance(body, MergeTemplate):
+        body = MergeTemplate(body, escape_html=html_body)
+
+    for record in recipients:
+        try:
+            to = record[email_field]
+            if not to:
+                raise ValueError(f"empty {email_field!r} field")
+            yield {"to": to, "subject": subject.render(record), "message": body.render(record)}
+        except (KeyError, ValueError) as e:
+            if on_error is None:
+                raise
+            on_error(record, e)
+
+
+def one_by_one(send_mail):
+    """
+    Adapt a mailer's send_mail(to, subject, message) function to the batch
+    interface used by send_merged().
+    """
+    def send_batch(messages):
+        return [send_mail(m["to"], m["subject"], m["message"]) for m in messages]
+    return send_batch
+
+
+def send_merged(messages, send_batch, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Feed rendered messages to a bulk sender, one batch at a time.
+
+    Args:
+        messages (iterable[dict]): Messages, e.g. from merge()
+        send_batch (callable): Takes a list of messages and returns one
+                               {"success": bool, ...} result per message, like
+                               brevoMailer.send_batch or one_by_one(send_mail)
+        batch_size (int): Messages rendered and sent per call
+
+    Yields:
+        tuple[dict, dict]: Each message with its result
+    """
+    messages = iter(messages)
+    while True:
+        batch = list(itertools.islice(messages, batch_size))
+        if not batch:
+            return
+        yield from zip(batch, send_batch(batch))
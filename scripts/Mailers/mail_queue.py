@@ -0,0 +1,370 @@
+"""
+Bulk mail queue shared by the mailers in this directory.
+
+Messages are stored in an SQLite outbox (WAL mode) and sent by asyncio
+workers through pluggable backends (SMTP, Brevo, Resend). Token buckets limit
+the send rate per provider and per sender address.
+
+Delivery is at-least-once: a message is marked as sent only after its backend
+accepted it, so nothing queued is lost if the process crashes. Messages that
+were in flight during a crash are sent again on the next run; every other
+message is sent exactly once. Backends that support idempotency keys (Resend)
+get the message id as the key, so for them the resend is dropped by the
+provider. Enqueueing the same message_id twice is a no-op.
+
+An outbox has a single consumer: run only one MailQueue.run() per outbox
+file at a time. A run starts by moving every in-flight message back to
+pending, so a second process on the same outbox would send the first one's
+in-flight messages again. Enqueueing from other processes is safe.
+
+Example:
+    queue = MailQueue("outbox.db", {"smtp": SMTPBackend("smtp.gmail.com", 587, user, password)},
+                      workers=20, provider_rates={"smtp": 5})
+    for address in recipients:
+        queue.enqueue(address, "Hello", "<h1>Hi!</h1>", provider="smtp", sender=user)
+    queue.run()
+"""
+
+import asyncio
+import importlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        """
+        Raises:
+            ValueError: If rate is not a positive number
+        """
+        if not rate > 0:
+            raise ValueError(f"rate must be a positive number of tokens per second, got {rate!r}")
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class SMTPBackend:
+    """
+    Sends through an SMTP server. Every worker thread keeps its own
+    authenticated connection open between messages.
+    """
+
+    name = "smtp"
+
+    def __init__(self, host, port, username=None, password=None, use_tls=True, use_ssl=False,
+                 timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self._local = threading.local()
+        self._servers = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        import smtplib
+
+        server = getattr(self._local, "server", None)
+        if server is None:
+            smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+            server = smtp_class(self.host, self.port, timeout=self.timeout)
+            if self.use_tls and not self.use_ssl:
+                server.starttls()
+            if self.password:
+                server.login(self.username, self.password)
+            self._local.server = server
+            with self._lock:
+                self._servers.append(server)
+        return server
+
+    def send(self, message):
+        """
+        Send one queued message.
+
+        Args:
+            message (dict): Message with id, sender, to, subject, body and html keys
+
+        Raises:
+            Exception: If the server refused the message
+        """
+        # Imported here so queues that only use HTTP providers never load smtplib/email
+        import smtplib
+        from email.mime.text import MIMEText
+
+        mime = MIMEText(message["body"], "html" if message["html"] else "plain")
+        mime["From"] = message["sender"]
+        mime["To"] = ", ".join(message["to"])
+        mime["Subject"] = message["subject"]
+        try:
+            self._connection().sendmail(message["sender"], message["to"], mime.as_string())
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Drop the broken connection so the retry opens a fresh one
+            self._local.server = None
+            raise
+
+    def close(self):
+        """Close the connections of every worker thread."""
+        with self._lock:
+            servers, self._servers = self._servers, []
+        for server in servers:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+        self._local = threading.local()
+
+
+class FunctionBackend:
+    """
+    Adapts a provider module's `send_mail(to, subject, message)` function, which
+    returns {"success": bool, ...}, to the queue's backend interface.
+
+    Such functions always send HTML from the account's configured address, so
+    MailQueue.enqueue() refuses messages for them that set a sender or a plain
+    text body. With `idempotent`, the function takes a fourth argument, the
+    message id, which the provider uses to drop repeated sends.
+    """
+
+    def __init__(self, name, send_mail, idempotent=False):
+        self.name = name
+        self._send_mail = send_mail
+        self.idempotent = idempotent
+
+    def send(self, message):
+        args = (message["to"], message["subject"], message["body"])
+        if self.idempotent:
+            args += (message["id"],)
+        response = self._send_mail(*args)
+        if not response.get("success"):
+            raise RuntimeError(response.get("error", f"{self.name} send failed"))
+
+    def close(self):
+        pass
+
+
+def _sibling_module(name):
+    """Import a mailer module from this directory, as a script or as a package."""
+    return importlib.import_module(f"{__package__}.{name}" if __package__ else name)
+
+
+def BrevoBackend():
+    """Backend sending through brevoMailer.send_mail (needs BREVO_KEY / BREVO_MAIL)."""
+    return FunctionBackend("brevo", _sibling_module("brevoMailer").send_mail)
+
+
+def ResendBackend():
+    """
+    Backend sending through resendMailer.send_once (needs RESEND_KEY / RESEND_MAIL),
+    with the message id as Resend's idempotency key.
+    """
+    return FunctionBackend("resend", _sibling_module("resendMailer").send_once, idempotent=True)
+
+
+class MailQueue:
+    """Persistent outbox drained by asyncio workers through rate-limited backends."""
+
+    def __init__(self, path, backends, workers=10, provider_rates=None, sender_rate=None,
+                 max_attempts=3, retry_delay=30):
+        """
+        Args:
+            path (str): SQLite file holding the outbox (created if missing)
+            backends (dict): Provider name -> backend object with send(message)
+            workers (int): Messages sent concurrently
+            provider_rates (dict): Provider name -> maximum messages per second
+            sender_rate (float): Maximum messages per second per sender address
+            max_attempts (int): Attempts before a message is marked failed
+            retry_delay (float): Seconds before a failed message is retried,
+                                 doubled after every attempt
+
+        Raises:
+            ValueError: If a rate is not a positive number
+        """
+        for name, rate in list((provider_rates or {}).items()) + [("sender_rate", sender_rate)]:
+            if rate is not None and not rate > 0:
+                raise ValueError(f"{name}: rate must be a positive number of messages per second, "
+                                 f"got {rate!r}")
+        self.path = path
+        self.backends = backends
+        self.workers = workers
+        self.provider_rates = provider_rates or {}
+        self.sender_rate = sender_rate
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id TEXT PRIMARY KEY, provider TEXT NOT NULL, payload TEXT NOT NULL,"
+            " state TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0,"
+            " not_before REAL NOT NULL DEFAULT 0, error TEXT, created REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, not_before)")
+
+    def enqueue(self, to, subject, body, provider="smtp", sender=None, html=True, message_id=None):
+        """
+        Add a message to the outbox.
+
+        Args:
+            to (str | list[str]): Recipient email address(es)
+            subject (str): Email subject
+            body (str): Email body
+            provider (str): Name of the backend to send through
+            sender (str): Sender address (also the key of the per-sender rate limit);
+                          not supported by provider function backends, which
+                          send from their configured address
+            html (bool): Whether body is HTML; must be True for provider function
+                         backends
+            message_id (str): Idempotency key; enqueueing an existing id does nothing
+
+        Returns:
+            str: The message id
+
+        Raises:
+            ValueError: If the provider's backend cannot send this sender or body type
+        """
+        if isinstance(self.backends.get(provider), FunctionBackend):
+            if sender is not None:
+                raise ValueError(f"{provider} sends from its configured address; "
+                                 f"sender cannot be set per message")
+            if not html:
+                raise ValueError(f"{provider} only sends HTML bodies")
+        message_id = message_id or uuid.uuid4().hex
+        payload = json.dumps({
+            "to": [to] if isinstance(to, str) else list(to),
+            "subject": subject,
+            "body": body,
+            "sender": sender,
+            "html": html,
+        })
+        self.db.execute("INSERT OR IGNORE INTO outbox (id, provider, payload, created) "
+                        "VALUES (?, ?, ?, ?)", (message_id, provider, payload, time.time()))
+        return message_id
+
+    def counts(self):
+        """
+        Returns:
+            dict: Number of messages per state (pending, inflight, sent, failed)
+        """
+        return dict(self.db.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state"))
+
+    def _claim(self, limit):
+        """Move up to `limit` due pending messages to 'inflight' and return them."""
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        rows = self.db.execute(
+            "SELECT id, provider, payload, attempts FROM outbox "
+            "WHERE state = 'pending' AND not_before <= ? ORDER BY created LIMIT ?",
+            (now, limit)).fetchall()
+        self.db.executemany("UPDATE outbox SET state = 'inflight' WHERE id = ?",
+                            [(row[0],) for row in rows])
+        self.db.execute("COMMIT")
+        return rows
+
+    def _finish(self, message_id, attempts, error=None):
+        if error is None:
+            self.db.execute("UPDATE outbox SET state = 'sent', attempts = ?, error = NULL "
+                            "WHERE id = ?", (attempts, message_id))
+        elif attempts >= self.max_attempts:
+            self.db.execute("UPDATE outbox SET state = 'failed', attempts = ?, error = ? "
+                            "WHERE id = ?", (attempts, error, message_id))
+        else:
+            not_before = time.time() + self.retry_delay * 2 ** (attempts - 1)
+            self.db.execute("UPDATE outbox SET state = 'pending', attempts = ?, error = ?, "
+                            "not_before = ? WHERE id = ?",
+                            (attempts, error, not_before, message_id))
+
+    async def run_async(self):
+        """
+        Send queued messages until the outbox has nothing pending.
+
+        Returns:
+            dict: Number of messages per state afterwards
+        """
+        loop = asyncio.get_running_loop()
+        # Messages left in flight by a crashed run are sent again (at least once;
+        # hence one consumer per outbox)
+        self.db.execute("UPDATE outbox SET state = 'pending' WHERE state = 'inflight'")
+
+        provider_buckets = {name: TokenBucket(rate) for name, rate in self.provider_rates.items()}
+        sender_buckets = {}
+        work = asyncio.Queue(maxsize=self.workers * 2)
+
+        async def worker(executor):
+            while True:
+                row = await work.get()
+                if row is None:
+                    return
+                try:
+                    await send(row, executor)
+                finally:
+                    work.task_done()
+
+        async def send(row, executor):
+            message_id, provider, payload, attempts = row
+            message = json.loads(payload)
+            message["id"] = message_id
+            if provider in provider_buckets:
+                await provider_buckets[provider].acquire()
+            if self.sender_rate:
+                bucket = sender_buckets.setdefault(message["sender"], TokenBucket(self.sender_rate))
+                await bucket.acquire()
+            try:
+                backend = self.backends[provider]
+                await loop.run_in_executor(executor, backend.send, message)
+                self._finish(message_id, attempts + 1)
+            except Exception as e:
+                self._finish(message_id, attempts + 1, str(e) or type(e).__name__)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            tasks = [asyncio.ensure_future(worker(executor)) for _ in range(self.workers)]
+            while True:
+                rows = self._claim(self.workers * 2)
+                for row in rows:
+                    # Blocks while the workers are busy, so claims never run far ahead
+                    await work.put(row)
+                if rows:
+                    continue
+                # Nothing due: let in-flight sends finish, then wait for deferred retries
+                await work.join()
+                next_due = self.db.execute(
+                    "SELECT MIN(not_before) FROM outbox WHERE state = 'pending'").fetchone()[0]
+                if next_due is None:
+                    break
+                await asyncio.sleep(max(0.0, next_due - time.time()))
+            for _ in tasks:
+                await work.put(None)
+            await asyncio.gather(*tasks)
+
+        for backend in self.backends.values():
+            backend.close()
+        return self.counts()
+
+    def run(self):
+        """Synchronous wrapper around run_async()."""
+        return asyncio.run(self.run_async())
+
+    def close(self):
+        self.db.close()
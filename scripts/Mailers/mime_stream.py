@@ -0,0 +1,332 @@
+"""
+Streaming MIME messages for large attachments.
+
+Attaching files with MIMEApplication(file.read()) keeps the raw file, its
+base64 encoding and the serialized message in memory at the same time. Here
+only the small message skeleton (headers, body, MIME boundaries) is built by
+the email package; attachments are base64-encoded chunk by chunk while the
+message is written, so peak memory stays bounded whatever the file size.
+
+Encoded attachments are cached on disk, keyed by the SHA-256 of the file
+contents (the hash itself is remembered per path, size and mtime), so sending
+the same file again skips the encoding. The cache lives in a private per-user
+directory ($MAILER_CACHE_DIR, or mailer_attachments under the user's cache
+directory) that must be owned by the user and closed to everyone else;
+otherwise attachments are encoded without caching. The cache is capped at
+CACHE_MAX_BYTES, dropping the least recently used encodings first.
+
+Example:
+    message = StreamingMessage(sender, ["a@example.com"], [], "Report", "See attached",
+                               attachments=["report.pdf"])
+    with smtplib.SMTP(host, port) as server:
+        server.starttls()
+        server.login(sender, password)
+        send_streaming(server, sender, ["a@example.com"], message.spool())
+"""
+
+import base64
+import functools
+import hashlib
+import os
+import re
+import smtplib
+import stat
+import tempfile
+import uuid
+from email import policy
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+CRLF = b"\r\n"
+RAW_CHUNK = 57 * 1152          # Encodes to exactly 1152 base64 lines of 76 characters
+READ_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024
+CACHE_DIR_VARIABLE = "MAILER_CACHE_DIR"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+HASH_MEMO_SIZE = 1024
+_DEFAULT = object()
+
+
+def default_cache_dir():
+    """Per-user cache directory: $MAILER_CACHE_DIR, else <user cache dir>/mailer_attachments."""
+    if os.environ.get(CACHE_DIR_VARIABLE):
+        return os.environ[CACHE_DIR_VARIABLE]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "mailer_attachments")
+
+
+def _private_dir(path):
+    """
+    Create a directory with mode 0700 if it does not exist.
+
+    Returns:
+        bool: Whether it is a real directory owned by this user that nobody
+              else can read or write, i.e. safe to trust cached files from
+    """
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(info.st_mode):
+        return False
+    if hasattr(os, "getuid"):
+        return info.st_uid == os.getuid() and not info.st_mode & 0o077
+    return True
+
+
+@functools.lru_cache(maxsize=HASH_MEMO_SIZE)
+def _hash_contents(realpath, size, mtime_ns):
+    digest = hashlib.sha256()
+    with open(realpath, "rb") as f:
+        for block in iter(lambda: f.read(READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents, re-hashed only when its path, size or mtime changes."""
+    info = os.stat(path)
+    return _hash_contents(os.path.realpath(path), info.st_size, info.st_mtime_ns)
+
+
+def _encoded_size(size):
+    """Size of encode_base64_chunks() output for a file of `size` bytes."""
+    encoded = 4 * -(-size // 3)
+    return encoded + len(CRLF) * -(-encoded // 76)
+
+
+def _evict(cache_dir, max_bytes):
+    """Delete the least recently used encodings until the cache fits in max_bytes."""
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".b64") and entry.is_file(follow_symlinks=False):
+                info = entry.stat(follow_symlinks=False)
+                entries.append((info.st_mtime_ns, info.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def encode_base64_chunks(path):
+    """
+    Base64-encode a file in bounded chunks.
+
+    Args:
+        path (str): File to encode
+
+    Yields:
+        bytes: CRLF-terminated 76-character base64 lines, about 87 KB at a time
+    """
+    with open(path, "rb") as f:
+        for raw in iter(lambda: f.read(RAW_CHUNK), b""):
+            encoded = base64.b64encode(raw)
+            yield CRLF.join(encoded[i:i + 76] for i in range(0, len(encoded), 76)) + CRLF
+
+
+def _read_lines(f):
+    """Read a file in blocks that always end on a line boundary."""
+    for lines in iter(lambda: f.readlines(READ_SIZE), []):
+        yield b"".join(lines)
+
+
+class StreamingMessage:
+    """An email whose attachments are encoded while the message is written."""
+
+    def __init__(self, sender, to_emails, cc_emails, subject, body, html=False, attachments=(),
+                 cache_dir=_DEFAULT, cache_max_bytes=CACHE_MAX_BYTES):
+        """
+        Args:
+            sender (str): Sender address
+            to_emails (list[str]): Recipients shown in the To header
+            cc_emails (list[str]): Recipients shown in the CC header
+            subject (str): Email subject
+            body (str): Email body
+            html (bool): Whether body is HTML
+            attachments (list[str]): Paths of readable files to attach
+            cache_dir (str): Directory for cached encodings (default: default_cache_dir()),
+                             or None to disable caching
+            cache_max_bytes (int): Size the cache is trimmed to after adding an encoding
+        """
+        self.attachments = list(attachments)
+        self.cache_dir = default_cache_dir() if cache_dir is _DEFAULT else cache_dir
+        self.cache_max_bytes = cache_max_bytes
+
+        msg = MIMEMultipart()
+        msg["From"] = sender
+        msg["To"] = ", ".join(to_emails)
+        msg["CC"] = ", ".join(cc_emails)
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "html" if html else "plain"))
+
+        # Each attachment's payload is a unique placeholder that is replaced by
+        # the streamed encoding when the message is written.
+        self._placeholders = []
+        for path in self.attachments:
+            name = os.path.basename(path)
+            placeholder = f"@@attachment-{uuid.uuid4().hex}@@"
+            part = MIMEBase("application", "octet-stream", Name=name)
+            part["Content-Transfer-Encoding"] = "base64"
+            part["Content-Disposition"] = f'attachment; filename="{name}"'
+            part.set_payload(placeholder)
+            msg.attach(part)
+            self._placeholders.append(placeholder.encode("ascii") + CRLF)
+
+        self._skeleton = msg.as_bytes(policy=policy.SMTP)
+
+    def _encoded(self, path):
+        """Yield the encoded attachment, from the cache when possible."""
+        if not self.cache_dir or not _private_dir(self.cache_dir):
+            yield from encode_base64_chunks(path)
+            return
+
+        cached = os.path.join(self.cache_dir, f"{file_hash(path)}.b64")
+        try:
+            info = os.lstat(cached)
+        except OSError:
+            info = None
+        if (info is not None and stat.S_ISREG(info.st_mode)
+                and info.st_size == _encoded_size(os.path.getsize(path))):
+            os.utime(cached)                    # Most recently used
+            with open(cached, "rb") as f:
+                yield from _read_lines(f)
+            return
+
+        fd, temp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as cache_file:
+                for chunk in encode_base64_chunks(path):
+                    cache_file.write(chunk)
+                    yield chunk
+            os.replace(temp_name, cached)
+        finally:
+            if os.path.exists(temp_name):
+                os.remove(temp_name)
+        _evict(self.cache_dir, self.cache_max_bytes)
+
+    def chunks(self):
+        """
+        Yield the serialized message (CRLF line endings) in pieces that end on
+        line boundaries.
+        """
+        rest = self._skeleton
+        for path, placeholder in zip(self.attachments, self._placeholders):
+            before, rest = rest.split(placeholder, 1)
+            yield before
+            yield from self._encoded(path)
+        yield rest
+
+    def spool(self, max_memory=SPOOL_MAX_MEMORY):
+        """
+        Write the whole message to a temporary file that stays in memory while
+        it is small and moves to disk beyond `max_memory` bytes. The file can be
+        sent many times without encoding the attachments again.
+
+        Returns:
+            tempfile.SpooledTemporaryFile: The message, rewound to the start
+        """
+        spooled = tempfile.SpooledTemporaryFile(max_size=max_memory)
+        for chunk in self.chunks():
+            spooled.write(chunk)
+        spooled.seek(0)
+        return spooled
+
+    def as_bytes(self):
+        """Return the full message in memory (only sensible for small attachments)."""
+        return b"".join(self.chunks())
+
+
+class DeliveryUnconfirmed(smtplib.SMTPServerDisconnected):
+    """
+    The message was fully transmitted, but the connection dropped before the
+    server replied. The server may have accepted it, so sending it again can
+    deliver a duplicate.
+    """
+
+
+def send_streaming(server, sender, recipients, message, responses=None):
+    """
+    Send a message without holding it in memory, writing it to the SMTP
+    socket piece by piece (smtplib.SMTP.sendmail needs the whole message as
+    one string).
+
+    Args:
+        server (smtplib.SMTP): Connected and logged-in SMTP server
+        sender (str): Envelope sender
+        recipients (list[str]): Envelope recipients
+        message (StreamingMessage | file | bytes): The message; files are read
+                                                   from their current position
+        responses (dict): If given, filled with each recipient's final SMTP
+                          (code, response): the RCPT reply for refused
+                          recipients, the DATA reply for the others
+
+    Returns:
+        dict: Refused recipients mapped to (code, response), like sendmail()
+
+    Raises:
+        smtplib.SMTPSenderRefused, smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError
+        DeliveryUnconfirmed: If the connection dropped while waiting for the
+                             server to confirm the transmitted message
+    """
+    if responses is None:
+        responses = {}
+    if isinstance(message, StreamingMessage):
+        chunks = message.chunks()
+    elif isinstance(message, bytes):
+        chunks = [message]
+    else:
+        chunks = _read_lines(message)
+
+    server.ehlo_or_helo_if_needed()
+    code, response = server.mail(sender)
+    if code != 250:
+        server.rset()
+        raise smtplib.SMTPSenderRefused(code, response, sender)
+
+    refused = {}
+    for recipient in recipients:
+        code, response = server.rcpt(recipient)
+        responses[recipient] = (code, response)
+        if code not in (250, 251):
+            refused[recipient] = (code, response)
+    if len(refused) == len(recipients):
+        server.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)
+
+    code, response = server.docmd("data")
+    if code != 354:
+        server.rset()
+        raise smtplib.SMTPDataError(code, response)
+
+    # Each chunk is sent once the next one is known, so the last one goes out in
+    # the same write as the terminator instead of a tiny separate packet that
+    # Nagle's algorithm would hold back until the previous one is acknowledged.
+    pending = b""
+    for chunk in chunks:
+        if chunk:
+            if pending:
+                server.send(pending)
+            # Dot-stuffing (RFC 5321 4.5.2); chunks always start at a line start
+            pending = re.sub(rb"(?m)^\.", b"..", chunk)
+    if pending and not pending.endswith(CRLF):
+        pending += CRLF
+    server.send(pending + b".\r\n")
+
+    try:
+        code, response = server.getreply()
+    except smtplib.SMTPServerDisconnected as e:
+        raise DeliveryUnconfirmed(f"No reply after the message was sent: {e}") from e
+    if code != 250:
+        raise smtplib.SMTPDataError(code, response)
+    for recipient in recipients:
+        if recipient not in refused:
+            responses[recipient] = (code, response)
+    return refused
@@ -1,8 +1,25 @@
 import os
-from resend import Resend
 
-# Initialize Resend client
-resend = Resend(api_key=os.getenv("RESEND_KEY"))
+try:
+    from .http_batch import BatchRejected, REJECTED_STATUSES, error_message, post_json, send_in_batches
+except ImportError:  # Run as a script from this directory
+    from http_batch import BatchRejected, REJECTED_STATUSES, error_message, post_json, send_in_batches
+
+RESEND_URL = "https://api.resend.com/emails"
+RESEND_BATCH_URL = "https://api.resend.com/emails/batch"
+RESEND_BATCH_SIZE = 100     # Maximum emails per batch request
+
+_resend = None
+
+
+def _client():
+    """Create the Resend client on first use."""
+    global _resend
+    if _resend is None:
+        from resend import Resend
+        _resend = Resend(api_key=os.getenv("RESEND_KEY"))
+    return _resend
+
 
 def send_mail(to, subject, message):
     """
@@ -25,7 +42,7 @@ def send_mail(to, subject, message):
         if isinstance(to, str):
             to = [to]
 
-        response = resend.emails.send(
+        response = _client().emails.send(
             from_email=resend_mail,
             to=to,
             subject=subject,
@@ -37,5 +54,90 @@ def send_mail(to, subject, message):
         print("Email send error:", e)
         return {"success": False, "error": str(e)}
 
+
+def send_once(to, subject, message, idempotency_key):
+    """
+    Send an email through Resend's REST API with an Idempotency-Key header.
+    Resend delivers at most one email per key (keys are remembered for 24
+    hours), so a send retried after a crash or a lost response is not
+    delivered twice.
+
+    Args:
+        to (str | list[str]): Recipient email address(es)
+        subject (str): Email subject
+        message (str): HTML content of the email
+        idempotency_key (str): Unique key of this email, e.g. the queue's message id
+
+    Returns:
+        dict: Response with success status and data/error
+    """
+    try:
+        resend_key = os.getenv("RESEND_KEY")
+        resend_mail = os.getenv("RESEND_MAIL")
+        if not resend_key or not resend_mail:
+            raise ValueError("Missing RESEND_KEY or RESEND_MAIL in environment variables")
+
+        payload = {"from": resend_mail, "to": [to] if isinstance(to, str) else to,
+                   "subject": subject, "html": message}
+        headers = {"authorization": f"Bearer {resend_key}", "idempotency-key": idempotency_key}
+        res = post_json(RESEND_URL, payload, headers)
+        if not res.ok:
+            raise ValueError(error_message(res, "Resend API error"))
+        return {"success": True, "data": res.json()}
+
+    except Exception as e:
+        print("Email send error:", e)
+        return {"success": False, "error": str(e)}
+
+
+def send_batch(messages, batch_size=RESEND_BATCH_SIZE, compress=False):
+    """
+    Send many emails through Resend's batch endpoint over a keep-alive session.
+
+    Batches are validated permissively, so Resend sends the valid emails and
+    reports the invalid ones by index. A request Resend still refuses as a
+    whole fails every message in it.
+
+    Args:
+        messages (list[dict]): Messages with "to", "subject" and "message" keys,
+                               as for send_mail()
+        batch_size (int): Maximum messages per API call
+        compress (bool): Gzip the request bodies (only if your account accepts it)
+
+    Returns:
+        list[dict]: One response per message, in order, like send_mail()'s
+    """
+    resend_key = os.getenv("RESEND_KEY")
+    resend_mail = os.getenv("RESEND_MAIL")
+    if not resend_key or not resend_mail:
+        error = "Missing RESEND_KEY or RESEND_MAIL in environment variables"
+        return [{"success": False, "error": error} for _ in messages]
+
+    headers = {"authorization": f"Bearer {resend_key}", "x-batch-validation": "permissive"}
+
+    def send_chunk(chunk):
+        payload = [
+            {"from": resend_mail, "to": [m["to"]] if isinstance(m["to"], str) else m["to"],
+             "subject": m["subject"], "html": m["message"]}
+            for m in chunk
+        ]
+        res = post_json(RESEND_BATCH_URL, payload, headers, compress=compress)
+        if res.status_code in REJECTED_STATUSES:
+            raise BatchRejected(error_message(res, "Resend API error"))
+        if not res.ok:
+            raise ValueError(error_message(res, "Resend API error"))
+
+        data = res.json()
+        errors = {e["index"]: e.get("message", "Rejected by Resend") for e in data.get("errors") or []}
+        # Ids are returned, in order, for the emails that were accepted
+        ids = iter(data.get("data") or [])
+        return [{"success": False, "error": errors[i]} if i in errors
+                else {"success": True, "data": next(ids, None)}
+                for i in range(len(chunk))]
+
+    return send_in_batches(list(messages), batch_size, send_chunk)
+
 # Example usage
 # send_mail("test@example.com", "Hello", "<h1>This is a test</h1>")
+# send_batch([{"to": "a@example.com", "subject": "Hi", "message": "<p>A</p>"},
+#             {"to": "b@example.com", "subject": "Hi", "message": "<p>B</p>"}])
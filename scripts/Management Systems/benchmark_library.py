@@ -0,0 +1,166 @@
+"""
+Load benchmark for the library catalog.
+
+Writes a library.json of --sizes books, then loads it in a fresh interpreter
+with each loader and reports the load time and the memory it took:
+
+    legacy    json.load of the whole file, then one Book(**record) per book,
+              with a per-instance __dict__ (how the catalog used to be loaded)
+    current   Library(filename): books streamed from the file one at a time
+              into __slots__ Books with interned authors
+
+"load MB" is the peak memory the load added on top of the interpreter and
+"kept MB" what the catalog still holds afterwards. Both come from the
+process's resident memory in /proc. Where there is no /proc (macOS,
+Windows) they are the Python allocations seen by tracemalloc instead, which
+leave out interpreter overhead and slow the load down, so compare those
+figures only with each other.
+
+Usage:
+    python benchmark_library.py
+    python benchmark_library.py --sizes 10000 100000 1000000 --json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from library_management_system import Book, Catalog, JSONStorage, Library
+
+LOADERS = ["legacy", "current"]
+
+WORDS = ("the", "of", "night", "river", "garden", "empire", "silent", "winter", "house", "song",
+         "lost", "city", "glass", "storm", "dragon", "secret", "letters", "shadow", "sea", "stone")
+
+
+class LegacyBook:
+    """Book as it was before __slots__: every instance carries its own __dict__."""
+
+    def __init__(self, book_id, title, author, available=True):
+        self.book_id = book_id
+        self.title = title
+        self.author = author
+        self.available = available
+
+
+def write_library(filename, count, seed=0):
+    """Write a library.json of `count` books, about 20 per author."""
+    rng = random.Random(seed)
+    authors = [f"Author {i}" for i in range(max(1, count // 20))]
+    books = (Book(str(i), " ".join(rng.choices(WORDS, k=rng.randint(2, 5))).title(),
+                  rng.choice(authors), rng.random() > 0.1)
+             for i in range(count))
+    JSONStorage(filename).save_all(books)
+
+
+PROC_STATUS = "/proc/self/status"
+
+
+def _memory_mb(field):
+    """VmRSS or VmHWM of this process, in MB."""
+    with open(PROC_STATUS) as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_loader(loader, filename):
+    """
+    Load the file once (in the current interpreter).
+
+    Returns:
+        dict: books, load_ms, load_mb and kept_mb
+    """
+    has_proc = os.path.exists(PROC_STATUS)
+    if has_proc:
+        before = _memory_mb("VmRSS")
+    else:
+        tracemalloc.start()
+    start = time.perf_counter()
+    if loader == "legacy":
+        with open(filename, "r") as f:
+            data = json.load(f)
+        catalog = Catalog(LegacyBook(**b) for b in data)
+        del data
+    else:
+        catalog = Library(filename).books
+    elapsed = time.perf_counter() - start
+    if has_proc:
+        load_mb, kept_mb = _memory_mb("VmHWM") - before, _memory_mb("VmRSS") - before
+    else:
+        kept, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        load_mb, kept_mb = peak / (1024 * 1024), kept / (1024 * 1024)
+    return {
+        "books": len(catalog),
+        "load_ms": round(elapsed * 1000, 1),
+        "load_mb": round(load_mb, 1),
+        "kept_mb": round(kept_mb, 1),
+    }
+
+
+def run_benchmark(sizes=(10_000, 100_000, 1_000_000), loaders=LOADERS, runs=1):
+    """
+    Load every size with every loader, each run in its own interpreter.
+
+    Returns:
+        list[dict]: One result per size and loader, with the median load time
+                    and the largest memory figures over the runs
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            filename = os.path.join(directory, f"library-{size}.json")
+            write_library(filename, size)
+            for loader in loaders:
+                samples = []
+                for _ in range(runs):
+                    output = subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "--run-loader", loader, filename],
+                        capture_output=True, text=True, check=True).stdout
+                    samples.append(json.loads(output.strip().splitlines()[-1]))
+                results.append({
+                    "size": size,
+                    "loader": loader,
+                    "books": samples[0]["books"],
+                    "load_ms": statistics.median(s["load_ms"] for s in samples),
+                    "load_mb": max(s["load_mb"] for s in samples),
+                    "kept_mb": max(s["kept_mb"] for s in samples),
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare catalog load time and memory")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--loaders", nargs="+", choices=LOADERS, default=LOADERS)
+    parser.add_argument("--runs", type=int, default=1, help="Fresh interpreters per measurement")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--run-loader", nargs=2, metavar=("LOADER", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_loader:
+        print(json.dumps(run_loader(*args.run_loader)))
+        return
+
+    results = run_benchmark(args.sizes, args.loaders, args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'books':>10}  {'loader':<8}{'load ms':>10}{'load MB':>10}{'kept MB':>10}")
+    for r in results:
+        print(f"{r['size']:>10}  {r['loader']:<8}{r['load_ms']:>10.1f}{r['load_mb']:>10.1f}"
+              f"{r['kept_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
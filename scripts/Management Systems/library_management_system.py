@@ -1,118 +1,884 @@
-"""
-Library Management System
-
-Description:
-A simple command-line library system that allows users to add, view, borrow, 
-and return books. Data is stored in a JSON file to maintain persistence.
-
-Time Complexity:
-- Adding a Book: O(1)
-- Viewing Books: O(n)
-- Borrowing/Returning a Book: O(n)
-
-Space Complexity: O(n) - stores all books in memory.
-"""
-
-import json
-import os
-
-
-class Book:
-    """Represents a single book in the library."""
-
-    def __init__(self, book_id, title, author, available=True):
-        self.book_id = book_id
-        self.title = title
-        self.author = author
-        self.available = available
-
-
-class Library:
-    """Manages the collection of books and user interactions."""
-
-    def __init__(self, filename="library.json"):
-        self.filename = filename
-        self.books = self.load_books()
-
-    def load_books(self):
-        """Load books from JSON file if it exists."""
-        if os.path.exists(self.filename):
-            with open(self.filename, "r") as f:
-                data = json.load(f)
-                return [Book(**b) for b in data]
-        return []
-
-    def save_books(self):
-        """Save all books to JSON file."""
-        with open(self.filename, "w") as f:
-            json.dump([b.__dict__ for b in self.books], f, indent=2)
-
-    def add_book(self):
-        """Add a new book to the library."""
-        book_id = input("Enter Book ID: ")
-        title = input("Enter Book Title: ")
-        author = input("Enter Author: ")
-        self.books.append(Book(book_id, title, author))
-        self.save_books()
-        print(f"✅ Book '{title}' added successfully!")
-
-    def view_books(self):
-        """Display all books in the library."""
-        print("\n📚 Library Books:")
-        if not self.books:
-            print("No books available in the library.")
-            return
-        for b in self.books:
-            status = "Available" if b.available else "Borrowed"
-            print(f"{b.book_id} | {b.title} | {b.author} | {status}")
-
-    def borrow_book(self):
-        """Borrow a book by entering its ID."""
-        book_id = input("Enter Book ID to borrow: ")
-        for b in self.books:
-            if b.book_id == book_id and b.available:
-                b.available = False
-                self.save_books()
-                print(f"📖 You borrowed '{b.title}'")
-                return
-        print("⚠️ Book not available or invalid ID!")
-
-    def return_book(self):
-        """Return a borrowed book by entering its ID."""
-        book_id = input("Enter Book ID to return: ")
-        for b in self.books:
-            if b.book_id == book_id and not b.available:
-                b.available = True
-                self.save_books()
-                print(f"📘 You returned '{b.title}'")
-                return
-        print("⚠️ Invalid Book ID or book was not borrowed!")
-
-
-# Test cases (interactive simulation)
-if __name__ == "__main__":
-    library = Library()
-
-    while True:
-        print("\n--- 📚 Library Management System ---")
-        print("1. Add Book")
-        print("2. View Books")
-        print("3. Borrow Book")
-        print("4. Return Book")
-        print("5. Exit")
-
-        choice = input("Enter your choice (1-5): ")
-
-        if choice == "1":
-            library.add_book()
-        elif choice == "2":
-            library.view_books()
-        elif choice == "3":
-            library.borrow_book()
-        elif choice == "4":
-            library.return_book()
-        elif choice == "5":
-            print("👋 Exiting... Thank you for using the Library System!")
-            break
-        else:
-            print("⚠️ Invalid choice! Please enter a number between 1 and 5.")
+"""
+Library Management System
+
+Description:
+A simple command-line library system that allows users to add, view, borrow, 
+and return books. Data is stored in a JSON file to maintain persistence, or
+in an SQLite database for large catalogs (pass a .db filename or --db).
+
+Books are kept in an indexed catalog: a dict on book_id plus secondary
+indexes on author and availability.
+
+Time Complexity:
+- Adding a Book: O(1), duplicate IDs are rejected
+- Viewing Books: O(n), in the order the books were added
+- Borrowing/Returning/Looking up a Book: O(1)
+- Books by an author / available books: O(k) for k results
+
+Storage (per add/borrow/return):
+- JSON file: O(n), the whole file is rewritten (atomically)
+- JSON file + journal (--journal): O(1), one line is appended to a journal that
+  is folded back into the JSON file once it grows past a size threshold
+- SQLite (WAL): O(1), one row is inserted or updated in a transaction
+
+Search: an inverted index over title and author words, updated as books are
+added, answers ranked queries with prefix and fuzzy (one typo) matching. It
+is saved next to the data file (<file>.index) when the library is closed,
+and loaded on the first search rather than at startup.
+
+Space Complexity: O(n) - stores all books in memory, as __slots__ objects
+sharing interned author names. library.json is parsed one book at a time.
+"""
+
+import argparse
+import bisect
+import heapq
+import itertools
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+
+
+class Book:
+    """
+    Represents a single book in the library.
+
+    Books use __slots__ instead of a per-instance __dict__, and author names
+    are interned, so a catalog holds one copy of each author's name however
+    many books they wrote.
+    """
+
+    __slots__ = ("book_id", "title", "author", "available")
+
+    def __init__(self, book_id, title, author, available=True):
+        self.book_id = book_id
+        self.title = title
+        self.author = sys.intern(author)
+        self.available = available
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a book from a stored record."""
+        return cls(data["book_id"], data["title"], data["author"], data.get("available", True))
+
+    def to_dict(self):
+        """Return the book as a record for storage."""
+        return {"book_id": self.book_id, "title": self.title, "author": self.author,
+                "available": self.available}
+
+
+class Catalog:
+    """
+    In-memory book index.
+
+    Books are stored in a dict keyed by book_id, which also keeps the order in
+    which they were added. Secondary indexes map each author to their books
+    and track which books are available. Every index is updated on each
+    change, so lookups never scan the catalog.
+    """
+
+    def __init__(self, books=()):
+        self._books = {}
+        self._by_author = {}
+        self._available = {}        # book_id -> None, used as an ordered set
+        for book in books:
+            self.add(book)
+
+    def __len__(self):
+        return len(self._books)
+
+    def __iter__(self):
+        return iter(self._books.values())
+
+    def __contains__(self, book_id):
+        return book_id in self._books
+
+    def add(self, book):
+        """
+        Add a book to the catalog.
+
+        Raises:
+            ValueError: If a book with the same ID is already in the catalog
+        """
+        if book.book_id in self._books:
+            raise ValueError(f"Duplicate book ID: {book.book_id}")
+        self._books[book.book_id] = book
+        authored = self._by_author.get(book.author)
+        if authored is None:
+            authored = self._by_author[book.author] = {}
+        authored[book.book_id] = None
+        if book.available:
+            self._available[book.book_id] = None
+
+    def remove(self, book_id):
+        """Remove a book from the catalog and its indexes."""
+        book = self._books.pop(book_id)
+        authored = self._by_author[book.author]
+        del authored[book_id]
+        if not authored:
+            del self._by_author[book.author]
+        self._available.pop(book_id, None)
+
+    def get(self, book_id):
+        """Return the book with this ID, or None."""
+        return self._books.get(book_id)
+
+    def last(self):
+        """Return the most recently added book, or None."""
+        return next(reversed(self._books.values()), None)
+
+    def by_author(self, author):
+        """Return the author's books, in the order they were added."""
+        return [self._books[book_id] for book_id in self._by_author.get(author, ())]
+
+    def available(self):
+        """Return the books that can be borrowed."""
+        return [self._books[book_id] for book_id in self._available]
+
+    def set_available(self, book_id, available):
+        """Mark a book as available or borrowed, keeping the availability index in sync."""
+        book = self._books[book_id]
+        book.available = available
+        if available:
+            self._available[book_id] = None
+        else:
+            self._available.pop(book_id, None)
+
+
+JSON_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """
+    Stream the items of a JSON list from a file, one at a time.
+
+    Only one chunk of the file and the current item are held in memory,
+    instead of the whole document plus every parsed item as with json.load.
+
+    Args:
+        f: Text file positioned at the start of the list
+        chunk_size (int): Characters read at a time
+
+    Yields:
+        The decoded items, in order
+
+    Raises:
+        ValueError: If the file does not hold a well-formed JSON list
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size).lstrip()
+    if not buffer:
+        return
+    if buffer[0] != "[":
+        raise ValueError("expected a JSON list")
+    position = 1
+    eof = False
+    while True:
+        position = JSON_SEPARATORS.match(buffer, position).end()
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+            complete = end < len(buffer) or eof     # A number could go on in the next chunk
+        except ValueError:
+            if eof:
+                raise
+            complete = False
+        if complete:
+            yield item
+            position = end
+            continue
+        more = f.read(chunk_size)
+        eof = not more
+        if eof and position >= len(buffer):
+            raise ValueError("unterminated JSON list")
+        buffer = buffer[position:] + more
+        position = 0
+
+
+def iter_json_records(f, batch_size=1000):
+    """
+    Stream the records of a library.json file.
+
+    JSONStorage writes one record per line, so whole lines can be parsed
+    `batch_size` at a time with a single json.loads call. Files in any other
+    layout, such as the indented files of older versions, are read with
+    iter_json_array() instead.
+
+    Args:
+        f: Text file positioned at the start
+        batch_size (int): Lines parsed at a time
+
+    Yields:
+        dict: One record per book, in order
+
+    Raises:
+        ValueError: If the file does not hold a well-formed JSON list
+    """
+    first = f.readline()
+    second = f.readline()
+    record = second.strip().rstrip(",")
+    if first.strip() != "[" or not (record.startswith("{") and record.endswith("}")):
+        f.seek(0)
+        yield from iter_json_array(f)
+        return
+    lines = itertools.chain([second], f)
+    while True:
+        batch = "".join(itertools.islice(lines, batch_size)).strip()
+        if not batch:
+            return
+        if batch.endswith("]"):         # The last lines of the file
+            batch = batch[:-1]
+        batch = batch.rstrip().rstrip(",")
+        if batch:
+            yield from json.loads(f"[{batch}]")
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into lowercase words."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _deletions(token):
+    """Every variant of token with one character removed."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _within_one_edit(a, b):
+    """Whether a and b differ by at most one insertion, deletion, substitution or transposition."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    return (a[i + 1:] == b[i + 1:] or a[i + 1:] == b[i:] or a[i:] == b[i + 1:]
+            or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:]))
+
+
+class SearchIndex:
+    """
+    Inverted index from title and author words to book IDs.
+
+    A query matches books that contain every query word. A query word can
+    match a word exactly, as a prefix ("dun" -> "dune"), or with one typo
+    ("herbret" -> "herbert"). Results are ranked by the sum, over the query
+    words, of field weight (title words count double) x match quality x IDF
+    (rarer words count more). Ties keep the order in which books were added.
+
+    Candidates are taken from the query word with the fewest matching books,
+    and only those are checked against the other words. A query therefore
+    costs about the size of its most selective word, not of the catalog.
+
+    Books are numbered in the order they were added, and posting lists hold
+    these numbers. A saved index stores each posting list as packed integers
+    (number << 4 | weight), which is unpacked the first time a query uses it,
+    so loading does not rebuild anything.
+    """
+
+    FIELD_WEIGHTS = {"title": 2, "author": 1}
+    PREFIX_QUALITY = 0.6
+    FUZZY_QUALITY = 0.4
+    MAX_EXPANSIONS = 50         # Words tried per prefix
+    MIN_PREFIX_LENGTH = 2
+    MIN_FUZZY_LENGTH = 4        # Shorter words have too many one-typo neighbours
+    WEIGHT_BITS = 4
+    VERSION = 1
+
+    def __init__(self, books=()):
+        self._ids = []          # position -> book_id
+        self._positions = {}    # book_id -> position
+        self._postings = {}     # word -> {position: weight}, or packed ints until first used
+        self._vocabulary = []   # sorted words, for prefix matching
+        self._deletes = None    # word minus one character -> words; built on first fuzzy query
+        for book in books:
+            self.add(book)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, book):
+        """Index a book's title and author words."""
+        if book.book_id in self._positions:
+            return
+        position = len(self._ids)
+        self._ids.append(book.book_id)
+        self._positions[book.book_id] = position
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for word in tokenize(getattr(book, field)):
+                if word in self._postings:
+                    postings = self._posting_list(word)
+                else:
+                    postings = self._postings[word] = {}
+                    self._add_word(word)
+                postings[position] = postings.get(position, 0) + weight
+
+    def _posting_list(self, word):
+        """Return a word's postings as a dict, unpacking a loaded list on first use."""
+        postings = self._postings[word]
+        if isinstance(postings, list):
+            mask = (1 << self.WEIGHT_BITS) - 1
+            postings = self._postings[word] = {packed >> self.WEIGHT_BITS: packed & mask
+                                               for packed in postings}
+        return postings
+
+    def _add_word(self, word):
+        bisect.insort(self._vocabulary, word)
+        if self._deletes is not None:
+            for variant in _deletions(word):
+                self._deletes.setdefault(variant, []).append(word)
+
+    def _fuzzy_matches(self, word):
+        if self._deletes is None:
+            self._deletes = {}
+            for known in self._postings:
+                for variant in _deletions(known):
+                    self._deletes.setdefault(variant, []).append(known)
+        variants = _deletions(word)
+        candidates = set(self._deletes.get(word, ()))               # a letter missing from word
+        for variant in variants:
+            if variant in self._postings:                           # an extra letter in word
+                candidates.add(variant)
+            candidates.update(self._deletes.get(variant, ()))       # a wrong or swapped letter
+        return [c for c in candidates if c != word and _within_one_edit(word, c)]
+
+    def _expand(self, word, prefix, fuzzy):
+        """Return the indexed words a query word matches, with their match quality."""
+        matches = {}
+        if word in self._postings:
+            matches[word] = 1.0
+        if prefix and len(word) >= self.MIN_PREFIX_LENGTH:
+            start = bisect.bisect_left(self._vocabulary, word)
+            for known in self._vocabulary[start:start + self.MAX_EXPANSIONS]:
+                if not known.startswith(word):
+                    break
+                matches.setdefault(known, self.PREFIX_QUALITY)
+        if fuzzy and len(word) >= self.MIN_FUZZY_LENGTH:
+            for known in self._fuzzy_matches(word):
+                matches.setdefault(known, self.FUZZY_QUALITY)
+        return matches
+
+    def search(self, query, page=1, per_page=10, prefix=True, fuzzy=True):
+        """
+        Find the books matching every word of the query.
+
+        Args:
+            query (str): Words to look for in titles and authors
+            page (int): 1-based page number
+            per_page (int): Results per page
+            prefix (bool): Whether query words also match longer words
+            fuzzy (bool): Whether query words also match words one typo away
+
+        Returns:
+            tuple[list[tuple[str, float]], int]: (book_id, score) for the requested
+                                                 page, best first, and the total
+                                                 number of matching books
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words or page < 1:
+            return [], 0
+        total_books = len(self._ids)
+        terms = []
+        for word in words:
+            matches = self._expand(word, prefix, fuzzy)
+            if not matches:
+                return [], 0
+            term = []
+            for known, quality in matches.items():
+                postings = self._posting_list(known)
+                term.append((postings, quality * math.log(1 + total_books / len(postings))))
+            terms.append(term)
+        terms.sort(key=lambda term: sum(len(postings) for postings, _ in term))
+
+        scores = {}
+        for postings, factor in terms[0]:
+            for position, weight in postings.items():
+                if weight * factor > scores.get(position, 0):
+                    scores[position] = weight * factor
+        for term in terms[1:]:
+            narrowed = {}
+            for position, score in scores.items():
+                best = max(postings.get(position, 0) * factor for postings, factor in term)
+                if best:
+                    narrowed[position] = score + best
+            scores = narrowed
+
+        top = heapq.nsmallest(page * per_page, scores.items(), key=lambda item: (-item[1], item[0]))
+        return ([(self._ids[position], round(score, 4)) for position, score in top[(page - 1) * per_page:]],
+                len(scores))
+
+    def save(self, filename, fingerprint):
+        """Write the index to a JSON file, tagged with the catalog's fingerprint."""
+        limit = (1 << self.WEIGHT_BITS) - 1
+        packed = {}
+        for word, postings in self._postings.items():
+            if isinstance(postings, dict):
+                postings = [position << self.WEIGHT_BITS | min(weight, limit)
+                            for position, weight in postings.items()]
+            packed[word] = postings
+        temp = f"{filename}.tmp"
+        with open(temp, "w") as f:
+            json.dump({"version": self.VERSION, "fingerprint": fingerprint, "ids": self._ids,
+                       "postings": packed}, f, separators=(",", ":"))
+        os.replace(temp, filename)
+
+    @classmethod
+    def load(cls, filename, fingerprint):
+        """
+        Read an index saved by save().
+
+        Returns:
+            SearchIndex | None: None if the file is missing, unreadable or was
+                                saved for a different catalog
+        """
+        try:
+            with open(filename, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != cls.VERSION or data.get("fingerprint") != fingerprint:
+            return None
+        index = cls()
+        index._ids = data["ids"]
+        index._positions = {book_id: position for position, book_id in enumerate(index._ids)}
+        index._postings = data["postings"]
+        index._vocabulary = sorted(index._postings)
+        return index
+
+
+class JSONStorage:
+    """
+    Stores the catalog as a JSON list in one file, one book per line.
+
+    Every change rewrites the whole file. The new file is written next to the
+    old one and swapped in with os.replace, so a crash can never leave a
+    half-written library.json behind.
+    """
+
+    def __init__(self, filename="library.json"):
+        self.filename = filename
+        self.catalog = None
+
+    def load(self):
+        """Return the stored books as a Catalog."""
+        self.catalog = Catalog()
+        if os.path.exists(self.filename):
+            with open(self.filename, "r") as f:
+                for record in iter_json_records(f):
+                    try:
+                        self.catalog.add(Book.from_dict(record))
+                    except ValueError as e:
+                        # Older versions allowed duplicate IDs; only the first one is kept
+                        print(f"⚠️ Skipped book: {e}")
+        return self.catalog
+
+    def save_all(self, books):
+        """Write every book to the file."""
+        temp = f"{self.filename}.tmp"
+        with open(temp, "w") as f:
+            f.write("[")
+            separator = "\n"
+            for b in books:
+                f.write(separator)
+                f.write(json.dumps(b.to_dict()))
+                separator = ",\n"
+            f.write("\n]\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.filename)
+
+    def add(self, book):
+        """Store a book that was just added to the catalog."""
+        self.save_all(self.catalog)
+
+    def set_available(self, book_id, available):
+        """
+        Store a book's new availability (already set in the catalog).
+
+        Returns:
+            bool: Always True; a single process owns the JSON file
+        """
+        self.save_all(self.catalog)
+        return True
+
+    def close(self):
+        pass
+
+
+class JournaledJSONStorage(JSONStorage):
+    """
+    JSON storage that appends changes to a journal instead of rewriting the file.
+
+    Each add, borrow or return appends one compact JSON line to
+    `<filename>.journal`, so the cost does not depend on the catalog size.
+    Loading replays the journal onto library.json. Once the journal grows past
+    `compact_bytes`, it is compacted: the catalog is written to library.json
+    and the journal is emptied. library.json keeps its usual format, and is
+    complete as of the last compaction.
+
+    Replaying is idempotent, so a crash between writing library.json and
+    emptying the journal is harmless. A last line cut short by a crash is
+    cut off the journal, so later changes are appended after the last
+    complete entry.
+    """
+
+    COMPACT_BYTES = 1024 * 1024
+
+    def __init__(self, filename="library.json", compact_bytes=COMPACT_BYTES, fsync=True):
+        super().__init__(filename)
+        self.journal_filename = f"{filename}.journal"
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        self._journal = None
+
+    def load(self):
+        """
+        Return the books of library.json with the journal replayed onto them.
+
+        Raises:
+            ValueError: If a journal entry other than the last one is unreadable
+        """
+        catalog = super().load()
+        if os.path.exists(self.journal_filename):
+            complete = 0                # Bytes up to the end of the last good entry
+            with open(self.journal_filename, "rb") as f:
+                for number, line in enumerate(f, 1):
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        if f.read(1):
+                            raise ValueError(f"{self.journal_filename}: unreadable entry on "
+                                             f"line {number}") from None
+                        print("⚠️ Dropped an incomplete journal entry")
+                        break
+                    self._replay(catalog, entry)
+                    complete += len(line)
+            if complete < os.path.getsize(self.journal_filename):
+                os.truncate(self.journal_filename, complete)
+        self._journal = open(self.journal_filename, "a")
+        if self._journal.tell() > self.compact_bytes:
+            self.compact()
+        return catalog
+
+    @staticmethod
+    def _replay(catalog, entry):
+        if entry["op"] == "add":
+            if entry["book"]["book_id"] not in catalog:
+                catalog.add(Book.from_dict(entry["book"]))
+        elif entry["book_id"] in catalog:
+            catalog.set_available(entry["book_id"], entry["op"] == "return")
+
+    def _append(self, entry):
+        self._journal.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        if self._journal.tell() > self.compact_bytes:
+            self.compact()
+
+    def add(self, book):
+        """Append the new book to the journal."""
+        self._append({"op": "add", "book": book.to_dict()})
+
+    def set_available(self, book_id, available):
+        """
+        Append the borrow or return to the journal.
+
+        Returns:
+            bool: Always True; a single process owns the JSON file
+        """
+        self._append({"op": "return" if available else "borrow", "book_id": book_id})
+        return True
+
+    def save_all(self, books):
+        """Write every book to library.json and empty the journal."""
+        super().save_all(books)
+        if self._journal is not None:
+            self._journal.truncate(0)
+            self._journal.seek(0)
+
+    def compact(self):
+        """Fold the journal into library.json."""
+        self.save_all(self.catalog)
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class SQLiteStorage:
+    """
+    Stores the catalog in an SQLite database in WAL mode.
+
+    Adding a book inserts one row, and borrowing or returning one updates one
+    row. Each of these is a transaction of its own, so a crash loses at most
+    the change in progress and never corrupts the catalog. Borrow and return
+    only change the row if the book is in the expected state, so two
+    processes sharing the database cannot lend the same copy twice.
+    """
+
+    def __init__(self, filename="library.db"):
+        self.filename = filename
+        self.db = sqlite3.connect(filename, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        # seq keeps the order in which books were added
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS books ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, book_id TEXT NOT NULL UNIQUE,"
+            " title TEXT NOT NULL, author TEXT NOT NULL, available INTEGER NOT NULL DEFAULT 1)"
+        )
+
+    def load(self):
+        """Return the stored books as a Catalog."""
+        rows = self.db.execute("SELECT book_id, title, author, available FROM books ORDER BY seq")
+        return Catalog(Book(book_id, title, author, bool(available))
+                       for book_id, title, author, available in rows)
+
+    def save_all(self, books):
+        """Insert or update every book in one transaction."""
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "INSERT INTO books (book_id, title, author, available) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (book_id) DO UPDATE SET title = excluded.title, "
+                "author = excluded.author, available = excluded.available",
+                ((b.book_id, b.title, b.author, int(b.available)) for b in books))
+
+    def add(self, book):
+        """Insert one book."""
+        self.db.execute("INSERT INTO books (book_id, title, author, available) VALUES (?, ?, ?, ?)",
+                        (book.book_id, book.title, book.author, int(book.available)))
+
+    def set_available(self, book_id, available):
+        """
+        Borrow (available=False) or return (available=True) a book.
+
+        Returns:
+            bool: False if the stored book was not in the opposite state, e.g.
+                  another process borrowed it first
+        """
+        cursor = self.db.execute("UPDATE books SET available = ? WHERE book_id = ? AND available = ?",
+                                 (int(available), book_id, int(not available)))
+        return cursor.rowcount == 1
+
+    def import_json(self, json_filename):
+        """
+        Copy the books of a library.json file into the database, keeping their
+        order. Books whose ID is already in the database are skipped.
+
+        Returns:
+            int: Number of books imported
+        """
+        before = self.db.total_changes
+        with open(json_filename, "r") as f, self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "INSERT OR IGNORE INTO books (book_id, title, author, available) VALUES (?, ?, ?, ?)",
+                ((b["book_id"], b["title"], b["author"], int(b.get("available", True)))
+                 for b in iter_json_records(f)))
+        return self.db.total_changes - before
+
+    def close(self):
+        self.db.close()
+
+
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+class Library:
+    """Manages the collection of books and user interactions."""
+
+    def __init__(self, filename="library.json", storage=None):
+        """
+        Args:
+            filename (str): Data file; .db/.sqlite/.sqlite3 files use SQLite storage
+            storage: Storage backend to use instead of one chosen from filename
+        """
+        if storage is None:
+            if filename.lower().endswith(SQLITE_EXTENSIONS):
+                storage = SQLiteStorage(filename)
+            else:
+                storage = JSONStorage(filename)
+        self.filename = storage.filename
+        self.storage = storage
+        self.books = self.load_books()
+        self.index_filename = f"{self.filename}.index"
+        self._index = None
+        self._index_dirty = False
+
+    @property
+    def index(self):
+        """The search index, loaded (or rebuilt if stale) on the first search."""
+        if self._index is None:
+            self._index = SearchIndex.load(self.index_filename, self._fingerprint())
+            if self._index is None:
+                self._index = SearchIndex(self.books)
+                self._index_dirty = True
+        return self._index
+
+    def load_books(self):
+        """Load books from the storage backend."""
+        return self.storage.load()
+
+    def save_books(self):
+        """Save all books to the storage backend."""
+        self.storage.save_all(self.books)
+
+    def _fingerprint(self):
+        """Identifies the catalog contents a saved search index belongs to."""
+        last = self.books.last()
+        return f"{len(self.books)}:{last.book_id if last else ''}"
+
+    def close(self):
+        """Save the search index if it changed and close the storage backend."""
+        if self._index_dirty:
+            self._index.save(self.index_filename, self._fingerprint())
+            self._index_dirty = False
+        self.storage.close()
+
+    def add_book(self, book_id=None, title=None, author=None):
+        """Add a new book to the library (asks for any detail not given)."""
+        book_id = input("Enter Book ID: ") if book_id is None else book_id
+        if book_id in self.books:
+            print(f"⚠️ Book ID '{book_id}' already exists!")
+            return
+        title = input("Enter Book Title: ") if title is None else title
+        author = input("Enter Author: ") if author is None else author
+        book = Book(book_id, title, author)
+        self.books.add(book)
+        try:
+            self.storage.add(book)
+        except sqlite3.IntegrityError:
+            # Another process stored a book with this ID since we loaded ours
+            self.books.remove(book_id)
+            print(f"⚠️ Book ID '{book_id}' already exists!")
+            return
+        except BaseException:
+            self.books.remove(book_id)
+            raise
+        if self._index is not None:
+            self._index.add(book)
+            self._index_dirty = True
+        print(f"✅ Book '{title}' added successfully!")
+
+    def view_books(self):
+        """Display all books in the library."""
+        print("\n📚 Library Books:")
+        if not self.books:
+            print("No books available in the library.")
+            return
+        for b in self.books:
+            status = "Available" if b.available else "Borrowed"
+            print(f"{b.book_id} | {b.title} | {b.author} | {status}")
+
+    def search(self, query, page=1, per_page=10):
+        """
+        Search titles and authors.
+
+        Returns:
+            tuple[list[Book], int]: The books on the requested page, best match
+                                    first, and the total number of matches
+        """
+        results, total = self.index.search(query, page, per_page)
+        return [self.books.get(book_id) for book_id, _ in results], total
+
+    def search_books(self, query=None, page=None, per_page=10):
+        """Search by title or author and display one page of results."""
+        query = input("Search title/author: ") if query is None else query
+        if page is None:
+            page = input("Page (default 1): ").strip()
+            page = int(page) if page.isdigit() and int(page) > 0 else 1
+        books, total = self.search(query, page, per_page)
+        pages = max(1, math.ceil(total / per_page))
+        print(f"\n🔎 {total} result(s) for '{query}' — page {page} of {pages}")
+        for b in books:
+            status = "Available" if b.available else "Borrowed"
+            print(f"{b.book_id} | {b.title} | {b.author} | {status}")
+
+    def borrow_book(self, book_id=None):
+        """Borrow a book by entering its ID."""
+        book_id = input("Enter Book ID to borrow: ") if book_id is None else book_id
+        b = self.books.get(book_id)
+        if b is not None and b.available and self._store_availability(book_id, False):
+            print(f"📖 You borrowed '{b.title}'")
+            return
+        print("⚠️ Book not available or invalid ID!")
+
+    def return_book(self, book_id=None):
+        """Return a borrowed book by entering its ID."""
+        book_id = input("Enter Book ID to return: ") if book_id is None else book_id
+        b = self.books.get(book_id)
+        if b is not None and not b.available and self._store_availability(book_id, True):
+            print(f"📘 You returned '{b.title}'")
+            return
+        print("⚠️ Invalid Book ID or book was not borrowed!")
+
+    def _store_availability(self, book_id, available):
+        """Update the catalog and the storage; undo the catalog change if storage refuses it."""
+        self.books.set_available(book_id, available)
+        if self.storage.set_available(book_id, available):
+            return True
+        self.books.set_available(book_id, not available)
+        return False
+
+
+# Test cases (interactive simulation)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Command-line library management system")
+    parser.add_argument("--db", help="Use an SQLite database instead of library.json")
+    parser.add_argument("--journal", action="store_true",
+                        help="Keep library.json, but append changes to a journal instead of "
+                             "rewriting the file every time")
+    parser.add_argument("--import-json", metavar="FILE",
+                        help="Copy the books of a library.json file into the --db database and exit")
+    args = parser.parse_args()
+
+    if args.import_json:
+        if not args.db:
+            parser.error("--import-json needs --db")
+        storage = SQLiteStorage(args.db)
+        print(f"✅ Imported {storage.import_json(args.import_json)} books into {args.db}")
+        storage.close()
+        raise SystemExit
+
+    if args.db:
+        library = Library(args.db)
+    elif args.journal:
+        library = Library(storage=JournaledJSONStorage())
+    else:
+        library = Library()
+
+    while True:
+        print("\n--- 📚 Library Management System ---")
+        print("1. Add Book")
+        print("2. View Books")
+        print("3. Borrow Book")
+        print("4. Return Book")
+        print("5. Search Books")
+        print("6. Exit")
+
+        choice = input("Enter your choice (1-6): ")
+
+        if choice == "1":
+            library.add_book()
+        elif choice == "2":
+            library.view_books()
+        elif choice == "3":
+            library.borrow_book()
+        elif choice == "4":
+            library.return_book()
+        elif choice == "5":
+            library.search_books()
+        elif choice == "6":
+            print("👋 Exiting... Thank you for using the Library System!")
+            library.close()
+            break
+        else:
+            print("⚠️ Invalid choice! Please enter a number between 1 and 6.")
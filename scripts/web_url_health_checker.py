@@ -12,27 +12,1027 @@ Date: October 2025
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+import asyncio
+import hashlib
+import heapq
+import itertools
+import math
+import os
+import random
+import signal
+import socket
+import struct
+import threading
 import time
+import zlib
 import json
 import csv
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Dict, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Tuple, Optional, Iterator, Iterable
+from urllib.parse import urlsplit, urlunsplit
 import sys
 import argparse
 
 
+def host_of(url: str) -> str:
+    """
+    Return the lower-cased host[:port] part of a URL, used to group checks per host.
+
+    Args:
+        url (str): The URL (with or without a scheme)
+
+    Returns:
+        str: The network location of the URL
+    """
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return urlsplit(url).netloc.lower()
+
+
+PHASE_FIELDS = ['dns_time', 'connect_time', 'tls_time', 'ttfb']
+RESULT_FIELDS = (['url', 'status', 'status_code', 'response_time', 'timestamp', 'error']
+                 + PHASE_FIELDS + ['attempts', 'circuit'])
+FSYNC_POLICIES = ('never', 'flush', 'always')
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+BINARY_MAGIC = b'UHC2'
+# status, status code, response time, the PHASE_FIELDS, timestamp, attempts,
+# circuit state, URL length, error length
+BINARY_HEADER = struct.Struct('<BHf4fIHBHH')
+BINARY_MAGIC_V1 = b'UHC1'
+BINARY_HEADER_V1 = struct.Struct('<BHfIHH')     # Before phases, attempts and circuit
+CIRCUIT_STATES = (None, 'closed', 'open', 'half-open')
+NO_ERROR = 0xFFFF
+
+
+# Phase timings and DNS cache of the check running in the current thread
+# (see TimedHTTPAdapter)
+_check_context = threading.local()
+
+
+def _start_phase_timer() -> Dict:
+    """
+    Start collecting connection phase timings for the current thread.
+
+    Returns:
+        Dict: Seconds spent in each phase, filled in while requests are made
+    """
+    _check_context.timings = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0, 'elapsed': 0.0}
+    return _check_context.timings
+
+
+def _current_phase_timer() -> Dict:
+    timings = getattr(_check_context, 'timings', None)
+    return timings if timings is not None else _start_phase_timer()
+
+
+class TimedConnectionMixin:
+    """
+    Resolves the host itself before connecting so DNS lookup and TCP connect
+    can be timed separately, going through the check's DNS cache when there
+    is one. Every address is tried in order, like socket.create_connection does.
+    """
+
+    def _new_conn(self):
+        timings = _current_phase_timer()
+        cache = getattr(_check_context, 'cache', None)
+        start = time.perf_counter()
+        try:
+            if cache is not None:
+                addresses = cache.resolve(self._dns_host, self.port)
+            else:
+                addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror:
+            # Let urllib3 resolve again and raise its usual error
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timings['dns'] += resolved - start
+
+        original_host = self._dns_host
+        try:
+            for index, (*_, sockaddr) in enumerate(addresses):
+                self._dns_host = sockaddr[0]
+                try:
+                    sock = super()._new_conn()
+                    break
+                except ConnectTimeoutError:
+                    if index == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = original_host
+            timings['connect'] += time.perf_counter() - resolved
+        return sock
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        timings = _current_phase_timer()
+        setup_before = timings['dns'] + timings['connect']
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            # Whatever connect() spent beyond DNS + TCP connect is the TLS handshake
+            setup = timings['dns'] + timings['connect'] - setup_before
+            timings['tls'] += max(0.0, time.perf_counter() - start - setup)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections record DNS, connect and TLS timings."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+class CheckCache:
+    """
+    Cache shared by repeated sweeps over the same URLs.
+
+    It holds two kinds of entries, each limited to `max_entries` with
+    least-recently-used eviction:
+      - DNS answers, reused for `dns_ttl` seconds. getaddrinfo() does not
+        report record TTLs, so this is an upper bound that should be kept
+        below the TTLs of the monitored zones.
+      - ETag / Last-Modified validators per URL, sent back as If-None-Match /
+        If-Modified-Since so unchanged pages answer with a bodiless 304.
+    When a filename is given the cache is loaded from it on creation and
+    written back by save(), so consecutive runs of the script start warm.
+    """
+
+    def __init__(self, filename: Optional[str] = None, dns_ttl: float = 60,
+                 max_entries: int = 10000):
+        """
+        Args:
+            filename (str): JSON file the cache persists to (default: memory only)
+            dns_ttl (float): Seconds a DNS answer is reused (default: 60)
+            max_entries (int): Maximum entries per kind before eviction (default: 10000)
+        """
+        self.filename = filename
+        self.dns_ttl = dns_ttl
+        self.max_entries = max_entries
+        self.dns = OrderedDict()
+        self.validators = OrderedDict()
+        self._lock = threading.Lock()
+        if filename and os.path.exists(filename):
+            self.load()
+
+    def resolve(self, host: str, port: int) -> List[Tuple]:
+        """
+        Resolve a host like socket.getaddrinfo (TCP only), using cached answers.
+
+        Args:
+            host (str): Host name or address
+            port (int): Port number
+
+        Returns:
+            List[Tuple]: getaddrinfo-style address tuples
+        """
+        key = f'{host}:{port}'
+        now = time.time()
+        with self._lock:
+            entry = self.dns.get(key)
+            if entry is not None and entry[0] > now:
+                self.dns.move_to_end(key)
+                return entry[1]
+
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        with self._lock:
+            self._put(self.dns, key, (now + self.dns_ttl, addresses))
+        return addresses
+
+    def request_headers(self, url: str) -> Dict:
+        """
+        Conditional request headers for a URL (empty if nothing is cached).
+
+        Args:
+            url (str): The URL about to be requested
+
+        Returns:
+            Dict: If-None-Match / If-Modified-Since headers
+        """
+        with self._lock:
+            entry = self.validators.get(url)
+            if entry is None:
+                return {}
+            self.validators.move_to_end(url)
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def remember(self, url: str, response: requests.Response):
+        """
+        Store the validators of a successful response.
+
+        Args:
+            url (str): The requested URL
+            response (requests.Response): Its final response
+        """
+        if response.status_code != 200:
+            return
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            with self._lock:
+                self._put(self.validators, url, {'etag': etag, 'last_modified': last_modified})
+
+    def _put(self, entries: OrderedDict, key: str, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def to_dict(self) -> Dict:
+        """
+        Return the cache contents in their JSON form.
+        """
+        now = time.time()
+        with self._lock:
+            return {
+                'dns': {key: [expires, [list(a[:4]) + [list(a[4])] for a in addresses]]
+                        for key, (expires, addresses) in self.dns.items() if expires > now},
+                'validators': dict(self.validators),
+            }
+
+    def update(self, data: Dict):
+        """
+        Merge cache contents in their JSON form (from a file or a worker process).
+
+        Args:
+            data (Dict): Contents as returned by to_dict()
+        """
+        now = time.time()
+        with self._lock:
+            for key, (expires, addresses) in data.get('dns', {}).items():
+                if expires > now:
+                    self._put(self.dns, key, (expires, [tuple(a[:4]) + (tuple(a[4]),)
+                                                        for a in addresses]))
+            for url, entry in data.get('validators', {}).items():
+                self._put(self.validators, url, entry)
+
+    def load(self):
+        """
+        Load the cache file, ignoring it if it is unreadable.
+        """
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                self.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"⚠ Ignoring unreadable cache file {self.filename}: {e}")
+
+    def save(self):
+        """
+        Write the cache file atomically (no-op for memory-only caches).
+        """
+        if not self.filename:
+            return
+        temp_name = f'{self.filename}.tmp'
+        with open(temp_name, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temp_name, self.filename)
+
+
+class LatencyHistogram:
+    """
+    Fixed-memory latency histogram with logarithmic buckets (HDR style).
+
+    Every bucket is 1% wider than the previous one, so percentiles have at
+    most ~1% relative error and the number of buckets stays bounded (about
+    2,300 between 1 microsecond and 3 hours) however many values are recorded.
+    Histograms merge by adding bucket counts.
+    """
+
+    PRECISION = 0.01
+    MIN_VALUE = 0.001
+    _LOG_BASE = math.log1p(PRECISION)
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.count = 0
+        self.max = 0.0
+
+    def record(self, value: float):
+        """
+        Record one value (in milliseconds).
+
+        Args:
+            value (float): The value to record
+        """
+        index = math.floor(math.log(max(value, self.MIN_VALUE)) / self._LOG_BASE)
+        self.counts[index] += 1
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'LatencyHistogram'):
+        """
+        Add all values recorded by another histogram.
+
+        Args:
+            other (LatencyHistogram): Histogram to merge into this one
+        """
+        for index, count in other.counts.items():
+            self.counts[index] += count
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Return the value at the given percentile.
+
+        Args:
+            percent (float): Percentile between 0 and 100
+
+        Returns:
+            float: Upper edge of the bucket holding the percentile (0 if empty)
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(math.exp((index + 1) * self._LOG_BASE), self.max)
+        return self.max
+
+
+class ResultStats:
+    """Running aggregates over check results, so summaries never re-walk a result list."""
+
+    def __init__(self, per_url: bool = False):
+        """
+        Args:
+            per_url (bool): Also keep a latency histogram per URL (default: False)
+        """
+        self.total = 0
+        self.up = 0
+        self.response_time_sum = 0.0
+        self.response_time_count = 0
+        self.latency = {field: LatencyHistogram() for field in ['response_time'] + PHASE_FIELDS}
+        self.per_url = defaultdict(LatencyHistogram) if per_url else None
+
+    @property
+    def down(self) -> int:
+        return self.total - self.up
+
+    def add(self, result: Dict):
+        """
+        Fold one result into the aggregates.
+
+        Args:
+            result (Dict): A result dictionary returned by check_url
+        """
+        self.total += 1
+        if result['status'] == 'UP':
+            self.up += 1
+        self.add_latency(result)
+
+    def add_latency(self, result: Dict):
+        """
+        Fold only the timings of a result into the latency aggregates.
+
+        Args:
+            result (Dict): A result dictionary returned by check_url
+        """
+        if result['response_time']:
+            self.response_time_sum += result['response_time']
+            self.response_time_count += 1
+            if self.per_url is not None:
+                self.per_url[result['url']].record(result['response_time'])
+        for field, histogram in self.latency.items():
+            if result.get(field) is not None:
+                histogram.record(result[field])
+
+    def merge(self, other: 'ResultStats'):
+        """
+        Add the aggregates of another ResultStats (e.g. from a worker process).
+
+        Args:
+            other (ResultStats): Aggregates to merge into these
+        """
+        self.total += other.total
+        self.up += other.up
+        self.response_time_sum += other.response_time_sum
+        self.response_time_count += other.response_time_count
+        for field, histogram in other.latency.items():
+            self.latency[field].merge(histogram)
+        if self.per_url is not None and other.per_url:
+            for url, histogram in other.per_url.items():
+                self.per_url[url].merge(histogram)
+
+    @classmethod
+    def from_results(cls, results: List[Dict], per_url: bool = False) -> 'ResultStats':
+        """
+        Build aggregates from an existing list of results.
+
+        Args:
+            results (List[Dict]): Result dictionaries
+            per_url (bool): Also keep a latency histogram per URL (default: False)
+
+        Returns:
+            ResultStats: Aggregates over the given results
+        """
+        stats = cls(per_url)
+        for result in results:
+            stats.add(result)
+        return stats
+
+
+class ResultSink:
+    """
+    Base class for append-only result files written while checks are running.
+
+    Results are buffered in memory and written once `buffer_size` of them are
+    pending (a buffer_size of 1 writes every result immediately). The fsync
+    policy decides how durable the writes are:
+      - 'never':  leave flushing to the operating system
+      - 'flush':  fsync after every buffer flush
+      - 'always': flush and fsync after every single result
+    """
+
+    mode = 'a'
+
+    def __init__(self, filename: str, buffer_size: int = 1, fsync: str = 'flush'):
+        """
+        Open the sink for appending.
+
+        Args:
+            filename (str): Output filename
+            buffer_size (int): Results kept in memory before they are written (default: 1)
+            fsync (str): One of FSYNC_POLICIES (default: 'flush')
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+
+        self.filename = filename
+        self.buffer_size = max(1, buffer_size)
+        self.fsync = fsync
+        self._buffer = []
+        self._file = open(filename, self.mode, **self._open_kwargs())
+        self._is_new = self._file.tell() == 0
+
+    def _open_kwargs(self) -> Dict:
+        return {'encoding': 'utf-8'}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, result: Dict):
+        """
+        Queue a result and write the buffer when it is full.
+
+        Args:
+            result (Dict): A result dictionary returned by check_url
+        """
+        self._buffer.append(result)
+        if len(self._buffer) >= self.buffer_size or self.fsync == 'always':
+            self.flush()
+
+    def flush(self):
+        """
+        Write all buffered results and apply the fsync policy.
+        """
+        if self._buffer:
+            self._write_records(self._buffer)
+            self._buffer = []
+        self._file.flush()
+        if self.fsync != 'never':
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """
+        Flush pending results and close the file.
+        """
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def _write_records(self, results: List[Dict]):
+        raise NotImplementedError
+
+
+class NDJSONSink(ResultSink):
+    """Writes one JSON object per line (newline-delimited JSON)."""
+
+    def _write_records(self, results: List[Dict]):
+        self._file.write(''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in results))
+
+
+class CSVSink(ResultSink):
+    """Appends CSV rows, writing the header only when the file is new."""
+
+    def __init__(self, filename: str, buffer_size: int = 1, fsync: str = 'flush'):
+        super().__init__(filename, buffer_size, fsync)
+        self._writer = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+        if self._is_new:
+            self._writer.writeheader()
+
+    def _open_kwargs(self) -> Dict:
+        return {'encoding': 'utf-8', 'newline': ''}
+
+    def _write_records(self, results: List[Dict]):
+        self._writer.writerows(results)
+
+
+class BinarySink(ResultSink):
+    """
+    Compact binary records, roughly a third of the size of the NDJSON output.
+
+    The file starts with BINARY_MAGIC, followed by one record per result:
+    a fixed header (status, status code, response time, phase timings,
+    timestamp, attempts, circuit state, URL length, error length) and then the
+    UTF-8 URL and error bytes, so every field of RESULT_FIELDS is kept.
+    Timings are stored as 32-bit floats and read back rounded to 0.01 ms.
+    URLs and errors longer than 65534 bytes are cut at a character boundary.
+    Read it back with read_binary_results(), which also reads the older
+    UHC1 files (without phases, attempts and circuit).
+    """
+
+    mode = 'ab'
+
+    def __init__(self, filename: str, buffer_size: int = 1, fsync: str = 'flush'):
+        if os.path.exists(filename) and os.path.getsize(filename):
+            with open(filename, 'rb') as f:
+                if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+                    raise ValueError(f"{filename} was written in another binary format; "
+                                     f"stream to a new file")
+        super().__init__(filename, buffer_size, fsync)
+        if self._is_new:
+            self._file.write(BINARY_MAGIC)
+
+    def _open_kwargs(self) -> Dict:
+        return {}
+
+    def _write_records(self, results: List[Dict]):
+        self._file.write(b''.join(pack_result(r) for r in results))
+
+
+def pack_result(result: Dict) -> bytes:
+    """
+    Encode a result dictionary as a BinarySink record.
+
+    Args:
+        result (Dict): A result dictionary returned by check_url
+
+    Returns:
+        bytes: The encoded record
+    """
+    url = _encode_truncated(result['url'], 0xFFFE)
+    error = _encode_truncated(result['error'], 0xFFFE) if result['error'] is not None else b''
+    timings = [result.get(field) for field in ['response_time'] + PHASE_FIELDS]
+    timestamp = int(datetime.strptime(result['timestamp'], TIMESTAMP_FORMAT).timestamp())
+    header = BINARY_HEADER.pack(1 if result['status'] == 'UP' else 0,
+                                result['status_code'] or 0,
+                                *(math.nan if value is None else value for value in timings),
+                                timestamp,
+                                result.get('attempts') or 0,
+                                CIRCUIT_STATES.index(result.get('circuit')),
+                                len(url),
+                                len(error) if result['error'] is not None else NO_ERROR)
+    return header + url + error
+
+
+def _encode_truncated(text: str, limit: int) -> bytes:
+    """
+    UTF-8 encode text, cut to at most `limit` bytes without splitting a character.
+    """
+    encoded = text.encode('utf-8')
+    if len(encoded) <= limit:
+        return encoded
+    return encoded[:limit].decode('utf-8', 'ignore').encode('utf-8')
+
+
+def _timing(value: float) -> Optional[float]:
+    return None if math.isnan(value) else round(value, 2)
+
+
+def read_binary_results(filename: str) -> Iterator[Dict]:
+    """
+    Read the records of a BinarySink file back as result dictionaries.
+
+    Args:
+        filename (str): Path of the binary results file
+
+    Yields:
+        Dict: One result dictionary per record
+    """
+    with open(filename, 'rb') as f:
+        magic = f.read(len(BINARY_MAGIC))
+        if magic not in (BINARY_MAGIC, BINARY_MAGIC_V1):
+            raise ValueError(f"{filename} is not a URL health checker binary file")
+        struct_ = BINARY_HEADER if magic == BINARY_MAGIC else BINARY_HEADER_V1
+
+        while True:
+            header = f.read(struct_.size)
+            if len(header) < struct_.size:
+                return
+            if magic == BINARY_MAGIC:
+                (status, status_code, response_time, *phases, timestamp, attempts, circuit,
+                 url_len, error_len) = struct_.unpack(header)
+            else:
+                status, status_code, response_time, timestamp, url_len, error_len = \
+                    struct_.unpack(header)
+                phases, attempts, circuit = [math.nan] * len(PHASE_FIELDS), 0, 0
+            url = f.read(url_len).decode('utf-8')
+            error = f.read(error_len).decode('utf-8') if error_len != NO_ERROR else None
+            result = {
+                'url': url,
+                'status': 'UP' if status else 'DOWN',
+                'status_code': status_code or None,
+                'response_time': _timing(response_time),
+                'timestamp': datetime.fromtimestamp(timestamp).strftime(TIMESTAMP_FORMAT),
+                'error': error,
+            }
+            result.update(zip(PHASE_FIELDS, map(_timing, phases)))
+            result['attempts'] = attempts or None
+            result['circuit'] = CIRCUIT_STATES[circuit]
+            yield result
+
+
+SINK_TYPES = {'ndjson': NDJSONSink, 'csv': CSVSink, 'binary': BinarySink}
+SINK_EXTENSIONS = {'ndjson': 'ndjson', 'csv': 'stream.csv', 'binary': 'bin'}
+
+
+class MetricsExporter:
+    """
+    Prometheus / OpenMetrics text exporter for check results.
+
+    Every result updates small per-URL aggregates as it arrives (observe()),
+    so a scrape only formats that pre-aggregated state and never walks the
+    result list. The lock is held just long enough to copy the state, which
+    keeps scrapes from stalling the checks. start() serves the metrics from a
+    background thread using only the standard library.
+
+    Exposed metrics (all labelled with url):
+      - url_health_up: 1 if the last check was UP, else 0
+      - url_health_status_code: HTTP status code of the last check (0 if none)
+      - url_health_last_check_timestamp_seconds: Unix time of the last check
+      - url_health_checks_total: Checks done, also labelled with status
+      - url_health_response_seconds: Histogram of response times
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._urls = {}
+        self._server = None
+        self._thread = None
+
+    def observe(self, result: Dict):
+        """
+        Fold one result into the exported metrics.
+
+        Args:
+            result (Dict): A result dictionary returned by check_url
+        """
+        with self._lock:
+            state = self._urls.get(result['url'])
+            if state is None:
+                state = self._urls[result['url']] = {
+                    'up': 0, 'status_code': 0, 'timestamp': 0.0,
+                    'checks': {'UP': 0, 'DOWN': 0},
+                    'buckets': [0] * len(self.BUCKETS), 'sum': 0.0, 'count': 0,
+                }
+            state['up'] = 1 if result['status'] == 'UP' else 0
+            state['status_code'] = result['status_code'] or 0
+            state['timestamp'] = time.time()
+            state['checks'][result['status']] += 1
+
+            if result['response_time'] is not None:
+                seconds = result['response_time'] / 1000
+                for i, bound in enumerate(self.BUCKETS):
+                    if seconds <= bound:
+                        state['buckets'][i] += 1
+                state['sum'] += seconds
+                state['count'] += 1
+
+    def render(self) -> str:
+        """
+        Format the current metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page
+        """
+        with self._lock:
+            snapshot = [(url, dict(state, checks=dict(state['checks']),
+                                   buckets=list(state['buckets'])))
+                        for url, state in self._urls.items()]
+
+        lines = [
+            '# HELP url_health_up Whether the last check of the URL was UP.',
+            '# TYPE url_health_up gauge',
+        ]
+        lines += [f'url_health_up{{url="{_escape_label(url)}"}} {state["up"]}'
+                  for url, state in snapshot]
+        lines += [
+            '# HELP url_health_status_code HTTP status code of the last check (0 if none).',
+            '# TYPE url_health_status_code gauge',
+        ]
+        lines += [f'url_health_status_code{{url="{_escape_label(url)}"}} {state["status_code"]}'
+                  for url, state in snapshot]
+        lines += [
+            '# HELP url_health_last_check_timestamp_seconds Unix time of the last check.',
+            '# TYPE url_health_last_check_timestamp_seconds gauge',
+        ]
+        lines += [f'url_health_last_check_timestamp_seconds{{url="{_escape_label(url)}"}} '
+                  f'{state["timestamp"]:.3f}' for url, state in snapshot]
+        lines += [
+            '# HELP url_health_checks_total Number of checks done, by result.',
+            '# TYPE url_health_checks_total counter',
+        ]
+        for url, state in snapshot:
+            for status, count in state['checks'].items():
+                lines.append(f'url_health_checks_total{{url="{_escape_label(url)}",'
+                             f'status="{status}"}} {count}')
+        lines += [
+            '# HELP url_health_response_seconds Response time of the checks.',
+            '# TYPE url_health_response_seconds histogram',
+        ]
+        for url, state in snapshot:
+            label = _escape_label(url)
+            for bound, count in zip(self.BUCKETS, state['buckets']):
+                lines.append(f'url_health_response_seconds_bucket{{url="{label}",le="{bound}"}} {count}')
+            lines.append(f'url_health_response_seconds_bucket{{url="{label}",le="+Inf"}} {state["count"]}')
+            lines.append(f'url_health_response_seconds_sum{{url="{label}"}} {state["sum"]:.6f}')
+            lines.append(f'url_health_response_seconds_count{{url="{label}"}} {state["count"]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def start(self, port: int = 9115, host: str = '127.0.0.1') -> int:
+        """
+        Serve the metrics at http://host:port/metrics from a background thread.
+
+        Args:
+            port (int): Port to listen on; 0 picks a free port (default: 9115)
+            host (str): Address to bind (default: '127.0.0.1')
+
+        Returns:
+            int: The port actually listened on
+        """
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', MetricsExporter.CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='metrics-exporter', daemon=True)
+        self._thread.start()
+        return self._server.server_address[1]
+
+    def stop(self):
+        """
+        Stop serving metrics.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _escape_label(value: str) -> str:
+    """
+    Escape a Prometheus label value.
+    """
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+PROBE_STRATEGIES = ('get', 'head')
+CIRCUIT_OPEN_ERROR = 'Circuit open'
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and checks
+    against the host are short-circuited to DOWN without any network traffic.
+    Once `reset_timeout` seconds have passed it becomes half-open: a single
+    probe check is let through, which closes the circuit on success or opens
+    it again on failure.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit (default: 5)
+            reset_timeout (float): Seconds the circuit stays open before a probe (default: 30)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Decide whether a check may be sent to the host right now.
+
+        Returns:
+            bool: True if the check may go ahead, False to short-circuit it
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
 class URLHealthChecker:
     """A class to check the health status of URLs."""
 
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, concurrency: int = 1, per_host_limit: int = 4,
+                 use_session: bool = False, probe: str = 'get',
+                 sinks: Optional[List[ResultSink]] = None, keep_results: bool = True,
+                 per_url_stats: bool = False, retries: int = 0, backoff: float = 0.5,
+                 backoff_max: float = 10, breaker_threshold: int = 0,
+                 breaker_reset: float = 30, workers: int = 1,
+                 metrics: Optional[MetricsExporter] = None,
+                 cache: Optional[CheckCache] = None):
+        """
+        Initialize the URL Health Checker.
+
+        Args:
+            timeout (int): Request timeout in seconds (default: 10)
+            concurrency (int): Maximum number of URLs checked at once; 1 checks
+                               URLs one after another (default: 1)
+            per_host_limit (int): Maximum number of concurrent checks against
+                                  a single host (default: 4)
+            use_session (bool): Keep one pooled keep-alive session for the lifetime
+                                of the checker instead of a new connection per
+                                check; call close() when done. When off, the
+                                concurrent and sharded engines and the monitor
+                                also open a new connection per check (default: False)
+            probe (str): 'get' downloads the page with a plain GET; 'head' sends
+                         HEAD first and falls back to a streamed GET that stops
+                         after the headers, never reading the body (default: 'get')
+            sinks (List[ResultSink]): Result files written as soon as each check
+                                      finishes; closed by close() (default: none)
+            keep_results (bool): Keep every result in self.results; turn off for
+                                 huge runs that only stream to sinks (default: True)
+            per_url_stats (bool): Keep a latency histogram per URL for the
+                                  summary (default: False)
+            retries (int): Extra attempts after a network error, 429 or 5xx
+                           response (default: 0)
+            backoff (float): Base delay in seconds of the exponential backoff
+                             between attempts; the actual delay is jittered (default: 0.5)
+            backoff_max (float): Upper bound of a single backoff delay (default: 10)
+            breaker_threshold (int): Consecutive failures that open a host's
+                                     circuit breaker; 0 disables it (default: 0)
+            breaker_reset (float): Seconds an open circuit waits before a
+                                   half-open probe (default: 30)
+            workers (int): Number of processes check_urls shards the URLs
+                           over, by host; 1 checks in this process (default: 1)
+            metrics (MetricsExporter): Exporter updated with every result (default: none)
+            cache (CheckCache): DNS and conditional-request cache; saved by
+                                close() (default: none)
+        """
+        if probe not in PROBE_STRATEGIES:
+            raise ValueError(f"probe must be one of {PROBE_STRATEGIES}, got {probe!r}")
+
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self.probe = probe
+        self.use_session = use_session
+        self.session = self._build_session() if use_session else None
+        self.sinks = list(sinks or [])
+        self.keep_results = keep_results
+        self.per_url_stats = per_url_stats
+        self.stats = ResultStats(per_url_stats)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.breakers = {}
+        self._breakers_lock = threading.Lock()
+        self.workers = max(1, workers)
+        self.metrics = metrics
+        self.cache = cache
+        self.results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
         """
-        Initialize the URL Health Checker.
+        Close the pooled session (if any) and all result sinks, and save the cache.
+        """
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+        for sink in self.sinks:
+            sink.close()
+        if self.cache is not None:
+            self.cache.save()
+
+    def _handle_result(self, result: Dict):
+        """
+        Update the running aggregates and publish a finished result.
 
         Args:
-            timeout (int): Request timeout in seconds (default: 10)
+            result (Dict): A result dictionary returned by check_url
         """
-        self.timeout = timeout
-        self.results = []
+        self.stats.add(result)
+        self._publish(result)
+
+    def _publish(self, result: Dict):
+        """
+        Stream a finished result to the sinks and the metrics exporter.
+
+        Args:
+            result (Dict): A result dictionary returned by check_url
+        """
+        for sink in self.sinks:
+            sink.write(result)
+        if self.metrics is not None:
+            self.metrics.observe(result)
+
+    def _build_session(self) -> requests.Session:
+        """
+        Create a requests Session whose connection pool is sized for the
+        configured concurrency (one pool per host, per_host_limit connections each).
+
+        Returns:
+            requests.Session: The pooled session
+        """
+        session = requests.Session()
+        adapter = TimedHTTPAdapter(pool_connections=self.concurrency,
+                                   pool_maxsize=self.per_host_limit)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
 
     def check_url(self, url: str) -> Dict:
         """
@@ -46,28 +1046,65 @@ class URLHealthChecker:
                   - url: The checked URL
                   - status: 'UP' or 'DOWN'
                   - status_code: HTTP status code (or None if failed)
-                  - response_time: Response time in milliseconds
+                  - response_time: Total response time in milliseconds
                   - timestamp: Check timestamp
                   - error: Error message (if any)
+                  - dns_time, connect_time, tls_time: Milliseconds spent resolving,
+                    connecting and in the TLS handshake (0 on a reused connection)
+                  - ttfb: Milliseconds from sending the request to the first
+                    response byte, excluding connection setup
+                  - attempts: Number of attempts made (retries + 1 at most)
+                  - circuit: State of the host's circuit breaker after the
+                    check, or None when the breaker is disabled
+        """
+        attempt = 0
+        while True:
+            result = self._check_once(url, attempt)
+            if not self._should_retry(result, attempt):
+                return result
+            time.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+    def _check_once(self, url: str, attempt: int = 0) -> Dict:
+        """
+        Make a single check attempt, honouring the host's circuit breaker.
+
+        Args:
+            url (str): The URL to check
+            attempt (int): Zero-based attempt number
+
+        Returns:
+            Dict: Result dictionary, same keys as check_url
         """
         result = {
             'url': url,
             'status': 'DOWN',
             'status_code': None,
             'response_time': None,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'timestamp': datetime.now().strftime(TIMESTAMP_FORMAT),
             'error': None
         }
+        result.update(dict.fromkeys(PHASE_FIELDS))
+        result['attempts'] = attempt + 1
+        result['circuit'] = None
 
         # Ensure URL has a scheme
         if not url.startswith(('http://', 'https://')):
             url = 'https://' + url
             result['url'] = url
 
+        breaker = self._breaker_for(url)
+        if breaker is not None and not breaker.allow():
+            result['error'] = CIRCUIT_OPEN_ERROR
+            result['circuit'] = breaker.state
+            return result
+
         try:
-            start_time = time.time()
-            response = requests.get(url, timeout=self.timeout, allow_redirects=True)
-            end_time = time.time()
+            timings = _start_phase_timer()
+            _check_context.cache = self.cache
+            start_time = time.perf_counter()
+            response = self._probe(url)
+            end_time = time.perf_counter()
 
             # Calculate response time in milliseconds
             response_time = round((end_time - start_time) * 1000, 2)
@@ -75,6 +1112,12 @@ class URLHealthChecker:
             result['status_code'] = response.status_code
             result['response_time'] = response_time
 
+            setup = timings['dns'] + timings['connect'] + timings['tls']
+            result['dns_time'] = round(timings['dns'] * 1000, 2)
+            result['connect_time'] = round(timings['connect'] * 1000, 2)
+            result['tls_time'] = round(timings['tls'] * 1000, 2)
+            result['ttfb'] = round(max(0.0, timings['elapsed'] - setup) * 1000, 2)
+
             # Consider 2xx and 3xx status codes as UP
             if 200 <= response.status_code < 400:
                 result['status'] = 'UP'
@@ -93,41 +1136,332 @@ class URLHealthChecker:
         except Exception as e:
             result['error'] = f'Unexpected error: {str(e)}'
 
+        if breaker is not None:
+            if self._is_failure(result):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            result['circuit'] = breaker.state
+
         return result
 
-    def check_urls(self, urls: List[str]) -> List[Dict]:
+    def _breaker_for(self, url: str) -> Optional[CircuitBreaker]:
+        """
+        Return the circuit breaker of the URL's host (None if breakers are disabled).
+        """
+        if self.breaker_threshold <= 0:
+            return None
+        host = host_of(url)
+        with self._breakers_lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+                self.breakers[host] = breaker
+        return breaker
+
+    @staticmethod
+    def _is_failure(result: Dict) -> bool:
+        """
+        A check failed at the host level if nothing answered or the server
+        reported an error (5xx); 4xx answers mean the host itself is healthy.
+        """
+        return result['status_code'] is None or result['status_code'] >= 500
+
+    def _should_retry(self, result: Dict, attempt: int) -> bool:
+        if attempt >= self.retries or result['status'] == 'UP':
+            return False
+        if result['error'] == CIRCUIT_OPEN_ERROR:
+            return False
+        return self._is_failure(result) or result['status_code'] == 429
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """
+        Exponential backoff with full jitter: a random delay up to
+        backoff * 2 ** attempt, capped at backoff_max.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def _probe(self, url: str) -> requests.Response:
+        """
+        Send the request(s) used to decide whether a URL is up.
+
+        With the 'head' strategy a HEAD request is tried first. If the server
+        rejects it (status >= 400, e.g. 405 Method Not Allowed) a streamed GET
+        is sent instead and closed as soon as the headers arrive.
+
+        Args:
+            url (str): The URL to probe (with scheme)
+
+        Returns:
+            requests.Response: The response whose status code decides the result
+        """
+        if self.session is None:
+            # No pooled session: use a throwaway one so phases are still timed
+            with self._build_session() as session:
+                return self._probe_with(session, url)
+        return self._probe_with(self.session, url)
+
+    def _probe_with(self, http: requests.Session, url: str) -> requests.Response:
+        headers = self.cache.request_headers(url) if self.cache is not None else {}
+
+        if self.probe == 'head':
+            response = self._timed(http.head(url, timeout=self.timeout,
+                                             allow_redirects=True, headers=headers))
+            response.close()
+            if response.status_code < 400:
+                return self._remember(url, response)
+
+            response = self._timed(http.get(url, timeout=self.timeout, allow_redirects=True,
+                                            stream=True, headers=headers))
+            response.close()
+            return self._remember(url, response)
+
+        response = self._timed(http.get(url, timeout=self.timeout, allow_redirects=True,
+                                        headers=headers))
+        return self._remember(url, response)
+
+    def _remember(self, url: str, response: requests.Response) -> requests.Response:
+        """
+        Keep the response's ETag / Last-Modified for the next conditional request.
+        """
+        if self.cache is not None:
+            self.cache.remember(url, response)
+        return response
+
+    @staticmethod
+    def _timed(response: requests.Response) -> requests.Response:
+        """
+        Add the time until the headers arrived (for every redirect hop) to the
+        current phase timings.
+        """
+        timings = _current_phase_timer()
+        for hop in response.history + [response]:
+            timings['elapsed'] += hop.elapsed.total_seconds()
+        return response
+
+    def check_urls(self, urls: Iterable[str]) -> List[Dict]:
         """
         Check the health of multiple URLs.
 
+        `urls` may be any iterable, e.g. the lazy generator returned by
+        unique_urls(), in which case checking starts before it is exhausted.
+
+        When the checker was created with workers > 1 the URLs are sharded over
+        a process pool (see check_urls_sharded). Otherwise, with concurrency > 1
+        they are checked by the asyncio engine (see check_urls_async), or else
+        one by one.
+
         Args:
-            urls (List[str]): List of URLs to check
+            urls (Iterable[str]): URLs to check
 
         Returns:
-            List[Dict]: List of check results for all URLs
+            List[Dict]: List of check results for all URLs, in input order
+                        (empty when keep_results is off)
         """
         self.results = []
-        print(f"\nChecking {len(urls)} URL(s)...\n")
+        self.stats = ResultStats(self.per_url_stats)
+        total = len(urls) if hasattr(urls, '__len__') else None
+        if total is not None:
+            print(f"\nChecking {total} URL(s)...\n")
+        else:
+            print("\nChecking URL(s) as they are read...\n")
         print("-" * 80)
 
+        if self.workers > 1:
+            self.results = self.check_urls_sharded(urls, collect=self.keep_results)
+            return self.results
+
+        if self.concurrency > 1:
+            self.results = asyncio.run(self.check_urls_async(urls, collect=self.keep_results))
+            return self.results
+
         for i, url in enumerate(urls, 1):
-            print(f"[{i}/{len(urls)}] Checking: {url}")
+            print(f"{_progress(i, total)} Checking: {url}")
             result = self.check_url(url)
-            self.results.append(result)
-
-            # Display result
-            status_symbol = "✓" if result['status'] == 'UP' else "✗"
-            print(f"{status_symbol} Status: {result['status']}")
-
-            if result['status_code']:
-                print(f"  HTTP Status: {result['status_code']}")
-            if result['response_time']:
-                print(f"  Response Time: {result['response_time']} ms")
-            if result['error']:
-                print(f"  Error: {result['error']}")
-            print("-" * 80)
+            self._handle_result(result)
+            if self.keep_results:
+                self.results.append(result)
+            self._print_result(result)
 
         return self.results
 
+    def check_urls_sharded(self, urls: List[str], collect: bool = True) -> List[Dict]:
+        """
+        Check URLs in several worker processes, sharded by host.
+
+        All URLs of a host go to the same worker, so per-host limits and
+        circuit breakers keep working. Every worker runs its own checker with
+        this checker's settings; the parent merges the workers' results (in
+        input order), streams them to the sinks and merges their statistics.
+
+        Sharding needs every URL up front, so an iterable is read to the end first.
+
+        Args:
+            urls (Iterable[str]): URLs to check
+            collect (bool): Return the results (default: True)
+
+        Returns:
+            List[Dict]: List of check results (same shape as check_url), in input order
+        """
+        urls = list(urls)
+        shards = defaultdict(list)
+        for index, url in enumerate(urls):
+            shard = zlib.crc32(host_of(url).encode('utf-8')) % self.workers
+            shards[shard].append(index)
+
+        results = [None] * len(urls) if collect else []
+        completed = 0
+        config = self._worker_config()
+
+        with ProcessPoolExecutor(max_workers=len(shards) or 1) as pool:
+            futures = {pool.submit(_check_shard, config, [urls[i] for i in indices]): indices
+                       for indices in shards.values()}
+            for future in as_completed(futures):
+                shard_results, shard_stats, shard_cache = future.result()
+                self.stats.merge(shard_stats)
+                if self.cache is not None:
+                    self.cache.update(shard_cache)
+                for index, result in zip(futures[future], shard_results):
+                    self._publish(result)
+                    if collect:
+                        results[index] = result
+                    completed += 1
+                    print(f"{_progress(completed, len(urls))} Checked: {result['url']}")
+                    self._print_result(result)
+
+        return results
+
+    def _worker_config(self) -> Dict:
+        """
+        Settings used to build an equivalent checker in a worker process.
+        """
+        return {
+            'timeout': self.timeout,
+            'concurrency': self.concurrency,
+            'per_host_limit': self.per_host_limit,
+            'use_session': self.use_session,
+            'probe': self.probe,
+            'per_url_stats': self.per_url_stats,
+            'retries': self.retries,
+            'backoff': self.backoff,
+            'backoff_max': self.backoff_max,
+            'breaker_threshold': self.breaker_threshold,
+            'breaker_reset': self.breaker_reset,
+            'cache': self.cache.to_dict() if self.cache is not None else None,
+            'dns_ttl': self.cache.dns_ttl if self.cache is not None else 60,
+        }
+
+    async def check_urls_async(self, urls: Iterable[str], verbose: bool = True,
+                               collect: bool = True) -> List[Dict]:
+        """
+        Check multiple URLs concurrently.
+
+        At most `concurrency` checks run at once and at most `per_host_limit`
+        of them target the same host. With use_session, all checks share one
+        pooled session, so connections to a host are reused between checks;
+        otherwise every check opens its own connection. URLs are pulled from
+        `urls` lazily, keeping only a small window of checks in flight, so an
+        iterable of millions of URLs never has to be materialized.
+
+        Args:
+            urls (Iterable[str]): URLs to check
+            verbose (bool): Print every result as it completes (default: True)
+            collect (bool): Return the results; when off they only reach the
+                            sinks and running aggregates (default: True)
+
+        Returns:
+            List[Dict]: List of check results (same shape as check_url), in input order
+        """
+        global_limit = asyncio.Semaphore(self.concurrency)
+        host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host_limit))
+        total = len(urls) if hasattr(urls, '__len__') else None
+        window = self.concurrency * 4
+        results = []
+        completed = 0
+
+        owns_session = self.session is None and self.use_session
+        if owns_session:
+            self.session = self._build_session()
+
+        async def run_check(index: int, url: str, executor: ThreadPoolExecutor):
+            nonlocal completed
+            result = await self._check_async(url, executor, global_limit, host_limits)
+            if collect:
+                results[index] = result
+            completed += 1
+            if verbose:
+                print(f"{_progress(completed, total)} Checked: {result['url']}")
+                self._print_result(result)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                in_flight = set()
+                for index, url in enumerate(urls):
+                    if collect:
+                        results.append(None)
+                    in_flight.add(asyncio.ensure_future(run_check(index, url, executor)))
+                    if len(in_flight) >= window:
+                        done, in_flight = await asyncio.wait(
+                            in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            task.result()
+                await asyncio.gather(*in_flight)
+        finally:
+            if owns_session:
+                self.session.close()
+                self.session = None
+
+        return results
+
+    async def _check_async(self, url: str, executor: ThreadPoolExecutor,
+                           global_limit: asyncio.Semaphore,
+                           host_limits: Dict[str, asyncio.Semaphore]) -> Dict:
+        """
+        Check one URL on the executor, with retries, within the given limits.
+
+        Args:
+            url (str): The URL to check
+            executor (ThreadPoolExecutor): Threads running the blocking checks
+            global_limit (asyncio.Semaphore): Limit on checks in flight overall
+            host_limits (Dict[str, asyncio.Semaphore]): Limit on checks in flight per host
+
+        Returns:
+            Dict: The final result, already passed to the sinks and aggregates
+        """
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            # Take the host slot first so a busy host never holds global slots idle
+            async with host_limits[host_of(url)]:
+                async with global_limit:
+                    result = await loop.run_in_executor(executor, self._check_once,
+                                                        url, attempt)
+            if not self._should_retry(result, attempt):
+                break
+            # Back off without holding a slot, so other hosts keep being checked
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
+        self._handle_result(result)
+        return result
+
+    def _print_result(self, result: Dict):
+        """
+        Print the outcome of a single check.
+
+        Args:
+            result (Dict): A result dictionary returned by check_url
+        """
+        status_symbol = "✓" if result['status'] == 'UP' else "✗"
+        print(f"{status_symbol} Status: {result['status']}")
+
+        if result['status_code']:
+            print(f"  HTTP Status: {result['status_code']}")
+        if result['response_time']:
+            print(f"  Response Time: {result['response_time']} ms")
+        if result['error']:
+            print(f"  Error: {result['error']}")
+        print("-" * 80)
+
     def save_to_json(self, filename: str = 'url_health_report.json'):
         """
         Save results to a JSON file.
@@ -155,8 +1489,7 @@ class URLHealthChecker:
                 return
 
             with open(filename, 'w', newline='', encoding='utf-8') as f:
-                fieldnames = ['url', 'status', 'status_code', 'response_time', 'timestamp', 'error']
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS, extrasaction='ignore')
                 writer.writeheader()
                 writer.writerows(self.results)
             print(f"✓ Results saved to {filename}")
@@ -165,19 +1498,21 @@ class URLHealthChecker:
 
     def print_summary(self):
         """
-        Print a summary of the health check results.
+        Print a summary of the health check results from the running aggregates.
         """
-        if not self.results:
+        stats = self.stats
+        if not stats.total:
             print("\nNo results to summarize.")
             return
 
-        total = len(self.results)
-        up_count = sum(1 for r in self.results if r['status'] == 'UP')
-        down_count = total - up_count
+        total = stats.total
+        up_count = stats.up
+        down_count = stats.down
 
-        # Calculate average response time for UP URLs
-        response_times = [r['response_time'] for r in self.results if r['response_time']]
-        avg_response_time = round(sum(response_times) / len(response_times), 2) if response_times else 0
+        # Calculate average response time over checks that got a response
+        avg_response_time = 0
+        if stats.response_time_count:
+            avg_response_time = round(stats.response_time_sum / stats.response_time_count, 2)
 
         print("\n" + "="*80)
         print("SUMMARY")
@@ -187,29 +1522,391 @@ class URLHealthChecker:
         print(f"✗ DOWN: {down_count} ({(down_count/total*100):.1f}%)")
         if avg_response_time > 0:
             print(f"Average Response Time: {avg_response_time} ms")
+            self._print_latency_table()
         print("="*80)
 
+    def _print_latency_table(self):
+        """
+        Print p50/p90/p99/max latencies overall, per phase and (if tracked) per URL.
+        """
+        def row(label: str, histogram: LatencyHistogram) -> str:
+            values = [histogram.percentile(p) for p in (50, 90, 99)] + [histogram.max]
+            return f"  {label:<40.40}" + "".join(f"{v:>10.2f}" for v in values)
 
-def read_urls_from_file(filename: str) -> List[str]:
+        labels = {'response_time': 'total', 'dns_time': 'dns', 'connect_time': 'connect',
+                  'tls_time': 'tls', 'ttfb': 'ttfb'}
+        print("-" * 80)
+        print(f"  {'Latency (ms)':<40}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+        for field, histogram in self.stats.latency.items():
+            # Skip phases that never took time, e.g. TLS on plain-HTTP URLs
+            if histogram.count and histogram.max > 0:
+                print(row(labels[field], histogram))
+
+        if self.stats.per_url:
+            print("-" * 80)
+            print(f"  {'Per-URL total latency (ms)':<40}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+            for url, histogram in self.stats.per_url.items():
+                print(row(url, histogram))
+
+
+def _check_shard(config: Dict, urls: List[str]) -> Tuple[List[Dict], ResultStats, Optional[Dict]]:
     """
-    Read URLs from a text file (one URL per line).
+    Worker-process entry point of URLHealthChecker.check_urls_sharded.
 
     Args:
-        filename (str): Path to the file containing URLs
+        config (Dict): Keyword arguments for the worker's URLHealthChecker; the
+                       'cache' entry holds the parent's cache contents (or None)
+        urls (List[str]): The URLs of this shard
 
     Returns:
-        List[str]: List of URLs
+        Tuple: The shard's results (in shard order), statistics and cache
+               contents, which the parent merges into its own
+    """
+    config = dict(config)
+    cache_data, dns_ttl = config.pop('cache'), config.pop('dns_ttl')
+    if cache_data is not None:
+        config['cache'] = CheckCache(dns_ttl=dns_ttl)
+        config['cache'].update(cache_data)
+
+    with URLHealthChecker(**config) as checker:
+        results = asyncio.run(checker.check_urls_async(urls, verbose=False))
+    return results, checker.stats, checker.cache.to_dict() if checker.cache else None
+
+
+class HealthMonitor:
+    """
+    Long-running monitor that re-checks URLs on a schedule (used by --watch).
+
+    Due checks are kept in a heap ordered by their next due time. First checks
+    are spread evenly over one interval and every later check is jittered, so
+    thousands of URLs never fire at the same moment. Every check runs as its
+    own task and reschedules its URL when it finishes, so a slow or hanging
+    host never delays the checks of other URLs. The most recent results
+    of every URL are kept in a bounded ring buffer.
+    """
+
+    def __init__(self, checker: URLHealthChecker, interval: float = 60,
+                 jitter: float = 0.1, history: int = 100):
+        """
+        Initialize the monitor.
+
+        Args:
+            checker (URLHealthChecker): Checker used to run the checks
+            interval (float): Default seconds between two checks of a URL (default: 60)
+            jitter (float): Random spread applied to every interval, as a
+                            fraction of it (default: 0.1, i.e. +/-10%)
+            history (int): Number of recent results kept per URL (default: 100)
+        """
+        self.checker = checker
+        self.interval = interval
+        self.jitter = jitter
+        self.history = defaultdict(lambda: deque(maxlen=history))
+        self._schedule = []
+        self._sequence = 0
+        self._stop = None
+        self._wake = None
+
+    def add_url(self, url: str, interval: Optional[float] = None):
+        """
+        Schedule a URL for monitoring.
+
+        Args:
+            url (str): The URL to monitor
+            interval (float): Seconds between checks of this URL (default: monitor interval)
+        """
+        interval = interval or self.interval
+        # Spread the first round of checks over one full interval
+        first_due = time.monotonic() + random.uniform(0, interval)
+        self._push(first_due, url, interval)
+
+    def _push(self, due: float, url: str, interval: float):
+        self._sequence += 1
+        heapq.heappush(self._schedule, (due, self._sequence, url, interval))
+
+    def _next_due(self, due: float, interval: float) -> float:
+        """
+        Compute when a URL is due again, anchored on its previous due time so
+        slow checks do not make the schedule drift.
+        """
+        spread = interval * self.jitter
+        next_due = due + interval + random.uniform(-spread, spread)
+        return max(next_due, time.monotonic())
+
+    def latest_results(self) -> List[Dict]:
+        """
+        Return the most recent result of every monitored URL.
+
+        Returns:
+            List[Dict]: One result dictionary per URL
+        """
+        return [results[-1] for results in self.history.values() if results]
+
+    def summary_stats(self) -> ResultStats:
+        """
+        Build summary aggregates: UP/DOWN counts from the latest result of each
+        URL, latencies (overall and per URL) from every result in the history.
+
+        Returns:
+            ResultStats: Aggregates for print_summary
+        """
+        stats = ResultStats.from_results(self.latest_results(), per_url=True)
+        for results in self.history.values():
+            for result in list(results)[:-1]:
+                stats.add_latency(result)
+        return stats
+
+    def stop(self):
+        """
+        Ask the monitor to stop after the checks currently in flight.
+        """
+        if self._stop is not None:
+            self._stop.set()
+            self._wake.set()
+
+    def _record(self, result: Dict):
+        """
+        Store a result and print it when the URL changes state.
+        """
+        results = self.history[result['url']]
+        previous = results[-1]['status'] if results else None
+        results.append(result)
+
+        if result['status'] != previous:
+            status_symbol = "✓" if result['status'] == 'UP' else "✗"
+            detail = result['error'] or f"{result['status_code']}, {result['response_time']} ms"
+            print(f"[{result['timestamp']}] {status_symbol} {result['url']} is "
+                  f"{result['status']} ({detail})")
+
+    def _install_signal_handlers(self, loop: asyncio.AbstractEventLoop):
+        """
+        Stop gracefully on SIGTERM and SIGINT.
+        """
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError, ValueError):
+                # Windows event loops or not running in the main thread
+                try:
+                    signal.signal(sig, lambda *_: loop.call_soon_threadsafe(self.stop))
+                except ValueError:
+                    pass
+
+    async def run_async(self, max_rounds: Optional[int] = None):
+        """
+        Run the scheduling loop until stop() is called or a signal arrives.
+
+        Checks still in flight when the loop stops are awaited and recorded.
+
+        Args:
+            max_rounds (int): Stop after this many batches of checks (default: run forever)
+        """
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._install_signal_handlers(loop)
+        checker = self.checker
+        global_limit = asyncio.Semaphore(checker.concurrency)
+        host_limits = defaultdict(lambda: asyncio.Semaphore(checker.per_host_limit))
+        in_flight = set()
+        rounds = 0
+
+        async def run_check(due_time: float, url: str, interval: float,
+                            executor: ThreadPoolExecutor):
+            try:
+                result = await checker._check_async(url, executor, global_limit, host_limits)
+                self._record(result)
+            finally:
+                self._push(self._next_due(due_time, interval), url, interval)
+                self._wake.set()
+
+        owns_session = checker.session is None and checker.use_session
+        if owns_session:
+            checker.session = checker._build_session()
+        try:
+            with ThreadPoolExecutor(max_workers=checker.concurrency) as executor:
+                while (self._schedule or in_flight) and not self._stop.is_set():
+                    for task in [task for task in in_flight if task.done()]:
+                        in_flight.discard(task)
+                        task.result()
+
+                    now = time.monotonic()
+                    if not self._schedule or self._schedule[0][0] > now:
+                        # Sleep until the next check is due or a running check finishes
+                        delay = self._schedule[0][0] - now if self._schedule else None
+                        try:
+                            await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                        except asyncio.TimeoutError:
+                            pass
+                        self._wake.clear()
+                        continue
+
+                    while self._schedule and self._schedule[0][0] <= now:
+                        due_time, _, url, interval = heapq.heappop(self._schedule)
+                        in_flight.add(asyncio.ensure_future(
+                            run_check(due_time, url, interval, executor)))
+
+                    rounds += 1
+                    if max_rounds is not None and rounds >= max_rounds:
+                        break
+                await asyncio.gather(*in_flight)
+        finally:
+            if owns_session:
+                checker.session.close()
+                checker.session = None
+
+    def run(self, max_rounds: Optional[int] = None) -> List[Dict]:
+        """
+        Run the monitor in the foreground.
+
+        Args:
+            max_rounds (int): Stop after this many batches of checks (default: run forever)
+
+        Returns:
+            List[Dict]: The latest result of every monitored URL
+        """
+        print(f"\nWatching {len(self._schedule)} URL(s). Press Ctrl+C to stop.\n")
+        asyncio.run(self.run_async(max_rounds))
+        print("\nMonitor stopped.")
+        return self.latest_results()
+
+
+def split_interval(entry: str) -> Tuple[str, Optional[float]]:
+    """
+    Split a 'URL [interval]' entry into its URL and optional interval in seconds.
+
+    Args:
+        entry (str): A URL, optionally followed by whitespace and a number
+
+    Returns:
+        Tuple[str, Optional[float]]: The URL and interval (None if not given)
+    """
+    parts = entry.split()
+    if len(parts) >= 2:
+        try:
+            return parts[0], float(parts[1])
+        except ValueError:
+            pass
+    return (parts[0] if parts else entry), None
+
+
+def _progress(done: int, total: Optional[int]) -> str:
+    """
+    Format a progress counter such as '[3/10]', or '[3]' when the total is unknown.
+    """
+    return f"[{done}/{total}]" if total is not None else f"[{done}]"
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so trivially different spellings compare equal: add the
+    https scheme when missing, lower-case scheme and host, drop the trailing
+    slash of the path and the fragment.
+
+    Args:
+        url (str): The URL to normalize
+
+    Returns:
+        str: The normalized URL
+    """
+    url = url.strip()
+    if '://' not in url:
+        url = 'https://' + url
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(),
+                       parts.path.rstrip('/'), parts.query, ''))
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set used to dedup very large URL lists.
+
+    Memory is fixed by `capacity` and `error_rate` (about 1.8 MB for a million
+    URLs at 0.1%). A URL is never reported as new twice; with probability
+    `error_rate` a new URL is wrongly reported as already seen and skipped.
+    """
+
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.001):
+        """
+        Args:
+            capacity (int): Expected number of distinct items (default: 1,000,000)
+            error_rate (float): False-positive rate at that capacity (default: 0.001)
+        """
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str):
+        for p in self._positions(item):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+
+def unique_urls(urls: Iterable[str], normalize: bool = True,
+                bloom_capacity: Optional[int] = None) -> Iterator[str]:
+    """
+    Lazily drop duplicate URLs, keeping the first occurrence.
+
+    Args:
+        urls (Iterable[str]): URLs, e.g. from iter_urls_from_file()
+        normalize (bool): Normalize URLs (see normalize_url) before comparing
+                          and yield the normalized form (default: True)
+        bloom_capacity (int): Dedup with a BloomFilter sized for this many URLs
+                              instead of an exact set (default: exact set)
+
+    Yields:
+        str: Each distinct URL once
+    """
+    seen = BloomFilter(bloom_capacity) if bloom_capacity else set()
+    for url in urls:
+        if normalize:
+            url = normalize_url(url)
+        if url in seen:
+            continue
+        seen.add(url)
+        yield url
+
+
+def iter_urls_from_file(filename: str) -> Iterator[str]:
+    """
+    Stream URLs from a text file (one URL per line) without loading it whole.
+
+    Args:
+        filename (str): Path to the file containing URLs
+
+    Yields:
+        str: Each non-empty, non-comment line, stripped
     """
     try:
         with open(filename, 'r', encoding='utf-8') as f:
-            urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
-        return urls
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.")
-        return []
     except Exception as e:
         print(f"Error reading file: {e}")
-        return []
+
+
+def read_urls_from_file(filename: str) -> List[str]:
+    """
+    Read URLs from a text file (one URL per line).
+
+    Args:
+        filename (str): Path to the file containing URLs
+
+    Returns:
+        List[str]: List of URLs
+    """
+    return list(iter_urls_from_file(filename))
 
 
 def main():
@@ -235,6 +1932,34 @@ Examples:
 
   # Set custom timeout
   python web_url_health_checker.py -u https://example.com -t 20
+
+  # Check a large list with 50 concurrent checks, at most 2 per host
+  python web_url_health_checker.py -f urls.txt -c 50 --per-host 2
+
+  # Probe with HEAD first and never download page bodies
+  python web_url_health_checker.py -f urls.txt --probe head
+
+  # Stream every result to url_health_report.ndjson as soon as it is checked
+  python web_url_health_checker.py -f urls.txt --stream ndjson --fsync always
+
+  # Shard a very large list by host over 4 processes, 50 concurrent checks each
+  python web_url_health_checker.py -f urls.txt --workers 4 -c 50
+
+  # Monitor and expose Prometheus metrics at http://0.0.0.0:9115/metrics
+  python web_url_health_checker.py -f urls.txt --watch --metrics-port 9115 --metrics-host 0.0.0.0
+
+  # Run every minute from cron, keeping DNS answers and ETags between runs
+  python web_url_health_checker.py -f urls.txt --cache url_health_cache.json
+
+  # Check a multi-million-line crawl export with fixed-memory dedup
+  python web_url_health_checker.py -f crawl.txt --bloom 5000000 --stream ndjson
+
+  # Retry failures twice and stop hammering hosts after 3 straight failures
+  python web_url_health_checker.py -f urls.txt --retries 2 --breaker-threshold 3
+
+  # Keep monitoring every 30 s (lines of the file may add their own interval,
+  # e.g. "https://example.com 300"); stop with Ctrl+C or SIGTERM
+  python web_url_health_checker.py -f urls.txt --watch --interval 30
         """
     )
 
@@ -244,47 +1969,141 @@ Examples:
                         help='Output filename prefix (default: url_health_report)')
     parser.add_argument('-t', '--timeout', type=int, default=10,
                         help='Request timeout in seconds (default: 10)')
+    parser.add_argument('-c', '--concurrency', type=int, default=10,
+                        help='Maximum number of concurrent checks (default: 10)')
+    parser.add_argument('--per-host', type=int, default=4,
+                        help='Maximum concurrent checks per host (default: 4)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Worker processes to shard the URLs over by host (default: 1)')
+    parser.add_argument('--probe', choices=PROBE_STRATEGIES, default='get',
+                        help="'head' sends HEAD first and never reads bodies (default: get)")
+    parser.add_argument('--no-keep-alive', action='store_true',
+                        help='Open a new connection for every check')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='Retries after network errors, 429 or 5xx (default: 0)')
+    parser.add_argument('--backoff', type=float, default=0.5,
+                        help='Base retry backoff in seconds, doubled per attempt (default: 0.5)')
+    parser.add_argument('--breaker-threshold', type=int, default=0,
+                        help='Consecutive host failures that open its circuit '
+                             'breaker, 0 to disable (default: 0)')
+    parser.add_argument('--breaker-reset', type=float, default=30,
+                        help='Seconds before an open circuit is probed again (default: 30)')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep re-checking the URLs until stopped')
+    parser.add_argument('--interval', type=float, default=60,
+                        help='Seconds between checks of a URL in --watch mode (default: 60)')
+    parser.add_argument('--jitter', type=float, default=0.1,
+                        help='Random spread of each interval as a fraction (default: 0.1)')
+    parser.add_argument('--history', type=int, default=100,
+                        help='Recent results kept per URL in --watch mode (default: 100)')
+    parser.add_argument('--stream', nargs='+', choices=list(SINK_TYPES),
+                        help='Append each result to <output>.ndjson/.stream.csv/.bin '
+                             'as soon as it is checked, instead of a final report '
+                             '(binary keeps every field, with timings to 0.01 ms)')
+    parser.add_argument('--buffer', type=int, default=1,
+                        help='Results buffered before a streamed write (default: 1)')
+    parser.add_argument('--fsync', choices=FSYNC_POLICIES, default='flush',
+                        help='When streamed files are fsynced (default: flush)')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Serve Prometheus metrics on this port while checking')
+    parser.add_argument('--metrics-host', default='127.0.0.1',
+                        help='Address the metrics endpoint binds to (default: 127.0.0.1)')
+    parser.add_argument('--cache', metavar='FILE',
+                        help='Persist DNS answers and ETag/Last-Modified validators in FILE')
+    parser.add_argument('--dns-ttl', type=float, default=60,
+                        help='Seconds a cached DNS answer is reused (default: 60)')
+    parser.add_argument('--cache-size', type=int, default=10000,
+                        help='Maximum cached DNS answers / validators (default: 10000)')
+    parser.add_argument('--no-normalize', action='store_true',
+                        help='Check URLs exactly as given instead of normalizing them')
+    parser.add_argument('--bloom', type=int, metavar='CAPACITY',
+                        help='Dedup with a Bloom filter sized for CAPACITY URLs '
+                             '(fixed memory, for multi-million-line files)')
     parser.add_argument('--json', action='store_true', help='Save results as JSON')
     parser.add_argument('--csv', action='store_true', help='Save results as CSV')
 
     args = parser.parse_args()
+    if args.watch and args.workers > 1:
+        parser.error('--watch runs in a single process; drop --workers')
 
-    # Collect URLs
-    urls = []
-    if args.urls:
-        urls.extend(args.urls)
-    if args.file:
-        urls.extend(read_urls_from_file(args.file))
+    # Collect URLs lazily, so checking starts before a large file is fully read
+    entries = itertools.chain(args.urls or [],
+                              iter_urls_from_file(args.file) if args.file else [])
+    first_entry = next(entries, None)
 
     # If no URLs provided, use example URLs
-    if not urls:
+    if first_entry is None:
         print("No URLs provided. Using example URLs for demonstration...\n")
-        urls = [
+        entries = iter([
             'https://www.google.com',
             'https://github.com',
             'https://www.python.org',
             'https://this-site-definitely-does-not-exist-12345.com'
-        ]
+        ])
+    else:
+        entries = itertools.chain([first_entry], entries)
 
-    # Remove duplicates while preserving order
-    urls = list(dict.fromkeys(urls))
+    # Split off per-URL intervals and remove duplicates while preserving order
+    if args.watch:
+        intervals = {}
+        for entry in entries:
+            url, interval = split_interval(entry)
+            intervals.setdefault(url if args.no_normalize else normalize_url(url), interval)
+        urls = list(intervals)
+    else:
+        urls = unique_urls((split_interval(entry)[0] for entry in entries),
+                           normalize=not args.no_normalize, bloom_capacity=args.bloom)
 
     # Create checker and run checks
-    checker = URLHealthChecker(timeout=args.timeout)
-    checker.check_urls(urls)
+    sinks = [SINK_TYPES[kind](f"{args.output}.{SINK_EXTENSIONS[kind]}",
+                              buffer_size=args.buffer, fsync=args.fsync)
+             for kind in (args.stream or [])]
+    # Streamed runs already wrote their results, unless a report is requested
+    default_reports = not args.json and not args.csv and not sinks
+    keep_results = not sinks or args.json or args.csv
+
+    metrics = None
+    if args.metrics_port is not None:
+        metrics = MetricsExporter()
+        port = metrics.start(args.metrics_port, args.metrics_host)
+        print(f"Serving metrics at http://{args.metrics_host}:{port}/metrics")
+
+    cache = None
+    if args.cache:
+        cache = CheckCache(args.cache, dns_ttl=args.dns_ttl, max_entries=args.cache_size)
+
+    checker = URLHealthChecker(timeout=args.timeout, concurrency=args.concurrency,
+                               per_host_limit=args.per_host,
+                               use_session=not args.no_keep_alive, probe=args.probe,
+                               sinks=sinks, keep_results=keep_results,
+                               retries=args.retries, backoff=args.backoff,
+                               breaker_threshold=args.breaker_threshold,
+                               breaker_reset=args.breaker_reset, workers=args.workers,
+                               metrics=metrics, cache=cache)
+    with checker:
+        if args.watch:
+            monitor = HealthMonitor(checker, interval=args.interval,
+                                    jitter=args.jitter, history=args.history)
+            for url in urls:
+                monitor.add_url(url, intervals[url])
+            checker.results = monitor.run()
+            checker.stats = monitor.summary_stats()
+        else:
+            checker.check_urls(urls)
+    if metrics is not None:
+        metrics.stop()
 
     # Print summary
     checker.print_summary()
 
     # Save results
-    if args.json or (not args.json and not args.csv):
+    if args.json or default_reports:
         checker.save_to_json(f"{args.output}.json")
-    if args.csv or (not args.json and not args.csv):
+    if args.csv or default_reports:
         checker.save_to_csv(f"{args.output}.csv")
 
     # Return exit code based on results
-    down_count = sum(1 for r in checker.results if r['status'] == 'DOWN')
-    return 1 if down_count > 0 else 0
+    return 1 if checker.stats.down > 0 else 0
 
 
 if __name__ == '__main__':
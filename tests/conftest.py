@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def attachment_cache(tmp_path, monkeypatch):
+    """Keep the mailers' encoded-attachment cache out of the user's real cache directory."""
+    cache_dir = tmp_path / "attachment_cache"
+    monkeypatch.setenv("MAILER_CACHE_DIR", str(cache_dir))
+    return cache_dir
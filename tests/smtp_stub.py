@@ -0,0 +1,109 @@
+"""
+Minimal in-process SMTP server used by the mailer tests instead of a real
+mail provider. It accepts any AUTH PLAIN login and records every message.
+"""
+
+import socketserver
+import threading
+
+
+class SMTPStub:
+    """SMTP sink listening on 127.0.0.1; use as a context manager."""
+
+    def __init__(self, max_recipients=None, reject=(), drop_after_data=0, reject_data=()):
+        self.max_recipients = max_recipients
+        self.reject = set(reject)
+        self.drop_after_data = drop_after_data
+        self.reject_data = set(reject_data)     # 1-based numbers of the DATA commands to refuse
+        self.data_commands = 0
+        self.messages = []
+        self.connections = 0
+        self.logins = 0
+        self.noops = 0
+        self.lock = threading.Lock()
+
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(f"{line}\r\n".encode())
+
+            def handle(self):
+                with stub.lock:
+                    stub.connections += 1
+                self.reply("220 stub ESMTP")
+                sender, recipients = None, []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode().strip()
+                    verb = command.split(" ")[0].upper()
+                    if verb in ("EHLO", "HELO"):
+                        self.reply("250-stub")
+                        self.reply("250-AUTH PLAIN LOGIN")
+                        self.reply("250 8BITMIME")
+                    elif verb == "AUTH":
+                        with stub.lock:
+                            stub.logins += 1
+                        self.reply("235 2.7.0 Authentication successful")
+                    elif verb == "MAIL":
+                        sender, recipients = command[10:].split(" ")[0].strip("<>"), []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        address = command[8:].split(" ")[0].strip("<>")
+                        if address in stub.reject:
+                            self.reply("550 5.1.1 No such user")
+                        elif stub.max_recipients and len(recipients) >= stub.max_recipients:
+                            self.reply("452 4.5.3 Too many recipients")
+                        else:
+                            recipients.append(address)
+                            self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        data = []
+                        while True:
+                            chunk = self.rfile.readline()
+                            if chunk in (b".\r\n", b".\n", b""):
+                                break
+                            data.append(chunk)
+                        with stub.lock:
+                            stub.data_commands += 1
+                            if stub.data_commands in stub.reject_data:
+                                self.reply("554 5.6.0 Message rejected")
+                                continue
+                            stub.messages.append((sender, list(recipients), b"".join(data)))
+                            drop = stub.drop_after_data > 0
+                            if drop:
+                                stub.drop_after_data -= 1
+                        if drop:
+                            # Simulate a connection lost after the server accepted DATA
+                            return
+                        self.reply("250 OK queued")
+                    elif verb == "RSET":
+                        sender, recipients = None, []
+                        self.reply("250 OK")
+                    elif verb == "NOOP":
+                        with stub.lock:
+                            stub.noops += 1
+                        self.reply("250 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "scripts", "Management Systems"))
+
+import benchmark_library  # noqa: E402
+from benchmark_library import run_benchmark, run_loader, write_library  # noqa: E402
+
+
+def test_benchmark_loads_every_size_with_every_loader():
+    results = run_benchmark(sizes=[200, 1000])
+
+    assert [(r["size"], r["loader"]) for r in results] == [
+        (200, "legacy"), (200, "current"), (1000, "legacy"), (1000, "current")]
+    assert all(r["books"] == r["size"] and r["load_ms"] > 0 for r in results)
+
+
+def test_memory_falls_back_to_tracemalloc_without_proc(monkeypatch, tmp_path):
+    monkeypatch.setattr(benchmark_library, "PROC_STATUS", str(tmp_path / "missing"))
+    filename = str(tmp_path / "library.json")
+    write_library(filename, 2000)
+
+    result = run_loader("legacy", filename)
+
+    assert result["books"] == 2000
+    assert result["load_mb"] >= result["kept_mb"] > 0
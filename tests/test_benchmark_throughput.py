@@ -0,0 +1,32 @@
+from scripts.Mailers import benchmark_throughput
+from scripts.Mailers.benchmark_throughput import find_regressions, run_benchmark
+
+
+def test_benchmark_reports_every_scenario():
+    results = run_benchmark(backends=["hh", "email_sender", "brevo_batch"], concurrency=[2],
+                            sizes=[256], messages=20, batch=10, error_rate=0.25)
+
+    assert [r["backend"] for r in results] == ["hh", "email_sender", "brevo_batch"]
+    hh_result = results[0]
+    assert hh_result["delivered"] + hh_result["errors"] == 20
+    assert hh_result["errors"] == 5
+    assert all(r["msgs_per_sec"] > 0 and r["p99_ms"] >= r["p50_ms"] and r["peak_rss_mb"] > 0
+               for r in results)
+
+
+def test_throughput_drop_beyond_tolerance_is_a_regression():
+    baseline = [{"backend": "hh", "concurrency": 4, "size": 1024, "msgs_per_sec": 100.0},
+                {"backend": "brevo", "concurrency": 4, "size": 1024, "msgs_per_sec": 100.0}]
+    results = [{"backend": "hh", "concurrency": 4, "size": 1024, "msgs_per_sec": 85.0},
+               {"backend": "brevo", "concurrency": 4, "size": 1024, "msgs_per_sec": 70.0}]
+
+    assert len(find_regressions(results, baseline, tolerance=0.2)) == 1
+    assert "brevo" in find_regressions(results, baseline, tolerance=0.2)[0]
+
+
+def test_peak_rss_is_unavailable_without_proc_or_getrusage(monkeypatch, tmp_path):
+    monkeypatch.setattr(benchmark_throughput, "PROC_STATUS", str(tmp_path / "missing"))
+    assert benchmark_throughput._peak_rss_mb() > 0
+
+    monkeypatch.setattr(benchmark_throughput, "resource", None)
+    assert benchmark_throughput._peak_rss_mb() is None
@@ -0,0 +1,71 @@
+import smtplib
+
+from scripts.Mailers.email_sender import build_message, send_batched
+from tests.smtp_stub import SMTPStub
+
+
+def connect(stub):
+    server = smtplib.SMTP("127.0.0.1", stub.port)
+    server.login("me@example.com", "secret")
+    return server
+
+
+def test_message_is_serialized_once_and_sent_in_batches(tmp_path):
+    attachment = tmp_path / "report.bin"
+    attachment.write_bytes(b"\x00" * 1024)
+    message = build_message("me@example.com", ["a@example.com"], [], "Report", "Hi", "1",
+                            [str(attachment)])
+    recipients = [f"user{i}@example.com" for i in range(250)]
+
+    with SMTPStub() as stub:
+        server = connect(stub)
+        delivered, refused = send_batched(server, "me@example.com", recipients, message)
+        server.quit()
+
+    assert sorted(delivered) == sorted(recipients)
+    assert refused == {}
+    assert [len(m[1]) for m in stub.messages] == [100, 100, 50]
+    assert all(m[2] == stub.messages[0][2] for m in stub.messages)
+
+
+def test_batch_shrinks_to_server_limit_and_retries_refused_individually():
+    message = build_message("me@example.com", [], [], "Hi", "Hi", "1", [])
+    recipients = [f"user{i}@example.com" for i in range(10)] + ["bad@example.com"]
+
+    with SMTPStub(max_recipients=4, reject=["bad@example.com"]) as stub:
+        server = connect(stub)
+        delivered, refused = send_batched(server, "me@example.com", recipients, message)
+        server.quit()
+
+    assert sorted(delivered) == sorted(recipients[:-1])
+    assert list(refused) == ["bad@example.com"]
+    assert refused["bad@example.com"][0] == 550
+    # After the first batch hit the limit, the following envelopes stayed within it
+    assert all(len(m[1]) <= 4 for m in stub.messages)
+
+
+def test_failed_envelope_keeps_results_of_the_others():
+    message = build_message("me@example.com", [], [], "Hi", "Hi", "1", [])
+    recipients = [f"user{i}@example.com" for i in range(250)]
+
+    with SMTPStub(reject_data=[2]) as stub:
+        server = connect(stub)
+        delivered, refused = send_batched(server, "me@example.com", recipients, message)
+        server.quit()
+
+    assert delivered == recipients[:100] + recipients[200:]
+    assert list(refused) == recipients[100:200]
+    assert refused["user150@example.com"][0] == 554
+
+
+def test_lost_connection_reports_undelivered_recipients():
+    message = build_message("me@example.com", [], [], "Hi", "Hi", "1", [])
+    recipients = [f"user{i}@example.com" for i in range(150)] + ["bad@example.com"]
+
+    with SMTPStub(drop_after_data=1, reject=["bad@example.com"]) as stub:
+        server = connect(stub)
+        delivered, refused = send_batched(server, "me@example.com", recipients, message)
+
+    assert delivered == []
+    assert sorted(refused) == sorted(recipients)
+    assert len(stub.messages) == 1
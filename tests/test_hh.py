@@ -0,0 +1,156 @@
+import json
+import os
+import socket
+import time
+
+import pytest
+
+import hh
+from tests.smtp_stub import SMTPStub
+
+
+@pytest.fixture
+def smtp():
+    with SMTPStub() as stub:
+        yield stub
+
+
+@pytest.fixture(autouse=True)
+def log_in_tmp(tmp_path, monkeypatch):
+    monkeypatch.setattr(hh, "LOG_FILE", str(tmp_path / "email_log.txt"))
+    yield
+    hh.flush_log()
+
+
+def make_pool(stub, **kwargs):
+    return hh.SMTPConnectionPool("me@example.com", "secret", server="127.0.0.1",
+                                 port=stub.port, use_tls=False, **kwargs)
+
+
+def test_pool_reuses_authenticated_connections(smtp):
+    with make_pool(smtp, size=2) as pool:
+        for i in range(10):
+            hh.send_email("me@example.com", "secret", [f"user{i}@example.com"], [], [],
+                          "Hello", "Body", "1", [], pool=pool)
+
+    assert len(smtp.messages) == 10
+    assert smtp.connections == 1
+    assert smtp.logins == 1
+
+
+def test_pool_retires_connections_after_max_messages(smtp):
+    with make_pool(smtp, max_messages=3) as pool:
+        for i in range(7):
+            pool.sendmail("me@example.com", [f"user{i}@example.com"], "Subject: x\r\n\r\nbody")
+
+    assert len(smtp.messages) == 7
+    assert pool.connections_opened == 3
+
+
+def test_pool_health_checks_and_replaces_dead_connections(smtp):
+    with make_pool(smtp, health_check_after=0) as pool:
+        pool.sendmail("me@example.com", ["a@example.com"], "Subject: x\r\n\r\nbody")
+        # Kill the idle connection behind the pool's back
+        pool._idle[0]["smtp"].sock.shutdown(socket.SHUT_RDWR)
+        time.sleep(0.01)
+        pool.sendmail("me@example.com", ["b@example.com"], "Subject: x\r\n\r\nbody")
+
+    assert [m[1] for m in smtp.messages] == [["a@example.com"], ["b@example.com"]]
+    assert pool.connections_opened == 2
+
+
+def test_log_is_written_as_json_lines_with_send_timing(smtp):
+    with make_pool(smtp) as pool:
+        assert hh.send_email("me@example.com", "secret", ["a@example.com"], [], [],
+                             "Hello", "Body", "1", [], pool=pool)
+    hh.flush_log()
+
+    with open(hh.LOG_FILE, encoding="utf-8") as log:
+        entries = [json.loads(line) for line in log]
+    assert entries[-1]["event"] == "sent"
+    assert entries[-1]["recipients"] == ["a@example.com"]
+    assert entries[-1]["duration_ms"] >= 0
+
+
+def test_log_rotates_by_size(monkeypatch):
+    monkeypatch.setattr(hh, "LOG_MAX_BYTES", 500)
+    for i in range(50):
+        hh.log_message(f"entry {i}", event="test")
+    hh.flush_log()
+
+    assert os.path.exists(hh.LOG_FILE + ".1")
+    assert os.path.getsize(hh.LOG_FILE) <= 500
+
+
+def test_retry_backoff_does_not_block_other_sends(monkeypatch):
+    monkeypatch.setattr(hh, "RETRY_DELAY", 0.3)
+    with SMTPStub(reject=["bad@example.com"]) as stub:
+        with make_pool(stub) as pool, hh.RetryScheduler(workers=2) as scheduler:
+            failing = hh.send_email("me@example.com", "secret", ["bad@example.com"], [], [],
+                                    "Hello", "Body", "1", [], pool=pool, scheduler=scheduler)
+            time.sleep(0.05)
+            others = [hh.send_email("me@example.com", "secret", [f"user{i}@example.com"], [], [],
+                                    "Hello", "Body", "1", [], pool=pool, scheduler=scheduler)
+                      for i in range(6)]
+            assert all(f.result(timeout=0.25) for f in others)
+            assert not failing.done()
+            assert failing.result(timeout=2) is False
+
+    assert len(stub.messages) == 6
+
+
+def test_mail_merge_sends_personalised_emails(smtp, tmp_path):
+    recipients = tmp_path / "recipients.csv"
+    recipients.write_text("email,name\n" + "".join(f"user{i}@example.com,User {i}\n" for i in range(8)))
+
+    with make_pool(smtp) as pool, hh.RetryScheduler() as scheduler:
+        counts = hh.send_mail_merge("me@example.com", "secret", str(recipients),
+                                    "Hello {{ name }}", "<p>Dear {{ name }}</p>",
+                                    pool=pool, scheduler=scheduler, max_in_flight=3)
+
+    assert counts == {"sent": 8, "failed": 0}
+    bodies = {m[1][0]: m[2] for m in smtp.messages}
+    assert b"Dear User 5" in bodies["user5@example.com"]
+
+
+def test_ledger_skips_recipients_already_delivered(tmp_path, monkeypatch):
+    monkeypatch.setattr(hh, "RETRY_DELAY", 0)
+    recipients = ["a@example.com", "b@example.com", "bad@example.com"]
+    with SMTPStub(reject=["bad@example.com"]) as stub, make_pool(stub) as pool, \
+            hh.DeliveryLedger(str(tmp_path / "ledger.db")) as ledger:
+        for _ in range(2):   # e.g. a campaign restarted after a crash
+            assert hh.send_email("me@example.com", "secret", recipients, [], [], "Hello", "Body", "1",
+                                 [], pool=pool, ledger=ledger, idempotency_key="campaign-1")
+        statuses = ledger.lookup("campaign-1", recipients)
+
+    assert len(stub.messages) == 1
+    assert {r: s["status"] for r, s in statuses.items()} == {
+        "a@example.com": "delivered", "b@example.com": "delivered", "bad@example.com": "refused"}
+    assert statuses["bad@example.com"]["code"] == 550
+
+
+def test_unconfirmed_delivery_is_not_sent_twice(tmp_path, monkeypatch):
+    monkeypatch.setattr(hh, "RETRY_DELAY", 0)
+    with SMTPStub(drop_after_data=1) as stub, make_pool(stub) as pool, \
+            hh.DeliveryLedger(str(tmp_path / "ledger.db")) as ledger:
+        hh.send_email("me@example.com", "secret", ["a@example.com"], [], [], "Hello", "Body", "1",
+                      [], pool=pool, ledger=ledger)
+        key = hh.message_key("me@example.com", "Hello", "Body")
+        status = ledger.lookup(key, ["a@example.com"])["a@example.com"]["status"]
+
+    # The server got the message but the reply was lost; retrying would duplicate it
+    assert len(stub.messages) == 1
+    assert status == "unconfirmed"
+
+
+def test_changed_attachment_is_not_skipped_as_delivered(tmp_path, monkeypatch):
+    monkeypatch.setattr(hh, "RETRY_DELAY", 0)
+    report = tmp_path / "report.pdf"
+    with SMTPStub() as stub, make_pool(stub) as pool, \
+            hh.DeliveryLedger(str(tmp_path / "ledger.db")) as ledger:
+        for week in ("week 9", "week 10"):    # Same subject, body and file name every week
+            report.write_text(week)
+            assert hh.send_email("me@example.com", "secret", ["a@example.com"], [], [], "Weekly report",
+                                 "Attached", "1", [str(report)], pool=pool, ledger=ledger)
+
+    assert len(stub.messages) == 2
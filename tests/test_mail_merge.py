@@ -0,0 +1,56 @@
+import itertools
+import json
+
+from scripts.Mailers.mail_merge import MergeTemplate, merge, one_by_one, read_recipients, send_merged
+
+
+def test_template_is_compiled_once_and_escapes_html():
+    template = MergeTemplate("<p>Hi {{ name }}, plan {{plan}}</p>", escape_html=True)
+
+    assert template.fields == ["name", "plan"]
+    assert template.render({"name": "<Ann>", "plan": "pro"}) == "<p>Hi &lt;Ann&gt;, plan pro</p>"
+
+
+def test_recipients_are_streamed_from_csv_and_ndjson(tmp_path):
+    csv_file = tmp_path / "people.csv"
+    csv_file.write_text("email,name\na@example.com,Ann\nb@example.com,Bob\n")
+    ndjson_file = tmp_path / "people.ndjson"
+    ndjson_file.write_text(json.dumps({"email": "c@example.com", "name": "Cy"}) + "\n\n")
+
+    assert [r["name"] for r in read_recipients(str(csv_file))] == ["Ann", "Bob"]
+    assert list(read_recipients(str(ndjson_file))) == [{"email": "c@example.com", "name": "Cy"}]
+
+
+def test_pipeline_renders_lazily_and_sends_in_batches():
+    rendered = []
+    recipients = ({"email": f"user{i}@example.com", "n": i} for i in itertools.count())
+    messages = merge(recipients, "Hi {{ n }}", "<b>{{ n }}</b>")
+    batches = []
+
+    def send_batch(batch):
+        batches.append(len(batch))
+        rendered.extend(m["subject"] for m in batch)
+        return [{"success": True} for _ in batch]
+
+    # An endless recipient stream: only what is consumed gets rendered
+    results = list(itertools.islice(send_merged(messages, send_batch, batch_size=4), 10))
+
+    assert [m["to"] for m, _ in results][:2] == ["user0@example.com", "user1@example.com"]
+    assert batches == [4, 4, 4]
+    assert rendered[-1] == "Hi 11"
+
+
+def test_unrenderable_records_are_reported_and_skipped():
+    skipped = []
+    records = [{"email": "a@example.com", "name": "Ann"}, {"email": "b@example.com"}, {"name": "X"}]
+    sent = []
+
+    def send_mail(to, subject, message):
+        sent.append((to, subject))
+        return {"success": True}
+
+    messages = merge(records, "Hi {{ name }}", "body", on_error=lambda r, e: skipped.append(r))
+    list(send_merged(messages, one_by_one(send_mail)))
+
+    assert sent == [("a@example.com", "Hi Ann")]
+    assert len(skipped) == 2
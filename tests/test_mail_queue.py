@@ -0,0 +1,143 @@
+import threading
+import time
+
+import pytest
+
+from scripts.Mailers.mail_queue import FunctionBackend, MailQueue, SMTPBackend, TokenBucket
+from tests.smtp_stub import SMTPStub
+
+
+class FlakyBackend:
+    """Backend failing the first `failures` sends of every message."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.attempts = {}
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, message):
+        with self.lock:
+            key = message["to"][0]
+            self.attempts[key] = self.attempts.get(key, 0) + 1
+            if self.attempts[key] <= self.failures:
+                raise ConnectionError("temporary failure")
+            self.sent.append(key)
+
+    def close(self):
+        pass
+
+
+def test_queue_sends_through_smtp_backend(tmp_path):
+    with SMTPStub() as smtp:
+        backend = SMTPBackend("127.0.0.1", smtp.port, "me@example.com", "secret", use_tls=False)
+        queue = MailQueue(str(tmp_path / "outbox.db"), {"smtp": backend}, workers=4)
+        for i in range(20):
+            queue.enqueue(f"user{i}@example.com", "Hi", "<p>Hello</p>", sender="me@example.com")
+
+        counts = queue.run()
+
+    assert counts == {"sent": 20}
+    assert len(smtp.messages) == 20
+    # Each worker thread logged in once and reused its connection
+    assert smtp.logins <= 4
+
+
+def test_enqueue_is_idempotent_and_outbox_survives_restart(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    queue = MailQueue(path, {"fake": FlakyBackend()})
+    queue.enqueue("a@example.com", "Hi", "Body", provider="fake", message_id="m1")
+    queue.enqueue("a@example.com", "Hi", "Body", provider="fake", message_id="m1")
+    # Simulate a crash while m2 was being sent
+    queue.enqueue("b@example.com", "Hi", "Body", provider="fake", message_id="m2")
+    queue.db.execute("UPDATE outbox SET state = 'inflight' WHERE id = 'm2'")
+    queue.close()
+
+    backend = FlakyBackend()
+    restarted = MailQueue(path, {"fake": backend})
+
+    assert restarted.run() == {"sent": 2}
+    assert sorted(backend.sent) == ["a@example.com", "b@example.com"]
+    assert restarted.run() == {"sent": 2}
+    assert len(backend.sent) == 2
+
+
+def test_failed_sends_are_retried_then_marked_failed(tmp_path):
+    backend = FlakyBackend(failures=1)
+    queue = MailQueue(str(tmp_path / "outbox.db"), {"fake": backend},
+                      max_attempts=2, retry_delay=0.01)
+    queue.enqueue("a@example.com", "Hi", "Body", provider="fake")
+    assert queue.run() == {"sent": 1}
+
+    always_failing = FlakyBackend(failures=10)
+    queue = MailQueue(str(tmp_path / "other.db"), {"fake": always_failing},
+                      max_attempts=2, retry_delay=0.01)
+    queue.enqueue("a@example.com", "Hi", "Body", provider="fake")
+    assert queue.run() == {"failed": 1}
+    assert always_failing.attempts["a@example.com"] == 2
+
+
+def test_provider_rate_limit(tmp_path):
+    queue = MailQueue(str(tmp_path / "outbox.db"), {"fake": FlakyBackend()}, workers=8,
+                      provider_rates={"fake": 50})
+    for i in range(60):
+        queue.enqueue(f"user{i}@example.com", "Hi", "Body", provider="fake")
+
+    start = time.monotonic()
+    queue.run()
+
+    # 50 messages burst immediately, the other 10 wait for refills at 50/s
+    assert time.monotonic() - start >= 0.15
+
+
+def test_token_bucket_allows_burst():
+    import asyncio
+
+    bucket = TokenBucket(rate=1000, burst=5)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    start = time.monotonic()
+    asyncio.run(take(5))
+    assert time.monotonic() - start < 0.05
+
+
+def test_provider_function_backends_refuse_sender_and_plain_text(tmp_path):
+    sent = []
+    backend = FunctionBackend("brevo", lambda to, subject, message: sent.append(to) or {"success": True})
+    queue = MailQueue(str(tmp_path / "outbox.db"), {"brevo": backend})
+
+    with pytest.raises(ValueError, match="sender"):
+        queue.enqueue("a@example.com", "Hi", "<p>Hi</p>", provider="brevo", sender="me@example.com")
+    with pytest.raises(ValueError, match="HTML"):
+        queue.enqueue("a@example.com", "Hi", "Hi", provider="brevo", html=False)
+    queue.enqueue("a@example.com", "Hi", "<p>Hi</p>", provider="brevo")
+
+    assert queue.run() == {"sent": 1}
+    assert sent == [["a@example.com"]]
+
+
+def test_rates_must_be_positive(tmp_path):
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError, match="fake"):
+        MailQueue(str(tmp_path / "outbox.db"), {"fake": FlakyBackend()}, provider_rates={"fake": 0})
+    with pytest.raises(ValueError, match="sender_rate"):
+        MailQueue(str(tmp_path / "outbox.db"), {"fake": FlakyBackend()}, sender_rate=-1)
+
+
+def test_idempotent_backends_get_the_message_id(tmp_path):
+    keys = []
+
+    def send_once(to, subject, message, key):
+        keys.append(key)
+        return {"success": True}
+
+    backend = FunctionBackend("resend", send_once, idempotent=True)
+    queue = MailQueue(str(tmp_path / "outbox.db"), {"resend": backend})
+    queue.enqueue("a@example.com", "Hi", "<p>Hi</p>", provider="resend", message_id="welcome-a")
+
+    assert queue.run() == {"sent": 1}
+    assert keys == ["welcome-a"]
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import scripts.Mailers as Mailers
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+
+
+def loaded_after(statement):
+    code = (f"import sys; sys.path.insert(0, {SCRIPTS_DIR!r}); import Mailers; {statement}; "
+            "print(' '.join(sorted(m for m in sys.modules if m.startswith(('Mailers', 'requests', 'resend', 'email.mime', 'smtplib')))))")
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          check=True).stdout.split()
+
+
+def test_package_import_loads_no_provider():
+    assert loaded_after("pass") == ["Mailers"]
+
+
+def test_providers_and_their_dependencies_load_on_first_use():
+    loaded = loaded_after("Mailers.get_provider('brevo')")
+
+    assert "Mailers.brevoMailer" in loaded
+    assert "Mailers.resendMailer" not in loaded
+    # requests is only needed once a request is actually sent
+    assert "requests" not in loaded
+
+
+def test_facade_delegates_to_the_provider(monkeypatch):
+    calls = []
+    brevo = Mailers.get_provider("brevo")
+    monkeypatch.setattr(brevo, "send_batch", lambda messages: calls.append(messages) or ["ok"])
+
+    assert Mailers.send_batch([{"to": "a@example.com"}], provider="brevo") == ["ok"]
+    assert Mailers.MergeTemplate("{{ x }}").render({"x": 1}) == "1"
+    with pytest.raises(ValueError):
+        Mailers.get_provider("carrier-pigeon")
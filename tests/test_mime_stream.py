@@ -0,0 +1,102 @@
+import email
+import os
+import smtplib
+import time
+
+from scripts.Mailers import mime_stream
+from scripts.Mailers.mime_stream import StreamingMessage, send_streaming
+from tests.smtp_stub import SMTPStub
+
+
+def test_streamed_attachment_round_trips_through_smtp(tmp_path):
+    data = os.urandom(300_000)
+    attachment = tmp_path / "archive.bin"
+    attachment.write_bytes(data)
+    message = StreamingMessage("me@example.com", ["a@example.com"], [], "Files", "See attached",
+                               attachments=[str(attachment)], cache_dir=str(tmp_path / "cache"))
+
+    with SMTPStub() as stub:
+        server = smtplib.SMTP("127.0.0.1", stub.port)
+        refused = send_streaming(server, "me@example.com", ["a@example.com"], message.spool(1024))
+        server.quit()
+
+    assert refused == {}
+    parsed = email.message_from_bytes(stub.messages[0][2])
+    body, part = parsed.get_payload()
+    assert body.get_payload() == "See attached"
+    assert part.get_filename() == "archive.bin"
+    assert part.get_payload(decode=True) == data
+    assert max(len(line) for line in part.get_payload().splitlines()) == 76
+
+
+def test_encoded_attachments_are_cached_by_content(tmp_path, monkeypatch):
+    attachment = tmp_path / "report.txt"
+    attachment.write_bytes(b"quarterly numbers\n" * 1000)
+    cache_dir = str(tmp_path / "cache")
+    first = StreamingMessage("me@example.com", [], [], "R", "", attachments=[str(attachment)],
+                             cache_dir=cache_dir).as_bytes()
+    assert len(os.listdir(cache_dir)) == 1
+
+    def fail(path):
+        raise AssertionError("attachment encoded again")
+
+    monkeypatch.setattr(mime_stream, "encode_base64_chunks", fail)
+    second = StreamingMessage("me@example.com", [], [], "R", "", attachments=[str(attachment)],
+                              cache_dir=cache_dir).as_bytes()
+    first_part = email.message_from_bytes(first).get_payload()[1]
+    second_part = email.message_from_bytes(second).get_payload()[1]
+    assert first_part.get_payload(decode=True) == second_part.get_payload(decode=True)
+
+
+def test_default_cache_is_private_to_the_user(tmp_path, attachment_cache):
+    attachment = tmp_path / "report.txt"
+    attachment.write_bytes(b"quarterly numbers\n" * 100)
+    StreamingMessage("me@example.com", [], [], "R", "", attachments=[str(attachment)]).as_bytes()
+
+    assert os.stat(attachment_cache).st_mode & 0o777 == 0o700
+    assert len(os.listdir(attachment_cache)) == 1
+
+
+def test_planted_cache_files_are_not_sent(tmp_path):
+    attachment = tmp_path / "report.txt"
+    attachment.write_bytes(b"real contents\n" * 100)
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    os.chmod(shared, 0o777)
+    planted = b"Zm9yZ2Vk\r\n"
+    (shared / f"{mime_stream.file_hash(str(attachment))}.b64").write_bytes(planted)
+
+    # A directory others can write to is not trusted at all
+    message = StreamingMessage("me@example.com", [], [], "R", "", attachments=[str(attachment)],
+                               cache_dir=str(shared)).as_bytes()
+    part = email.message_from_bytes(message).get_payload()[1]
+    assert part.get_payload(decode=True) == attachment.read_bytes()
+
+    # In a private directory, an entry of the wrong size is re-encoded
+    os.chmod(shared, 0o700)
+    message = StreamingMessage("me@example.com", [], [], "R", "", attachments=[str(attachment)],
+                               cache_dir=str(shared)).as_bytes()
+    part = email.message_from_bytes(message).get_payload()[1]
+    assert part.get_payload(decode=True) == attachment.read_bytes()
+
+
+def test_cache_evicts_least_recently_used_encodings(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"file{i}.bin"
+        path.write_bytes(os.urandom(3000))    # 4104 bytes once encoded
+        paths.append(str(path))
+
+    for path in paths[:2]:
+        StreamingMessage("me@example.com", [], [], "R", "", attachments=[path],
+                         cache_dir=cache_dir, cache_max_bytes=10_000).as_bytes()
+        time.sleep(0.01)
+    StreamingMessage("me@example.com", [], [], "R", "", attachments=[paths[0]],   # Used again
+                     cache_dir=cache_dir, cache_max_bytes=10_000).as_bytes()
+    time.sleep(0.01)
+    StreamingMessage("me@example.com", [], [], "R", "", attachments=[paths[2]],
+                     cache_dir=cache_dir, cache_max_bytes=10_000).as_bytes()
+
+    kept = {name[:-4] for name in os.listdir(cache_dir)}
+    assert kept == {mime_stream.file_hash(paths[0]), mime_stream.file_hash(paths[2])}
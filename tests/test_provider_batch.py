@@ -0,0 +1,120 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scripts.Mailers import brevoMailer, resendMailer
+
+
+class ProviderStub(BaseHTTPRequestHandler):
+    """Stands in for the Brevo and Resend APIs; addresses containing "bad" are invalid."""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+    clients = set()
+    idempotency_keys = []
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        payload = json.loads(body)
+        ProviderStub.requests.append((self.path, self.headers.get("Content-Encoding"), payload))
+        ProviderStub.clients.add(self.client_address)
+
+        if self.path == "/brevo":
+            if "unverified" in payload["sender"]["email"]:
+                return self.reply(400, {"code": "invalid_parameter", "message": "Sender not verified"})
+            versions = payload["messageVersions"]
+            bad = [to["email"] for v in versions for to in v["to"] if "bad" in to["email"]]
+            if bad:
+                return self.reply(400, {"code": "invalid_parameter",
+                                        "message": f"Invalid email address {bad[0]}"})
+            return self.reply(201, {"messageIds": [f"<id{i}>" for i in range(len(versions))]})
+
+        if self.path == "/resend/emails":
+            ProviderStub.idempotency_keys.append(self.headers.get("Idempotency-Key"))
+            return self.reply(200, {"id": "email-1"})
+
+        bad = [i for i, email in enumerate(payload) if any("bad" in to for to in email["to"])]
+        data = [{"id": f"id{i}"} for i in range(len(payload)) if i not in bad]
+        self.reply(200, {"data": data, "errors": [{"index": i, "message": "Invalid `to` field"}
+                                                   for i in bad]})
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    ProviderStub.requests, ProviderStub.clients, ProviderStub.idempotency_keys = [], set(), []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ProviderStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(brevoMailer, "BREVO_URL", f"{base}/brevo")
+    monkeypatch.setattr(resendMailer, "RESEND_BATCH_URL", f"{base}/resend/emails/batch")
+    monkeypatch.setattr(resendMailer, "RESEND_URL", f"{base}/resend/emails")
+    for name in ("BREVO_KEY", "BREVO_MAIL", "RESEND_KEY", "RESEND_MAIL"):
+        monkeypatch.setenv(name, "me@example.com")
+    yield ProviderStub
+    server.shutdown()
+    server.server_close()
+
+
+def messages(count, bad=()):
+    return [{"to": "bad@example.com" if i in bad else f"user{i}@example.com",
+             "subject": f"Hello {i}", "message": f"<p>Message {i}</p>" * 20}
+            for i in range(count)]
+
+
+def test_brevo_batches_and_isolates_rejected_messages(provider):
+    results = brevoMailer.send_batch(messages(10, bad={6}), batch_size=5)
+
+    assert [r["success"] for r in results] == [True] * 6 + [False] + [True] * 3
+    assert results[6]["error"] == "Invalid email address bad@example.com"
+    # 2 batches, then the rejected one again without the message its error names
+    assert len(provider.requests) == 2 + 1
+    assert [encoding for _, encoding, _ in provider.requests] == [None] * 3
+    assert len(provider.clients) == 1
+
+
+def test_rejection_of_the_whole_batch_is_not_bisected(provider, monkeypatch):
+    monkeypatch.setenv("BREVO_MAIL", "unverified@example.com")
+    results = brevoMailer.send_batch(messages(1000), batch_size=500)
+
+    assert {r["error"] for r in results} == {"Sender not verified"}
+    assert len(provider.requests) == 2
+
+
+def test_batch_bodies_are_compressed_only_on_request(provider):
+    brevoMailer.send_batch(messages(4), compress=True)
+    resendMailer.send_batch(messages(4))
+
+    assert [encoding for _, encoding, _ in provider.requests] == ["gzip", None]
+
+
+def test_resend_maps_partial_failures_to_messages(provider):
+    results = resendMailer.send_batch(messages(150, bad={3, 120}))
+
+    assert [i for i, r in enumerate(results) if not r["success"]] == [3, 120]
+    assert results[4]["data"] == {"id": "id4"}
+    assert results[121]["data"] == {"id": "id21"}
+    assert [len(payload) for _, _, payload in provider.requests] == [100, 50]
+    assert len(provider.clients) == 1
+
+
+def test_resend_send_once_passes_the_idempotency_key(provider):
+    result = resendMailer.send_once("a@example.com", "Hi", "<p>Hi</p>", "message-42")
+
+    assert result == {"success": True, "data": {"id": "email-1"}}
+    assert provider.idempotency_keys == ["message-42"]
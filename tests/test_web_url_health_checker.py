@@ -0,0 +1,498 @@
+import asyncio
+import csv
+import json
+import socket
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from scripts.web_url_health_checker import (  # noqa: E402
+    BinarySink,
+    BloomFilter,
+    CheckCache,
+    CircuitBreaker,
+    CSVSink,
+    HealthMonitor,
+    LatencyHistogram,
+    MetricsExporter,
+    NDJSONSink,
+    URLHealthChecker,
+    host_of,
+    iter_urls_from_file,
+    main,
+    normalize_url,
+    read_binary_results,
+    split_interval,
+    unique_urls,
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Tiny HTTP server used instead of real websites:
+    /ok answers 200, /missing answers 404, and /slow and /hang answer 200 after
+    a short and a long delay.
+    HEAD is refused with 405 for /nohead.
+    """
+
+    protocol_version = "HTTP/1.1"
+    active = 0
+    peak = 0
+    methods = []
+    clients = set()
+    lock = threading.Lock()
+
+    def do_HEAD(self):
+        StubHandler.methods.append("HEAD")
+        self.send_response(405 if self.path.startswith("/nohead") else 200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        StubHandler.methods.append("GET")
+        StubHandler.clients.add(self.client_address)
+        with StubHandler.lock:
+            StubHandler.active += 1
+            StubHandler.peak = max(StubHandler.peak, StubHandler.active)
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.2)
+            if self.path.startswith("/hang"):
+                time.sleep(1.0)
+            if self.path.startswith("/etag"):
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", '"v1"')
+                self.send_header("Content-Length", "5")
+                self.end_headers()
+                self.wfile.write(b"hello")
+                return
+            if self.path.startswith("/missing"):
+                status = 404
+            elif self.path.startswith("/error"):
+                status = 503
+            else:
+                status = 200
+            body = b"hello"
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with StubHandler.lock:
+                StubHandler.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    StubHandler.peak = 0
+    StubHandler.methods = []
+    StubHandler.clients = set()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_host_of_adds_scheme_and_lowercases():
+    assert host_of("Example.COM/path") == "example.com"
+    assert host_of("http://localhost:8080/x") == "localhost:8080"
+
+
+def test_check_url_up_and_down(server):
+    checker = URLHealthChecker(timeout=5)
+
+    up = checker.check_url(f"{server}/ok")
+    down = checker.check_url(f"{server}/missing")
+
+    assert up["status"] == "UP"
+    assert up["status_code"] == 200
+    assert down["status"] == "DOWN"
+    assert down["error"] == "HTTP 404"
+
+
+def test_concurrent_check_urls_keeps_input_order(server):
+    urls = [f"{server}/slow?{i}" for i in range(6)] + [f"{server}/missing"]
+    checker = URLHealthChecker(timeout=5, concurrency=8, per_host_limit=8)
+
+    start = time.monotonic()
+    results = checker.check_urls(urls)
+    elapsed = time.monotonic() - start
+
+    assert [r["url"] for r in results] == urls
+    assert [r["status"] for r in results] == ["UP"] * 6 + ["DOWN"]
+    # Six 200 ms requests in parallel finish well before 6 * 200 ms
+    assert elapsed < 1.0
+    assert checker.session is None
+
+
+def test_per_host_limit_caps_parallel_requests(server):
+    urls = [f"{server}/slow?{i}" for i in range(6)]
+    checker = URLHealthChecker(timeout=5, concurrency=6, per_host_limit=2)
+
+    checker.check_urls(urls)
+
+    assert StubHandler.peak <= 2
+
+
+def test_invalid_probe_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        URLHealthChecker(probe="options")
+
+
+def test_head_probe_skips_get_when_head_succeeds(server):
+    with URLHealthChecker(timeout=5, use_session=True, probe="head") as checker:
+        result = checker.check_url(f"{server}/ok")
+
+    assert result["status"] == "UP"
+    assert StubHandler.methods == ["HEAD"]
+    assert checker.session is None
+
+
+def test_head_probe_falls_back_to_streamed_get(server):
+    with URLHealthChecker(timeout=5, use_session=True, probe="head") as checker:
+        result = checker.check_url(f"{server}/nohead")
+
+    assert result["status"] == "UP"
+    assert StubHandler.methods == ["HEAD", "GET"]
+
+
+def test_split_interval():
+    assert split_interval("https://example.com 30") == ("https://example.com", 30.0)
+    assert split_interval("https://example.com") == ("https://example.com", None)
+    assert split_interval("https://example.com soon") == ("https://example.com", None)
+
+
+def test_monitor_keeps_bounded_history(server):
+    checker = URLHealthChecker(timeout=5, concurrency=4)
+    monitor = HealthMonitor(checker, interval=0.05, jitter=0.5, history=3)
+    monitor.add_url(f"{server}/ok")
+    monitor.add_url(f"{server}/missing", interval=0.02)
+
+    latest = monitor.run(max_rounds=12)
+
+    assert {r["url"]: r["status"] for r in latest} == {
+        f"{server}/ok": "UP",
+        f"{server}/missing": "DOWN",
+    }
+    assert len(monitor.history[f"{server}/missing"]) == 3
+
+
+def test_hanging_url_does_not_hold_up_the_others(server):
+    monitor = HealthMonitor(URLHealthChecker(timeout=5, concurrency=4), interval=0.05, jitter=0)
+    for path in ("/hang", "/ok", "/missing"):
+        monitor.add_url(f"{server}{path}")
+
+    async def run_for_a_while():
+        task = asyncio.ensure_future(monitor.run_async())
+        await asyncio.sleep(0.6)
+        monitor.stop()
+        await asyncio.wait_for(task, timeout=5)
+
+    asyncio.run(run_for_a_while())
+
+    assert len(monitor.history[f"{server}/hang"]) == 1
+    assert len(monitor.history[f"{server}/ok"]) >= 6
+    assert len(monitor.history[f"{server}/missing"]) >= 6
+
+
+def test_monitor_stop_ends_run(server):
+    monitor = HealthMonitor(URLHealthChecker(timeout=5), interval=0.01)
+    monitor.add_url(f"{server}/ok")
+
+    async def stop_soon():
+        task = asyncio.ensure_future(monitor.run_async())
+        await asyncio.sleep(0.2)
+        monitor.stop()
+        await asyncio.wait_for(task, timeout=5)
+
+    asyncio.run(stop_soon())
+
+    assert monitor.latest_results()[0]["status"] == "UP"
+
+
+def test_streaming_sinks_append_each_result(server, tmp_path):
+    ndjson_path = tmp_path / "report.ndjson"
+    csv_path = tmp_path / "report.csv"
+    bin_path = tmp_path / "report.bin"
+    urls = [f"{server}/ok", f"{server}/missing"]
+
+    for _ in range(2):
+        sinks = [NDJSONSink(str(ndjson_path)), CSVSink(str(csv_path)),
+                 BinarySink(str(bin_path), buffer_size=10, fsync="never")]
+        with URLHealthChecker(timeout=5, concurrency=2, sinks=sinks,
+                              keep_results=False) as checker:
+            assert checker.check_urls(urls) == []
+
+    lines = [json.loads(line) for line in ndjson_path.read_text().splitlines()]
+    assert sorted(r["status"] for r in lines) == ["DOWN", "DOWN", "UP", "UP"]
+
+    with open(csv_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 4
+
+    # The binary records keep every field of the NDJSON ones
+    assert list(read_binary_results(str(bin_path))) == lines
+    down = next(r for r in lines if r["status"] == "DOWN")
+    assert down["status_code"] == 404
+    assert down["error"] == "HTTP 404"
+
+
+def test_binary_records_truncate_on_a_character_boundary(tmp_path):
+    bin_path = tmp_path / "report.bin"
+    result = {"url": "http://example.com/" + "é" * 40000, "status": "DOWN",
+              "status_code": None, "response_time": None,
+              "timestamp": "2024-01-01 00:00:00", "error": "ü" * 40000,
+              "dns_time": 1.5, "connect_time": None, "tls_time": None, "ttfb": None,
+              "attempts": 3, "circuit": "half-open"}
+    with BinarySink(str(bin_path)) as sink:
+        sink.write(result)
+
+    (record,) = read_binary_results(str(bin_path))
+    assert result["url"].startswith(record["url"])
+    assert len(record["url"].encode("utf-8")) == 0xFFFE - 1
+    assert record["error"] == "ü" * (0xFFFE // 2)
+    assert {k: record[k] for k in ("dns_time", "ttfb", "attempts", "circuit")} == \
+        {"dns_time": 1.5, "ttfb": None, "attempts": 3, "circuit": "half-open"}
+
+
+def test_summary_uses_running_aggregates(server, capsys):
+    checker = URLHealthChecker(timeout=5, keep_results=False)
+    checker.check_urls([f"{server}/ok", f"{server}/missing"])
+
+    assert checker.results == []
+    assert (checker.stats.total, checker.stats.up, checker.stats.down) == (2, 1, 1)
+
+    checker.print_summary()
+    out = capsys.readouterr().out
+    assert "Total URLs checked: 2" in out
+    assert "UP: 1 (50.0%)" in out
+
+
+def test_latency_histogram_percentiles_and_merge():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for value in range(1, 501):
+        first.record(value)
+    for value in range(501, 1001):
+        second.record(value)
+
+    first.merge(second)
+
+    assert first.count == 1000
+    assert first.max == 1000
+    assert first.percentile(50) == pytest.approx(500, rel=0.01)
+    assert first.percentile(99) == pytest.approx(990, rel=0.01)
+    assert first.percentile(100) == 1000
+    assert len(first.counts) < 1000
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_check_url_records_phase_timings(server):
+    with URLHealthChecker(timeout=5, use_session=True) as checker:
+        first = checker.check_url(f"{server}/ok")
+        reused = checker.check_url(f"{server}/ok")
+
+    assert first["connect_time"] > 0
+    assert first["tls_time"] == 0
+    assert 0 <= first["ttfb"] <= first["response_time"]
+    # The second check reuses the keep-alive connection
+    assert reused["connect_time"] == 0
+    assert reused["dns_time"] == 0
+
+
+def test_retries_server_errors_with_backoff(server):
+    checker = URLHealthChecker(timeout=5, retries=2, backoff=0.01)
+
+    result = checker.check_url(f"{server}/error")
+    not_found = checker.check_url(f"{server}/missing")
+
+    assert result["status"] == "DOWN"
+    assert result["attempts"] == 3
+    # A 404 means the host answered, so it is not retried
+    assert not_found["attempts"] == 1
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Only one probe is let through while half-open
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_circuit_short_circuits_checks(server):
+    urls = [f"{server}/error?{i}" for i in range(4)]
+    checker = URLHealthChecker(timeout=5, concurrency=1, breaker_threshold=2,
+                               breaker_reset=60)
+
+    results = checker.check_urls(urls)
+
+    assert [r["circuit"] for r in results] == ["closed", "open", "open", "open"]
+    assert [r["error"] for r in results[2:]] == ["Circuit open"] * 2
+    assert StubHandler.methods == ["GET", "GET"]
+
+
+def test_sharded_workers_match_single_process_results(server):
+    other_host = server.replace("127.0.0.1", "localhost")
+    urls = [f"{server}/ok", f"{other_host}/missing", f"{server}/missing", f"{other_host}/ok"]
+    checker = URLHealthChecker(timeout=5, concurrency=2, workers=2, per_url_stats=True)
+
+    results = checker.check_urls(urls)
+
+    assert [r["url"] for r in results] == urls
+    assert [r["status"] for r in results] == ["UP", "DOWN", "DOWN", "UP"]
+    assert set(results[0]) == set(URLHealthChecker(timeout=5).check_url(urls[0]))
+    assert (checker.stats.total, checker.stats.up) == (4, 2)
+    assert checker.stats.latency["response_time"].count == 4
+    assert len(checker.stats.per_url) == 4
+
+
+def test_metrics_exporter_serves_incremental_state(server):
+    metrics = MetricsExporter()
+    port = metrics.start(port=0)
+    try:
+        checker = URLHealthChecker(timeout=5, concurrency=2, metrics=metrics)
+        checker.check_urls([f"{server}/ok", f"{server}/missing", f"{server}/ok"])
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            page = response.read().decode("utf-8")
+            content_type = response.headers["Content-Type"]
+    finally:
+        metrics.stop()
+
+    assert content_type.startswith("text/plain")
+    assert f'url_health_up{{url="{server}/ok"}} 1' in page
+    assert f'url_health_up{{url="{server}/missing"}} 0' in page
+    assert f'url_health_status_code{{url="{server}/missing"}} 404' in page
+    assert f'url_health_checks_total{{url="{server}/ok",status="UP"}} 2' in page
+    assert f'url_health_response_seconds_count{{url="{server}/ok"}} 2' in page
+    assert f'url_health_response_seconds_bucket{{url="{server}/ok",le="+Inf"}} 2' in page
+
+
+def test_cache_sends_conditional_requests_and_persists(server, tmp_path):
+    cache_file = tmp_path / "cache.json"
+    url = f"{server}/etag"
+
+    with URLHealthChecker(timeout=5, cache=CheckCache(str(cache_file))) as checker:
+        first = checker.check_url(url)
+
+    # A new checker (a new run of the script) starts from the saved cache
+    with URLHealthChecker(timeout=5, cache=CheckCache(str(cache_file))) as checker:
+        second = checker.check_url(url)
+
+    assert first["status_code"] == 200
+    assert second["status_code"] == 304
+    assert second["status"] == "UP"
+
+
+def test_cache_reuses_dns_answers_and_evicts(monkeypatch):
+    lookups = []
+    real_getaddrinfo = socket.getaddrinfo
+
+    def counting_getaddrinfo(host, *args, **kwargs):
+        lookups.append(host)
+        return real_getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", counting_getaddrinfo)
+    cache = CheckCache(dns_ttl=60, max_entries=1)
+
+    cache.resolve("127.0.0.1", 80)
+    cache.resolve("127.0.0.1", 80)
+    cache.resolve("localhost", 80)
+    cache.resolve("127.0.0.1", 80)
+
+    assert lookups == ["127.0.0.1", "localhost", "127.0.0.1"]
+    assert len(cache.dns) == 1
+
+
+def test_normalize_url():
+    assert normalize_url("Example.COM/") == "https://example.com"
+    assert normalize_url("HTTP://Example.com/Path/?q=1#top") == "http://example.com/Path?q=1"
+
+
+def test_unique_urls_streams_file_with_set_or_bloom(tmp_path):
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("# crawl export\nexample.com\nhttps://EXAMPLE.com/\n\n"
+                        "https://example.org/a\nhttps://example.org/a/\n")
+
+    exact = list(unique_urls(iter_urls_from_file(str(url_file))))
+    bloom = list(unique_urls(iter_urls_from_file(str(url_file)), bloom_capacity=1000))
+
+    assert exact == ["https://example.com", "https://example.org/a"]
+    assert bloom == exact
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"https://host{i}.example")
+
+    assert all(f"https://host{i}.example" in bloom for i in range(10000))
+    false_positives = sum(f"https://other{i}.example" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+def test_check_urls_consumes_iterables_lazily(server):
+    checker = URLHealthChecker(timeout=5, concurrency=2)
+    checked_when_pulled = []
+
+    def feed():
+        for i in range(30):
+            checked_when_pulled.append(checker.stats.total)
+            yield f"{server}/ok?{i}"
+
+    results = checker.check_urls(feed())
+
+    assert [r["url"] for r in results] == [f"{server}/ok?{i}" for i in range(30)]
+    # Checks were finishing while the generator was still being read
+    assert checked_when_pulled[-1] > 0
+
+
+def test_streamed_run_still_writes_requested_reports(server, tmp_path, monkeypatch):
+    output = str(tmp_path / "report")
+    monkeypatch.setattr("sys.argv", ["web_url_health_checker.py", "-u", f"{server}/ok",
+                                     f"{server}/missing", "-o", output, "--stream", "ndjson",
+                                     "--json"])
+
+    assert main() == 1
+    with open(f"{output}.json") as f:
+        assert [r["status_code"] for r in json.load(f)] == [200, 404]
+    with open(f"{output}.ndjson") as f:
+        assert len(f.readlines()) == 2
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_no_keep_alive_opens_a_connection_per_check(server, workers):
+    urls = [f"{server}/ok?{i}" for i in range(8)]
+    with URLHealthChecker(timeout=5, concurrency=4, workers=workers, use_session=False) as checker:
+        checker.check_urls(urls)
+    assert len(StubHandler.clients) == 8
+
+    StubHandler.clients = set()
+    with URLHealthChecker(timeout=5, concurrency=2, workers=workers, use_session=True) as checker:
+        checker.check_urls(urls)
+    assert len(StubHandler.clients) <= 2 * workers